@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+# Every statistic here is computed on one batch of rows and merged with the
+# statistics of other batches, in any grouping and order, into the statistic
+# of all the rows. NaNs are skipped column by column.
+
+
+def _batch(values):
+    values = np.asarray(values, dtype=float)
+    # 2-D batches pass as they are, empty ones included
+    return values if values.ndim == 2 else values.reshape(len(values), -1)
+
+
+def _chan(n_a, mean_a, n_b, mean_b):
+    """
+    Combined count, mean, and delta * n_a * n_b / n of two batches (Chan et al.),
+    the term that corrects their sums of squared deviations
+    """
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = np.where(n > 0, n_b / n, 0.0)
+    return n, mean_a + delta * weight, delta * n_a * weight
+
+
+class Moments:
+    """
+    Count, mean and sum of squared deviations of each column. A batch is
+    reduced in two passes and folded in with the parallel form of Welford's
+    update, so no sum of squares ever grows with the number of rows.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.n = np.zeros(len(self.columns))
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros(len(self.columns))
+
+    def _combine(self, n, mean, m2):
+        total, combined, correction = _chan(self.n, self.mean, n, mean)
+        self.m2 = self.m2 + m2 + correction * (mean - self.mean)
+        self.n, self.mean = total, combined
+        return self
+
+    def update(self, values):
+        values = _batch(values)
+        valid = ~np.isnan(values)
+        n = valid.sum(axis=0).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, np.where(valid, values, 0.0).sum(axis=0) / n, 0.0)
+        deviations = np.where(valid, values - mean, 0.0)
+        return self._combine(n, mean, (deviations * deviations).sum(axis=0))
+
+    def merge(self, other):
+        return self._combine(other.n, other.mean, other.m2)
+
+    def result(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'count': self.n.astype(int),
+                'mean': np.where(self.n > 0, self.mean, np.nan),
+                'std': np.sqrt(self.m2 / (self.n - 1)),
+            }, index=self.columns)
+
+
+class CoMoments:
+    """
+    Pairwise-complete covariance and Pearson correlation of every x column with
+    every y column, merged the same way as Moments
+    """
+
+    def __init__(self, x_columns, y_columns):
+        self.x_columns, self.y_columns = list(x_columns), list(y_columns)
+        shape = (len(self.x_columns), len(self.y_columns))
+        self.n = np.zeros(shape)
+        self.mean_x, self.mean_y = np.zeros(shape), np.zeros(shape)
+        self.m2_x, self.m2_y, self.c_xy = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+
+    def _combine(self, n, mean_x, mean_y, m2_x, m2_y, c_xy):
+        total, combined_x, correction_x = _chan(self.n, self.mean_x, n, mean_x)
+        _, combined_y, correction_y = _chan(self.n, self.mean_y, n, mean_y)
+        self.m2_x = self.m2_x + m2_x + correction_x * (mean_x - self.mean_x)
+        self.m2_y = self.m2_y + m2_y + correction_y * (mean_y - self.mean_y)
+        self.c_xy = self.c_xy + c_xy + correction_x * (mean_y - self.mean_y)
+        self.n, self.mean_x, self.mean_y = total, combined_x, combined_y
+        return self
+
+    def update(self, x, y):
+        x, y = _batch(x)[:, :, None], _batch(y)[:, None, :]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        n = valid.sum(axis=0).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_x = np.where(n > 0, np.where(valid, x, 0.0).sum(axis=0) / n, 0.0)
+            mean_y = np.where(n > 0, np.where(valid, y, 0.0).sum(axis=0) / n, 0.0)
+        dx = np.where(valid, x - mean_x, 0.0)
+        dy = np.where(valid, y - mean_y, 0.0)
+        return self._combine(n, mean_x, mean_y, (dx * dx).sum(axis=0), (dy * dy).sum(axis=0), (dx * dy).sum(axis=0))
+
+    def merge(self, other):
+        return self._combine(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+
+    def result(self):
+        """
+        One row per (x, y) pair with its count, covariance and correlation
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = self.c_xy / (self.n - 1)
+            corr = self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+        index = pd.MultiIndex.from_product([self.x_columns, self.y_columns], names=['x', 'y'])
+        return pd.DataFrame({'count': self.n.ravel().astype(int), 'cov': cov.ravel(), 'corr': corr.ravel()},
+                            index=index)
+
+
+class Extrema:
+    """
+    Minimum and maximum of each column
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.min = np.full(len(self.columns), np.inf)
+        self.max = np.full(len(self.columns), -np.inf)
+
+    def update(self, values):
+        values = _batch(values)
+        valid = ~np.isnan(values)
+        self.min = np.minimum(self.min, np.where(valid, values, np.inf).min(axis=0, initial=np.inf))
+        self.max = np.maximum(self.max, np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf))
+        return self
+
+    def merge(self, other):
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    def result(self):
+        return pd.DataFrame({
+            'min': np.where(np.isfinite(self.min), self.min, np.nan),
+            'max': np.where(np.isfinite(self.max), self.max, np.nan),
+        }, index=self.columns)
+
+
+class QuantileSketch:
+    """
+    Quantiles of one column from counts of its values rounded to `resolution`.
+    Memory grows with the range of the values, not the number of rows, merges
+    are exact, and quantiles are within resolution / 2 of np.quantile (exact
+    for the sentiment scores, which are multiples of 0.01).
+    """
+
+    def __init__(self, resolution=0.01):
+        self.resolution = resolution
+        self.counts = {}
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        buckets, counts = np.unique(np.round(values / self.resolution).astype(np.int64), return_counts=True)
+        for bucket, count in zip(buckets.tolist(), counts.tolist()):
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        return self
+
+    def merge(self, other):
+        if other.resolution != self.resolution:
+            raise ValueError(f"cannot merge sketches of resolution {self.resolution} and {other.resolution}")
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        return self
+
+    def quantile(self, q):
+        """
+        Linearly interpolated quantile(s), like np.quantile's default method
+        """
+        q = np.asarray(q, dtype=float)
+        if not self.counts:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        buckets = np.array(sorted(self.counts))
+        cumulative = np.cumsum([self.counts[b] for b in buckets])
+        position = q * (cumulative[-1] - 1)
+        low, high = np.floor(position), np.ceil(position)
+        value_low = buckets[np.searchsorted(cumulative, low, side='right')] * self.resolution
+        value_high = buckets[np.searchsorted(cumulative, high, side='right')] * self.resolution
+        return value_low + (value_high - value_low) * (position - low)
@@ -0,0 +1,167 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Outlets that make up each language average
+OUTLETS = {
+    'english': ['tribune', 'brecorder', 'nation', 'express'],
+    'urdu': ['daily_jang', 'daily_dunya', 'daily_pakistan', 'nawai_waqt'],
+}
+
+PRICE_COLUMNS = ['petrol', 'hsd']
+AVERAGE_COLUMNS = [
+    'word_count',
+    'openai_headline_overall_sentiment',
+    'gemini_headline_overall_sentiment',
+    'openai_text_overall_sentiment',
+    'gemini_text_overall_sentiment',
+]
+OUTPUT_COLUMNS = ['date', 'petrol', 'hsd', 'petrol_change', 'diesel_change'] + AVERAGE_COLUMNS
+
+CHUNK_SIZE = 50_000
+
+
+def outlet_path(outlet, data_dir='data'):
+    return os.path.join(data_dir, f'{outlet}_data.csv')
+
+
+def average_path(language, data_dir='data'):
+    return os.path.join(data_dir, f'{language}_average_data.csv')
+
+
+def normalize_dates(dates):
+    """
+    Bring the mixed date formats of the outlet files (2024-12-16, 16/12/2024) to ISO strings
+    """
+    # dayfirst would also swap day and month of ISO dates, so parse each format explicitly
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    day_first = pd.to_datetime(dates, format='%d/%m/%Y', errors='coerce')
+    return parsed.fillna(day_first).dt.strftime('%Y-%m-%d')
+
+
+def _partial_sums(chunk, after=None):
+    """
+    Per-date sums and non-null counts of one chunk of an outlet file
+    """
+    # An outlet file has far fewer distinct dates than rows, so parse each once
+    # and drop the rows up to `after` before any of their values are converted
+    raw = chunk['date'].dropna().unique()
+    dates = chunk['date'].map(dict(zip(raw, normalize_dates(pd.Series(raw))))).astype(object)
+    if after is not None:
+        keep = (dates > after).to_numpy()
+        chunk, dates = chunk[keep], dates[keep]
+    chunk = chunk.assign(date=dates)
+
+    values = chunk[PRICE_COLUMNS + AVERAGE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    values['date'] = chunk['date']
+    grouped = values.groupby('date')
+    return grouped.sum().join(grouped.count(), rsuffix='_count')
+
+
+def average_chunks(chunks, after=None):
+    """
+    Reduce a stream of outlet rows to per-date means, keeping only dates later
+    than `after` when it is given
+    """
+    totals = None
+    for chunk in chunks:
+        partial = _partial_sums(chunk, after)
+        if partial.empty:
+            continue
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+
+    columns = PRICE_COLUMNS + AVERAGE_COLUMNS
+    if totals is None or totals.empty:
+        return pd.DataFrame(columns=['date'] + columns)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = totals[columns] / totals[[c + '_count' for c in columns]].to_numpy()
+    return means.sort_index().rename_axis('date').reset_index()
+
+
+def _has_dates_after(path, after):
+    """
+    False when the cached outlet statistics of the file show it has no date
+    later than `after`, so the file need not be read at all
+    """
+    from outlet_stats import load_cached_stats
+
+    stats = load_cached_stats(path)
+    return stats is None or stats.prices is None or stats.prices.index.max() > after
+
+
+def aggregate_language(language, data_dir='data', after=None, chunksize=CHUNK_SIZE):
+    """
+    Stream every outlet of a language in chunks and reduce it to per-date means.
+    Only dates later than `after` are kept when it is given; outlets whose
+    cached statistics have no such date are skipped without being read.
+    """
+    usecols = ['date'] + PRICE_COLUMNS + AVERAGE_COLUMNS
+    paths = [outlet_path(outlet, data_dir) for outlet in OUTLETS[language]]
+    if after is not None:
+        paths = [path for path in paths if _has_dates_after(path, after)]
+    chunks = (chunk for path in paths for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize))
+    return average_chunks(chunks, after)
+
+
+def build_averages(language, data_dir='data', output=None, rebuild=False, frames=None):
+    """
+    Write data/<language>_average_data.csv, appending only dates that are not in it yet.
+    `frames` are outlet rows to average instead of reading the outlet files, for
+    when only newly added articles can contain new dates. Returns the number of
+    new rows.
+
+    A rebuild does not reproduce the shipped average files: those were made
+    from an earlier state of the outlet files, and averaging the current ones
+    gives 102 English and 112 Urdu dates instead of 97 each, with sentiment
+    means up to 0.66 and prices up to 30 apart on the dates they share.
+    Rebuild into another directory (--output-dir) to compare.
+    """
+    output = output or average_path(language, data_dir)
+
+    existing = None
+    if not rebuild and os.path.exists(output):
+        existing = pd.read_csv(output, index_col=0)
+
+    last_date = existing['date'].max() if existing is not None and len(existing) else None
+    if frames is None:
+        new = aggregate_language(language, data_dir, after=last_date)
+    else:
+        new = average_chunks(frames, after=last_date)
+    if new.empty:
+        return 0
+
+    # The change columns continue from the last published price
+    prices = new[PRICE_COLUMNS]
+    if last_date is not None:
+        previous = existing.loc[existing['date'] == last_date, PRICE_COLUMNS].iloc[[-1]]
+        prices = pd.concat([previous, prices])
+    changes = prices.diff().iloc[-len(new):].to_numpy()
+    new['petrol_change'] = changes[:, 0]
+    new['diesel_change'] = changes[:, 1]
+
+    new = new[OUTPUT_COLUMNS].round(3)
+    start = len(existing) if last_date is not None else 0
+    new.index = range(start, start + len(new))
+
+    if last_date is None:
+        new.to_csv(output)
+    else:
+        new.to_csv(output, mode='a', header=False)
+    return len(new)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the language averages from the outlet files")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default=None, help="defaults to the data directory")
+    parser.add_argument('--rebuild', action='store_true', help="recompute every date instead of appending; does not reproduce the shipped "
+                             "average files, see build_averages")
+    args = parser.parse_args()
+
+    for language in OUTLETS:
+        output = average_path(language, args.output_dir or args.data_dir)
+        added = build_averages(language, args.data_dir, output=output, rebuild=args.rebuild)
+        print(f"{language}: {added} new dates written to {output}")
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
+from data_loader import load_dataset
 
 # Read the CSV file
-df = pd.read_csv('data/english_average_data.csv')
+df = load_dataset('data/english_average_data.csv')
 
 # Identify price hikes (positive changes in petrol or diesel prices)
 price_hikes = df[(df['petrol_change'] > 0) | (df['diesel_change'] > 0)].copy()
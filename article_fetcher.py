@@ -0,0 +1,361 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from aggregate_outlets import OUTLETS
+
+try:
+    import aiohttp
+except ImportError:  # checked in fetch_all so the manifest helpers work without it
+    aiohttp = None
+
+LINKS_DIR = 'links'
+PAGES_DIR = os.path.join('data', '.cache', 'pages')
+STATE_PATH = os.path.join('data', '.cache', 'fetch_state.json')
+
+# Statuses worth retrying; everything else is reported as a failure straight away
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Outlets whose manifests list articles; other files in links/ (the YouTube
+# list for comment_harvester) are not fetched
+ARTICLE_OUTLETS = [outlet for outlets in OUTLETS.values() for outlet in outlets]
+
+URL_PATTERN = re.compile(r'https?://\S+')
+
+# A date, then ' - ' (or ' = ' in a few hand-typed lines), then the rest
+ENTRY_PATTERN = re.compile(r'^(\S+)\s+[-=]\s+(.*)$')
+
+
+def parse_date(text):
+    """
+    Manifest dates are DD/MM/YYYY, with a few DD/MM/YY entries
+    """
+    for fmt in ('%d/%m/%Y', '%d/%m/%y'):
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_manifest(path):
+    """
+    Entries of one links/<outlet>_links.txt file. Lines look like `DD/MM/YYYY - URL`;
+    a line can carry several URLs (joined with AND) or a trailing note. Lines
+    without a URL are skipped, and lines with a URL but no readable date are
+    skipped and counted.
+    """
+    outlet = os.path.basename(path)[:-len('_links.txt')]
+    entries = []
+    skipped = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            match = ENTRY_PATTERN.match(line.strip())
+            date_text, rest = match.groups() if match else ('', line)
+            urls = URL_PATTERN.findall(rest)
+            date = parse_date(date_text)
+            if not urls or date is None:
+                if URL_PATTERN.search(line):
+                    skipped.append(number)
+                continue
+            note = URL_PATTERN.sub('', rest).replace(' AND ', ' ').strip()
+            for url in urls:
+                entries.append({'outlet': outlet, 'date': date, 'url': url, 'note': note})
+    if skipped:
+        lines = ', '.join(map(str, skipped[:5])) + (', ...' if len(skipped) > 5 else '')
+        print(f"{path}: skipped {len(skipped)} lines with a URL but no date (lines {lines})")
+    return entries
+
+
+def load_manifests(links_dir=LINKS_DIR, outlets=None):
+    """
+    Every manifest entry of the article outlets keyed by outlet, with URLs
+    repeated within an outlet dropped
+    """
+    unknown = set(outlets or []) - set(ARTICLE_OUTLETS)
+    if unknown:
+        raise ValueError(f"not article outlets: {', '.join(sorted(unknown))}")
+    manifests = {}
+    for outlet in sorted(outlets or ARTICLE_OUTLETS):
+        path = os.path.join(links_dir, f'{outlet}_links.txt')
+        if not os.path.exists(path):
+            continue
+        entries = parse_manifest(path)
+        if not entries:
+            continue
+        seen = set()
+        unique = []
+        for entry in entries:
+            if entry['url'] not in seen:
+                seen.add(entry['url'])
+                unique.append(entry)
+        manifests[entries[0]['outlet']] = unique
+    return manifests
+
+
+def page_path(entry, pages_dir=PAGES_DIR):
+    name = hashlib.sha256(entry['url'].encode('utf-8')).hexdigest()[:20]
+    return os.path.join(pages_dir, entry['outlet'], f"{entry['date']}_{name}.html")
+
+
+class FetchState:
+    """
+    Per-URL validators and content hashes, saved as JSON so an interrupted or
+    repeated run only downloads pages that are new or have changed
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self.entries = {}
+        self.dirty = 0
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    def update(self, url, record, flush_every=25):
+        self.entries[url] = record
+        self.dirty += 1
+        if self.dirty >= flush_every:
+            self.save()
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+        self.dirty = 0
+
+
+def _write_page(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def _retry_delay(attempt, backoff, retry_after=None):
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * 2 ** attempt * (1 + random.random() / 2)
+
+
+async def fetch_entry(session, entry, state, semaphore, pages_dir=PAGES_DIR, retries=4, backoff=1.0):
+    """
+    Fetch one manifest entry, sending the stored ETag/Last-Modified so unchanged pages
+    come back as 304. Returns 'new', 'changed', 'unchanged' or 'failed'.
+    """
+    previous = state.get(entry['url'])
+    path = page_path(entry, pages_dir)
+    headers = {}
+    if previous and os.path.exists(path):
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    error = None
+    for attempt in range(retries):
+        retry_after = None
+        async with semaphore:
+            try:
+                async with session.get(entry['url'], headers=headers) as response:
+                    if response.status == 304 and not headers:
+                        # Nothing was sent to validate against, so there is no page to keep
+                        error = "HTTP 304 without a stored page"
+                        break
+                    if response.status == 304:
+                        record = dict(previous, checked_at=time.time())
+                        record.pop('error', None)
+                        state.update(entry['url'], record)
+                        return 'unchanged'
+                    if response.status in RETRY_STATUSES:
+                        error = f"HTTP {response.status}"
+                        retry_after = response.headers.get('Retry-After')
+                    elif response.status >= 400:
+                        error = f"HTTP {response.status}"
+                        break
+                    else:
+                        body = await response.read()
+                        digest = hashlib.sha256(body).hexdigest()
+                        known = previous.get('sha256') if previous else None
+                        if known != digest or not os.path.exists(path):
+                            _write_page(path, body)
+                        outcome = 'new' if not known else 'unchanged' if known == digest else 'changed'
+                        state.update(entry['url'], {
+                            'outlet': entry['outlet'],
+                            'date': entry['date'],
+                            'path': path,
+                            'sha256': digest,
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                            'checked_at': time.time(),
+                        })
+                        return outcome
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+        if attempt < retries - 1:
+            await asyncio.sleep(_retry_delay(attempt, backoff, retry_after))
+
+    record = dict(previous or {}, outlet=entry['outlet'], date=entry['date'], error=error)
+    state.update(entry['url'], record)
+    return 'failed'
+
+
+async def fetch_all(manifests, state, pages_dir=PAGES_DIR, per_outlet=4, per_host=4,
+                    total=32, timeout=60, retries=4, backoff=1.0, skip_fetched=False):
+    """
+    Fetch every manifest entry over one pooled session: connections are capped per
+    host and in total, and each outlet has its own concurrency limit. With
+    skip_fetched, URLs that already have a stored page are not requested at all.
+    Returns the outcome counts per outlet.
+    """
+    if aiohttp is None:
+        raise ImportError("article_fetcher needs aiohttp: pip install aiohttp")
+
+    connector = aiohttp.TCPConnector(limit=total, limit_per_host=per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    headers = {'User-Agent': 'Mozilla/5.0 (compatible; STRP article fetcher)'}
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=headers) as session:
+        tasks = {}
+        for outlet, entries in manifests.items():
+            semaphore = asyncio.Semaphore(per_outlet)
+            for entry in entries:
+                previous = state.get(entry['url'])
+                if skip_fetched and previous and previous.get('sha256') and not previous.get('error'):
+                    continue
+                task = fetch_entry(session, entry, state, semaphore, pages_dir, retries, backoff)
+                tasks.setdefault(outlet, []).append(task)
+
+        try:
+            results = {}
+            for outlet, outcomes in zip(tasks, await asyncio.gather(*[asyncio.gather(*t) for t in tasks.values()])):
+                results[outlet] = {o: outcomes.count(o) for o in ('new', 'changed', 'unchanged', 'failed')}
+            return results
+        finally:
+            state.save()
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the outlet sites: every path answers with a small page
+    derived from the path, an ETag and Last-Modified, and 304 when the request
+    carries the current ETag. The first `fail_first` requests of each path get
+    a 503 with Retry-After: 0, to exercise the retries.
+    """
+
+    fail_first = 0
+    requests = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            seen = self.requests.get(self.path, 0)
+            self.requests[self.path] = seen + 1
+        if seen < self.fail_first:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = f'<html><body><h1>{self.path}</h1></body></html>'.encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_standin(port=8766, background=False, fail_first=0):
+    """
+    Run the local stand-in server on 127.0.0.1; with background=True it runs in a
+    daemon thread and the server object is returned so it can be shut down
+    """
+    handler = type('StandInHandler', (_StandInHandler,), {'fail_first': fail_first, 'requests': {}})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"Stand-in outlet server on http://127.0.0.1:{server.server_port}/")
+    server.serve_forever()
+
+
+def standin_manifests(manifests, base_url):
+    """
+    The manifests with every URL pointed at a stand-in server, keeping each
+    URL's outlet, path and query so the pages stay distinct
+    """
+    moved = {}
+    for outlet, entries in manifests.items():
+        moved[outlet] = []
+        for entry in entries:
+            parts = urlsplit(entry['url'])
+            path = f"/{outlet}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+            moved[outlet].append(dict(entry, url=base_url.rstrip('/') + path))
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the article pages listed in links/*.txt")
+    parser.add_argument('outlets', nargs='*', help="outlets to fetch, all by default")
+    parser.add_argument('--links-dir', default=LINKS_DIR)
+    parser.add_argument('--pages-dir', default=PAGES_DIR)
+    parser.add_argument('--state', default=STATE_PATH)
+    parser.add_argument('--per-outlet', type=int, default=4, help="concurrent requests per outlet")
+    parser.add_argument('--per-host', type=int, default=4, help="pooled connections per host")
+    parser.add_argument('--retries', type=int, default=4)
+    parser.add_argument('--skip-fetched', action='store_true', help="do not revalidate pages already on disk")
+    parser.add_argument('--serve-standin', type=int, metavar='PORT', help="run the local stand-in server")
+    parser.add_argument('--fail-first', type=int, default=0,
+                        help="with --serve-standin, answer the first N requests of each page with 503")
+    parser.add_argument('--standin', metavar='URL', help="fetch every page from a stand-in server at URL instead")
+    args = parser.parse_args()
+
+    if args.serve_standin is not None:
+        serve_standin(args.serve_standin, fail_first=args.fail_first)
+        raise SystemExit
+
+    try:
+        manifests = load_manifests(args.links_dir, args.outlets)
+        if args.standin:
+            manifests = standin_manifests(manifests, args.standin)
+        print(f"{sum(map(len, manifests.values()))} URLs across {len(manifests)} outlets")
+        start = time.perf_counter()
+        results = asyncio.run(fetch_all(manifests, FetchState(args.state), args.pages_dir,
+                                        per_outlet=args.per_outlet, per_host=args.per_host,
+                                        retries=args.retries, skip_fetched=args.skip_fetched))
+        for outlet, counts in results.items():
+            print(f"{outlet:<16} " + "  ".join(f"{k}: {v}" for k, v in counts.items()))
+        print(f"Finished in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
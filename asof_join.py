@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from aggregate_outlets import normalize_dates
+from price_store import load_prices
+
+PRICE_SERIES = ('brent', 'usdpkr', 'petrol', 'diesel')
+
+# Prices are published twice a month, so a price older than this is stale
+DEFAULT_TOLERANCE = pd.Timedelta(days=16)
+
+
+def asof_positions(left, right, tolerance=None):
+    """
+    For every left date, the position of the latest right date at or before it,
+    or -1 when there is none within `tolerance`. `right` must be sorted; `left`
+    can be in any order. One binary search per row, so O(n log m).
+    """
+    left = np.asarray(left, dtype='datetime64[ns]')
+    right = np.asarray(right, dtype='datetime64[ns]')
+    positions = np.searchsorted(right, left, side='right') - 1
+
+    found = (positions >= 0) & ~np.isnat(left)
+    if tolerance is not None and len(right):
+        gap = left - right[np.clip(positions, 0, None)]
+        found &= gap <= np.timedelta64(pd.Timedelta(tolerance))
+    return np.where(found, positions, -1)
+
+
+def asof_join(dates, right, tolerance=None):
+    """
+    Backward as-of lookup of every column of a date-indexed frame. Each column is
+    matched against its own non-missing dates, so a sparse series (Brent only
+    from 2021) does not hide behind a denser one. Returns a frame aligned with `dates`.
+    """
+    right = right.sort_index()
+    result = {}
+    for column in right.columns:
+        series = right[column].dropna()
+        positions = asof_positions(dates, series.index.values, tolerance)
+        values = series.to_numpy(dtype=float)
+        result[column] = np.where(positions >= 0, values[np.clip(positions, 0, None)] if len(values) else np.nan, np.nan)
+    return pd.DataFrame(result, index=getattr(dates, 'index', None))
+
+
+def attach_prices(df, series=PRICE_SERIES, tolerance=DEFAULT_TOLERANCE, date_column='date',
+                  suffix='_price', prices=None):
+    """
+    Copy of an outlet or average frame with the latest Brent, exchange rate and pump
+    prices on or before each row's date added as <series>_price columns
+    """
+    prices = load_prices(list(series)) if prices is None else prices[list(series)]
+    dates = pd.to_datetime(normalize_dates(df[date_column].astype(str)))
+    joined = asof_join(dates, prices, tolerance)
+    result = df.copy()
+    for column in joined.columns:
+        result[column + suffix] = joined[column].to_numpy()
+    return result
+
+
+if __name__ == "__main__":
+    from data_loader import load_dataset
+
+    prices = load_prices(list(PRICE_SERIES))
+    for language in ('english', 'urdu'):
+        df = attach_prices(load_dataset(f'data/{language}_average_data.csv'), prices=prices)
+        columns = [s + '_price' for s in PRICE_SERIES]
+        print(f"{language}: {len(df)} rows, matched " +
+              ", ".join(f"{c} {df[c].notna().sum()}" for c in columns))
+
+        # Sentiment against the change in each input cost since the previous row
+        changes = df[columns].diff()
+        sentiment = df[['openai_text_overall_sentiment', 'gemini_text_overall_sentiment']]
+        print(changes.apply(lambda c: sentiment.corrwith(c)).round(3).to_string())
+        print()
@@ -0,0 +1,291 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregate_outlets import OUTLETS, aggregate_language, average_path, outlet_path
+from data_loader import load_dataset
+from metrics_engine import MODELS, compute_metrics
+from synthetic_corpus import generate_corpus
+
+RESULTS_DIR = 'benchmark_results'
+
+DEFAULT_SCALES = (1, 10, 100)
+
+# Benchmarks register themselves here in definition order
+BENCHMARKS = []
+
+
+def benchmark(name, scaled=True):
+    """
+    Register a benchmark. The function takes the corpus directory and its scale
+    factor and returns a (callable, rows) pair: the callable is what gets timed,
+    rows the number of records it processes. Unscaled benchmarks only run on the
+    shipped data.
+    """
+    def register(setup):
+        BENCHMARKS.append({'name': name, 'setup': setup, 'scaled': scaled})
+        return setup
+    return register
+
+
+def scale_corpus(factor, data_dir='data', output_dir=None):
+    """
+    Write a corpus `factor` times the size of the shipped one: synthetic outlet
+    files with `factor` times each outlet's row count, and the average files
+    with every row repeated `factor` times (jittering the sentiment so repeated
+    rows are not identical). Returns the directory, which is the shipped data
+    directory itself for factor 1.
+    """
+    if factor == 1:
+        return data_dir
+    output_dir = output_dir or tempfile.mkdtemp(prefix=f'strp_x{factor}_')
+    rng = np.random.default_rng(factor)
+
+    for outlets in OUTLETS.values():
+        for outlet in outlets:
+            rows = len(pd.read_csv(outlet_path(outlet, data_dir), usecols=['date']))
+            generate_corpus(rows * factor, output_dir, [outlet], seed=factor, data_dir=data_dir)
+
+    for language in OUTLETS:
+        path = average_path(language, data_dir)
+        df = pd.read_csv(path, index_col=0)
+        scaled = pd.concat([df] * factor, ignore_index=True)
+        for column in scaled.columns:
+            if column.endswith('overall_sentiment'):
+                values = pd.to_numeric(scaled[column], errors='coerce')
+                scaled[column] = (values + rng.normal(0, 0.05, len(scaled))).round(4)
+        scaled.to_csv(os.path.join(output_dir, os.path.basename(path)))
+    return output_dir
+
+
+def _outlet_paths(data_dir):
+    return [outlet_path(o, data_dir) for outlets in OUTLETS.values() for o in outlets]
+
+
+@benchmark('load_csv')
+def bench_load_csv(data_dir, factor):
+    paths = _outlet_paths(data_dir)
+    rows = sum(len(pd.read_csv(p, usecols=['date'])) for p in paths)
+    return (lambda: [pd.read_csv(p) for p in paths]), rows
+
+
+@benchmark('load_cached')
+def bench_load_cached(data_dir, factor):
+    paths = _outlet_paths(data_dir)
+    # Warm the Arrow cache so only the memory-mapped read is timed
+    rows = sum(len(load_dataset(p)) for p in paths)
+    return (lambda: [load_dataset(p) for p in paths]), rows
+
+
+@benchmark('aggregate')
+def bench_aggregate(data_dir, factor):
+    rows = sum(len(pd.read_csv(p, usecols=['date'])) for p in _outlet_paths(data_dir))
+    return (lambda: [aggregate_language(language, data_dir) for language in OUTLETS]), rows
+
+
+@benchmark('load_compact')
+def bench_load_compact(data_dir, factor):
+    from schema import load_compact
+    paths = _outlet_paths(data_dir)
+    rows = sum(len(load_dataset(p)) for p in paths)
+    return (lambda: [load_compact(p) for p in paths]), rows
+
+
+@benchmark('metrics')
+def bench_metrics(data_dir, factor):
+    frames = [load_dataset(average_path(language, data_dir)) for language in OUTLETS]
+
+    def run():
+        for df in frames:
+            for model in MODELS:
+                compute_metrics(df, model)
+    return run, sum(len(df) for df in frames)
+
+
+def _script_benchmark(function):
+    def run():
+        # The scripts report through print; keep that out of the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            function()
+    return run
+
+
+@benchmark('correct_gemini_stats', scaled=False)
+def bench_correct_gemini_stats(data_dir, factor):
+    from correct_gemini_stats import generate_correct_gemini_statistics
+    return _script_benchmark(generate_correct_gemini_statistics), len(load_dataset(average_path('english', data_dir)))
+
+
+@benchmark('comprehensive_model_comparison', scaled=False)
+def bench_comprehensive_model_comparison(data_dir, factor):
+    from comprehensive_model_comparison import comprehensive_model_comparison
+    rows = sum(len(load_dataset(average_path(language, data_dir))) for language in OUTLETS)
+    return _script_benchmark(comprehensive_model_comparison), rows
+
+
+@benchmark('price_chart')
+def bench_price_chart(data_dir, factor):
+    """
+    The Price Trends figure of price_analysis/trends.py, drawn with the shared
+    chart_renderer code and rendered to memory. At larger scales each series is
+    interpolated onto a proportionally denser date grid.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from chart_renderer import PRICE_TREND_SERIES, draw_price_trends
+    from price_store import load_series
+
+    series = []
+    for name, _, _ in PRICE_TREND_SERIES:
+        df = load_series(name, start='2021-06-01')
+        if factor > 1:
+            ticks = df['date'].astype('int64').to_numpy()
+            dense = np.linspace(ticks[0], ticks[-1], len(df) * factor)
+            df = pd.DataFrame({'date': pd.to_datetime(dense.astype('int64')),
+                               'price': np.interp(dense, ticks, df['price'].to_numpy(dtype=float))})
+        series.append(df)
+
+    def run():
+        fig = Figure(figsize=(10, 6))
+        FigureCanvasAgg(fig)
+        draw_price_trends(fig.add_subplot(), series, [l for _, l, _ in PRICE_TREND_SERIES],
+                          [c for _, _, c in PRICE_TREND_SERIES])
+        fig.tight_layout()
+        fig.savefig(io.BytesIO(), format='png')
+    return run, sum(len(df) for df in series)
+
+
+def time_call(function, repeat=5, min_time=0.2):
+    """
+    Time a callable: one untimed warm-up, then `repeat` rounds, each calling it
+    enough times to last at least `min_time`. Returns per-call seconds.
+    """
+    function()
+    start = time.perf_counter()
+    function()
+    single = time.perf_counter() - start
+    number = max(1, int(min_time / single)) if single > 0 else 1
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, only=None, repeat=5, keep_corpus=False):
+    """
+    Run every registered benchmark at every scale and return the result records
+    """
+    results = []
+    for factor in scales:
+        data_dir = scale_corpus(factor)
+        try:
+            for bench in BENCHMARKS:
+                if (only and bench['name'] not in only) or (factor != 1 and not bench['scaled']):
+                    continue
+                run, rows = bench['setup'](data_dir, factor)
+                samples = time_call(run, repeat=repeat)
+                median = float(np.median(samples))
+                results.append({
+                    'benchmark': bench['name'],
+                    'scale': factor,
+                    'rows': int(rows),
+                    'repeat': repeat,
+                    'min': min(samples),
+                    'median': median,
+                    'mean': float(np.mean(samples)),
+                    'rows_per_second': rows / median if median > 0 else None,
+                })
+                rate = results[-1]['rows_per_second']
+                rate = '-' if rate is None else f"{rate:,.0f}"
+                print(f"{bench['name']:<32} x{factor:<5} {rows:>10} rows  {median * 1000:>10.2f} ms  "
+                      f"{rate:>14} rows/s")
+        finally:
+            if factor != 1 and not keep_corpus:
+                shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def save_results(results, results_dir=RESULTS_DIR):
+    """
+    Write one JSON file per run, named by time and commit so runs can be compared over time
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    commit = _git_commit()
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'results': results,
+    }
+    path = os.path.join(results_dir, f"{stamp}_{commit or 'nogit'}.json")
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+def compare_results(baseline_path, results):
+    """
+    Print the median time ratio of each benchmark against an earlier results file
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['benchmark'], r['scale']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path} (ratio > 1 means slower now):")
+    for r in results:
+        before = baseline.get((r['benchmark'], r['scale']))
+        if before:
+            print(f"  {r['benchmark']:<32} x{r['scale']:<5} {r['median'] / before['median']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the load, aggregate, metric and chart stages")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="corpus scale factors, e.g. 1 10 100 1000")
+    parser.add_argument('--only', nargs='+', help="benchmark names to run")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', help="earlier results JSON to compare against")
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmarks(args.scales, args.only, args.repeat)
+        if not args.no_save:
+            print(f"\nResults written to {save_results(results, args.results_dir)}")
+        if args.compare:
+            compare_results(args.compare, results)
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
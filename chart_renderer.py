@@ -0,0 +1,281 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from aggregate_outlets import OUTLETS, average_path, normalize_dates, outlet_path
+from data_loader import _file_hash, load_dataset
+from downsampling import axes_width, downsample, downsample_series
+from metrics_engine import FUEL_CHANGE_COLUMNS, MODELS, sentiment_column
+from price_store import DEFAULT_SOURCES, PRICE_DIR, load_series
+
+OUTPUT_DIR = 'charts'
+STATE_NAME = '.render_state.json'
+
+# Part of every chart's input hash; bump it when a drawing function changes
+RENDERER_VERSION = 2
+
+# Lines are cut down to about one point per pixel of the Axes before plotting
+DOWNSAMPLE_METHOD = 'lttb'
+# Markers are only drawn when points are at least this many pixels apart
+MARKER_SPACING = 6
+
+PRICE_TREND_SERIES = [('diesel', 'Diesel', 'b'), ('petrol', 'Petrol', 'c'),
+                      ('brent', 'Brent Crude', 'g'), ('usdpkr', 'Dollar', 'r')]
+
+# Outlet files hold the petrol price as 'petrol' and the diesel price as 'hsd'
+FUEL_PRICE_COLUMNS = {'petrol': 'petrol', 'diesel': 'hsd'}
+
+
+# Drawing functions. They only touch the Axes they are given, so the interactive
+# scripts can draw onto a pyplot figure and the batch renderer onto an Agg one.
+# Long series are downsampled to the Axes' pixel width first, so drawing time
+# does not grow with the length of the raw data.
+
+def _marker(points, width, marker):
+    return marker if len(points) * MARKER_SPACING <= width else None
+
+
+def draw_price_trends(ax, frames, labels, colors, marker='o', width=None):
+    """
+    The Price Trends figure of price_analysis/trends.py
+    """
+    width = width or axes_width(ax)
+    for df, label, color in zip(frames, labels, colors):
+        points = downsample(df, width, method=DOWNSAMPLE_METHOD)
+        ax.plot(points['date'], points['price'], label=label, color=color,
+                marker=_marker(points, width, marker))
+    ax.set_title('Price Trends')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Price (PKR)')
+    ax.grid(True)
+    ax.legend()
+
+
+def draw_series(ax, df, title, ylabel='Price', color='b', width=None):
+    """
+    A single date/price line, as in fuel_chart.py
+    """
+    points = downsample(df, width or axes_width(ax), method=DOWNSAMPLE_METHOD)
+    ax.plot(points['date'], points['price'], linestyle='-', color=color)
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel(ylabel)
+    ax.grid(True)
+
+
+def draw_sentiment_overlay(ax, df, model, fuel, title, width=None):
+    """
+    Per-date mean headline and text sentiment of one model, with the fuel price on a
+    second axis
+    """
+    width = width or axes_width(ax)
+    df = df.assign(date=pd.to_datetime(normalize_dates(df['date'].astype(str))))
+    columns = [sentiment_column(model, 'headline'), sentiment_column(model, 'text'), FUEL_PRICE_COLUMNS[fuel]]
+    daily = df[['date'] + columns].apply(lambda c: pd.to_numeric(c, errors='coerce') if c.name != 'date' else c)
+    daily = daily.groupby('date').mean().sort_index()
+
+    headline = downsample_series(daily[columns[0]], width, DOWNSAMPLE_METHOD)
+    text = downsample_series(daily[columns[1]], width, DOWNSAMPLE_METHOD)
+    price = downsample_series(daily[columns[2]], width, DOWNSAMPLE_METHOD)
+    ax.plot(headline.index, headline, label='Headline sentiment', color='tab:blue')
+    ax.plot(text.index, text, label='Text sentiment', color='tab:orange')
+    ax.axhline(0, color='grey', linewidth=0.8)
+    ax.set_ylabel('Sentiment')
+    ax.set_xlabel('Date')
+    ax.grid(True)
+
+    price_ax = ax.twinx()
+    price_ax.plot(price.index, price, label=f'{fuel.title()} price', color='tab:green', linestyle='--')
+    price_ax.set_ylabel('Price (PKR)')
+
+    lines = ax.get_lines()[:2] + price_ax.get_lines()
+    ax.legend(lines, [line.get_label() for line in lines], loc='upper left')
+    ax.set_title(title)
+
+
+def draw_fuel_response(ax, df, fuel, title):
+    """
+    Fortnightly price changes of one fuel as bars, with every model's headline and
+    text sentiment on a second axis
+    """
+    dates = pd.to_datetime(df['date'])
+    ax.bar(dates, df[FUEL_CHANGE_COLUMNS[fuel]], width=10, color='lightgrey', label=f'{fuel.title()} change')
+    ax.set_ylabel('Price change (PKR)')
+    ax.set_xlabel('Date')
+    ax.grid(True, axis='y')
+
+    sentiment_ax = ax.twinx()
+    for model in MODELS:
+        for section, style in [('headline', '-'), ('text', ':')]:
+            sentiment_ax.plot(dates, df[sentiment_column(model, section)], linestyle=style,
+                              label=f'{model.title()} {section}')
+    sentiment_ax.set_ylabel('Sentiment')
+
+    handles = ax.containers[:1] + sentiment_ax.get_lines()
+    ax.legend(handles, [h.get_label() for h in handles], loc='upper left', fontsize='small')
+    ax.set_title(title)
+
+
+# Chart kinds: how to draw a spec and which files it reads
+
+def _render_price_trends(ax, spec):
+    frames = [load_series(name, start=spec.get('start')) for name, _, _ in PRICE_TREND_SERIES]
+    draw_price_trends(ax, frames, [l for _, l, _ in PRICE_TREND_SERIES], [c for _, _, c in PRICE_TREND_SERIES])
+
+
+def _render_series(ax, spec):
+    df = load_series(spec['series'], start=spec.get('start'), end=spec.get('end'))
+    draw_series(ax, df, spec['title'], spec.get('ylabel', 'Price'))
+
+
+def _render_outlet(ax, spec):
+    df = load_dataset(outlet_path(spec['outlet']))
+    draw_sentiment_overlay(ax, df, spec['model'], spec['fuel'],
+                           f"{spec['outlet']} - {spec['model'].title()} sentiment vs {spec['fuel']} price")
+
+
+def _render_fuel(ax, spec):
+    df = load_dataset(average_path(spec['language']))
+    draw_fuel_response(ax, df, spec['fuel'], f"{spec['language'].title()} articles - {spec['fuel']} price changes")
+
+
+def _price_inputs(spec):
+    names = [n for n, _, _ in PRICE_TREND_SERIES] if spec['kind'] == 'price_trends' else [spec['series']]
+    return [os.path.join(PRICE_DIR, DEFAULT_SOURCES[n]) for n in names]
+
+
+KINDS = {
+    'price_trends': (_render_price_trends, _price_inputs),
+    'series': (_render_series, _price_inputs),
+    'outlet_sentiment': (_render_outlet, lambda spec: [outlet_path(spec['outlet'])]),
+    'fuel_response': (_render_fuel, lambda spec: [average_path(spec['language'])]),
+}
+
+
+def default_charts():
+    """
+    The declarative chart list rendered by the nightly run
+    """
+    charts = [
+        {'name': 'Price_Trends', 'kind': 'price_trends', 'start': '2021-06-01'},
+        {'name': 'PKRUSD', 'kind': 'series', 'series': 'usdpkr', 'title': 'PKR/USD Rate',
+         'start': '2021-01-01', 'end': '2024-12-31'},
+    ]
+    for fuel in FUEL_CHANGE_COLUMNS:
+        charts.append({'name': f'{fuel}_price', 'kind': 'series', 'series': fuel,
+                       'title': f'{fuel.title()} Price', 'ylabel': 'Price (PKR)'})
+        for language in OUTLETS:
+            charts.append({'name': f'{language}_{fuel}_response', 'kind': 'fuel_response',
+                           'language': language, 'fuel': fuel})
+    for outlets in OUTLETS.values():
+        for outlet in outlets:
+            for model in MODELS:
+                charts.append({'name': f'{outlet}_{model}_sentiment', 'kind': 'outlet_sentiment',
+                               'outlet': outlet, 'model': model, 'fuel': 'petrol'})
+    return charts
+
+
+def input_hash(spec):
+    """
+    Hash of everything a chart depends on: the spec itself, the renderer version
+    and the content of its input files
+    """
+    digest = hashlib.sha256(json.dumps([RENDERER_VERSION, spec], sort_keys=True).encode())
+    for path in KINDS[spec['kind']][1](spec):
+        digest.update(_file_hash(path).encode())
+    return digest.hexdigest()
+
+
+def render_chart(spec, output_dir=OUTPUT_DIR, figsize=(10, 6), dpi=100):
+    """
+    Draw one chart on an Agg canvas and write it atomically to <output_dir>/<name>.png
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    KINDS[spec['kind']][0](ax, spec)
+    fig.tight_layout()
+
+    path = os.path.join(output_dir, spec['name'] + '.png')
+    tmp = path + '.tmp'
+    fig.savefig(tmp, format='png')
+    os.replace(tmp, path)
+    return path
+
+
+def _render_task(task):
+    spec, output_dir = task
+    start = time.perf_counter()
+    render_chart(spec, output_dir)
+    return spec['name'], time.perf_counter() - start
+
+
+def render_all(charts=None, output_dir=OUTPUT_DIR, workers=None, force=False):
+    """
+    Render every chart whose inputs changed since its last render, over a process
+    pool. Returns (rendered names, skipped names).
+    """
+    charts = charts or default_charts()
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, STATE_NAME)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+
+    hashes = {spec['name']: input_hash(spec) for spec in charts}
+    pending = [spec for spec in charts
+               if force or state.get(spec['name']) != hashes[spec['name']]
+               or not os.path.exists(os.path.join(output_dir, spec['name'] + '.png'))]
+    skipped = [spec['name'] for spec in charts if spec not in pending]
+
+    rendered = []
+    tasks = [(spec, output_dir) for spec in pending]
+    if workers == 1 or len(tasks) <= 1:
+        results = map(_render_task, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(workers)
+        results = executor.map(_render_task, tasks)
+    try:
+        for name, _ in results:
+            rendered.append(name)
+            # Record each chart as soon as it is written so an interrupted run resumes
+            state[name] = hashes[name]
+            tmp = state_path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(state, f, indent=1, sort_keys=True)
+            os.replace(tmp, state_path)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return rendered, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every chart headlessly, skipping unchanged ones")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="re-render charts whose inputs did not change")
+    parser.add_argument('--only', nargs='+', help="chart names to render")
+    args = parser.parse_args()
+
+    try:
+        charts = default_charts()
+        if args.only:
+            charts = [spec for spec in charts if spec['name'] in args.only]
+        start = time.perf_counter()
+        rendered, skipped = render_all(charts, args.output_dir, args.workers, args.force)
+        print(f"Rendered {len(rendered)} charts, skipped {len(skipped)} unchanged, "
+              f"in {time.perf_counter() - start:.2f}s -> {args.output_dir}/")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,351 @@
+import argparse
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+VIDEO_LINKS = os.path.join('links', 'youtube_links.txt')
+OUTPUT_PATH = 'yt_comments.jsonl'
+COMMENT_SELECTOR = '#content-text'
+
+VIDEO_ID_PATTERN = re.compile(r'(?:[?&]v=|youtu\.be/|/shorts/)([\w-]+)')
+
+
+def video_id(url):
+    """
+    The video id of a watch, youtu.be or shorts URL, or None for anything else
+    """
+    match = VIDEO_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def load_video_urls(path=VIDEO_LINKS):
+    """
+    URLs from the links file, one per video: timestamps and share parameters do not
+    make a video different, so repeats of the same id are dropped
+    """
+    urls = []
+    seen = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            url = line.strip()
+            key = video_id(url) or url
+            if url and key not in seen:
+                seen.add(key)
+                urls.append(url)
+    return urls
+
+
+def make_driver(headless=True):
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument('--window-size=1920x1080')
+    return webdriver.Chrome(options=chrome_options)
+
+
+# Texts of the comment nodes from `offset` on, the total node count and the page height
+NEW_COMMENTS_SCRIPT = """
+const nodes = document.querySelectorAll(arguments[0]);
+const texts = [];
+for (let i = arguments[1]; i < nodes.length; i++) {
+    texts.push(nodes[i].innerText);
+}
+return [texts, nodes.length, document.documentElement.scrollHeight];
+"""
+PAGE_HEIGHT_SCRIPT = "return document.documentElement.scrollHeight"
+
+
+def scroll_and_collect_comments(driver, video_url, timeout=10, max_rounds=200, max_comments=None):
+    """
+    Keep scrolling until the page stops growing, `max_rounds` scrolls have been made
+    or `max_comments` have been collected. Each round only reads the comment nodes
+    rendered since the previous one, and repeated texts are dropped with a set.
+    """
+    comments = []
+    seen = set()
+    offset = 0
+
+    def collect():
+        nonlocal offset
+        texts, offset, height = driver.execute_script(NEW_COMMENTS_SCRIPT, COMMENT_SELECTOR, offset)
+        for text in texts:
+            if text not in seen:
+                seen.add(text)
+                comments.append(text)
+        return height
+
+    for _ in range(max_rounds):
+        height = collect()
+        if max_comments and len(comments) >= max_comments:
+            break
+        driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
+        try:
+            WebDriverWait(driver, timeout).until(lambda d: d.execute_script(PAGE_HEIGHT_SCRIPT) > height)
+        except TimeoutException:
+            # Nothing more was loaded; pick up whatever rendered during the wait
+            collect()
+            break
+
+    return comments[:max_comments] if max_comments else comments
+
+
+def lazy_loading_page(total=120, batch=20, delay_ms=300):
+    """
+    A static page that renders `total` comments `batch` at a time whenever it is
+    scrolled to the bottom, like the YouTube comment section. Every tenth comment
+    repeats an earlier text so deduplication is exercised too.
+    """
+    return f"""<!DOCTYPE html>
+<html><body>
+<div id="comments"></div>
+<script>
+let rendered = 0, loading = false;
+function render() {{
+    const end = Math.min(rendered + {batch}, {total});
+    for (; rendered < end; rendered++) {{
+        const node = document.createElement('div');
+        node.id = 'content-text';
+        node.style.height = '80px';
+        node.innerText = rendered % 10 == 9 ? 'comment ' + (rendered - 9) : 'comment ' + rendered;
+        document.getElementById('comments').appendChild(node);
+    }}
+    loading = false;
+}}
+window.addEventListener('scroll', () => {{
+    const bottom = window.innerHeight + window.scrollY >= document.documentElement.scrollHeight - 2;
+    if (bottom && !loading && rendered < {total}) {{
+        loading = true;
+        setTimeout(render, {delay_ms});
+    }}
+}});
+render();
+</script>
+</body></html>
+"""
+
+
+def check_scroll(total=120, batch=20, headless=True):
+    """
+    Run scroll_and_collect_comments against lazy_loading_page in a real browser and
+    return (collected, expected) comment counts
+    """
+    import tempfile
+
+    with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False) as f:
+        f.write(lazy_loading_page(total, batch))
+    driver = make_driver(headless)
+    try:
+        driver.get('file://' + f.name)
+        comments = scroll_and_collect_comments(driver, f.name, timeout=3)
+    finally:
+        driver.quit()
+        os.remove(f.name)
+    return len(comments), total - total // 10
+
+
+def get_youtube_comments(driver, video_url, timeout=10, max_comments=None):
+    """
+    Open a video and return its comments once the page has rendered
+    """
+    driver.get(video_url)
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    # The comment section is only built once the player metadata is in place
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, 'ytd-comments, #comments'))
+    )
+    return scroll_and_collect_comments(driver, video_url, timeout, max_comments=max_comments)
+
+
+class CheckpointWriter:
+    """
+    Append-only JSONL output, one record per video. Records are flushed to disk as
+    they arrive, and the videos already harvested are read back on start so an
+    interrupted run picks up where it stopped.
+    """
+
+    def __init__(self, path=OUTPUT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; that video is fetched again
+                        continue
+                    if 'error' not in record:
+                        self.done.add(record['video_id'])
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        with self.lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            if 'error' not in record:
+                self.done.add(record['video_id'])
+
+    def close(self):
+        self.file.close()
+
+
+def _worker(tasks, writer, headless, timeout, max_comments, progress):
+    driver = make_driver(headless)
+    try:
+        while True:
+            try:
+                video_url = tasks.get_nowait()
+            except queue.Empty:
+                return
+            record = {'video_url': video_url, 'video_id': video_id(video_url) or video_url,
+                      'harvested_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+            try:
+                record['comments'] = get_youtube_comments(driver, video_url, timeout, max_comments)
+            except (TimeoutException, WebDriverException) as e:
+                record['error'] = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            writer.write(record)
+            if progress is not None:
+                progress.update(1)
+    finally:
+        driver.quit()
+
+
+def harvest(video_urls, output=OUTPUT_PATH, workers=4, headless=True, timeout=10, max_comments=None):
+    """
+    Harvest comments with a pool of browser drivers working one shared queue of
+    videos that are not in the output yet. Returns the number of videos processed.
+    """
+    writer = CheckpointWriter(output)
+    tasks = queue.Queue()
+    seen = set(writer.done)
+    for url in video_urls:
+        key = video_id(url) or url
+        if key not in seen:
+            seen.add(key)
+            tasks.put(url)
+
+    total = tasks.qsize()
+    progress = tqdm(total=total, desc="Processing videos") if tqdm is not None else None
+    threads = [threading.Thread(target=_worker, args=(tasks, writer, headless, timeout, max_comments, progress))
+               for _ in range(min(workers, total))]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        writer.close()
+        if progress is not None:
+            progress.close()
+    return total
+
+
+def read_harvest(path=OUTPUT_PATH):
+    """
+    The latest successful record of every video in a JSONL harvest, in first-seen order
+    """
+    records = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if 'error' not in record:
+                records[record['video_id']] = record
+    return list(records.values())
+
+
+def export_xlsx(jsonl_path=OUTPUT_PATH, xlsx_path='yt_comments.xlsx'):
+    """
+    Write the harvest in the original workbook layout (video URL row, then one
+    comment per row) with a streaming write-only workbook
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    records = read_harvest(jsonl_path)
+    widths = [len('Video URL'), len('Comment')]
+    for record in records:
+        widths[0] = max(widths[0], len(record['video_url']))
+        widths[1] = max([widths[1]] + [len(c) for c in record['comments']])
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.column_dimensions['A'].width = (widths[0] + 2) * 1.2
+    worksheet.column_dimensions['B'].width = (widths[1] + 2) * 1.2
+    worksheet.freeze_panes = 'A2'
+
+    def styled(value, **styles):
+        cell = WriteOnlyCell(worksheet, value=value)
+        for name, style in styles.items():
+            setattr(cell, name, style)
+        return cell
+
+    header_fill = PatternFill(start_color="A6A6A6", end_color="A6A6A6", fill_type="solid")
+    separator_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+    worksheet.append([styled('Video URL', font=Font(bold=True), fill=header_fill),
+                      styled('Comment', font=Font(bold=True), fill=header_fill)])
+
+    for record in records:
+        worksheet.append([styled(record['video_url'], font=Font(bold=True),
+                                 alignment=Alignment(horizontal='center'))])
+        for comment in record['comments']:
+            worksheet.append([None, styled(comment, alignment=Alignment(wrap_text=True))])
+        worksheet.append([styled(None, fill=separator_fill), styled(None, fill=separator_fill)])
+
+    workbook.save(xlsx_path)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest YouTube comments for the videos in links/youtube_links.txt")
+    parser.add_argument('--links', default=VIDEO_LINKS)
+    parser.add_argument('--output', default=OUTPUT_PATH, help="JSONL file, appended to and resumed from")
+    parser.add_argument('--workers', type=int, default=4, help="number of browser drivers")
+    parser.add_argument('--timeout', type=int, default=10, help="seconds to wait for a page element")
+    parser.add_argument('--max-comments', type=int, default=None, help="stop scrolling a video after this many")
+    parser.add_argument('--show-browser', action='store_true')
+    parser.add_argument('--xlsx', help="also export the harvest to this workbook")
+    parser.add_argument('--check-scroll', action='store_true',
+                        help="only test the scrolling collector on a local lazy-loading page")
+    args = parser.parse_args()
+
+    try:
+        if args.check_scroll:
+            collected, expected = check_scroll(headless=not args.show_browser)
+            print(f"Collected {collected} of {expected} distinct comments")
+            raise SystemExit(0 if collected == expected else 1)
+        urls = load_video_urls(args.links)
+        start = time.perf_counter()
+        processed = harvest(urls, args.output, workers=args.workers,
+                            headless=not args.show_browser, timeout=args.timeout,
+                            max_comments=args.max_comments)
+        print(f"{len(urls)} videos, {processed} harvested this run in {time.perf_counter() - start:.1f}s")
+        if args.xlsx:
+            print(f"{export_xlsx(args.output, args.xlsx)} videos written to {args.xlsx}")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -1,69 +1,50 @@
 import pandas as pd
 import numpy as np
+import argparse
+from metrics_engine import ANY_FUEL, fuel_sensitivity
+from streaming import dataset_metrics
 
-def comprehensive_model_comparison():
+def comprehensive_model_comparison(chunk_rows=None):
     """
     Comprehensive comparison of OpenAI vs Gemini sentiment analysis
-    for both English and Urdu articles
+    for both English and Urdu articles, streamed in chunks of
+    `chunk_rows` rows when it is given
     """
-    # Read both datasets
-    english_df = pd.read_csv('data/english_average_data.csv')
-    urdu_df = pd.read_csv('data/urdu_average_data.csv')
+    # Both datasets
+    english_path = 'data/english_average_data.csv'
+    urdu_path = 'data/urdu_average_data.csv'
     
     print("=" * 100)
     print("COMPREHENSIVE OPENAI vs GEMINI SENTIMENT ANALYSIS COMPARISON")
     print("=" * 100)
     
-    # Function to calculate key metrics for any dataset and sentiment columns
-    def calculate_metrics(df, headline_col, text_col, dataset_name):
-        # Basic averages
-        headline_avg = df[headline_col].mean()
-        text_avg = df[text_col].mean()
-        
-        # Price changes analysis
-        price_drops = df[(df['petrol_change'] < 0) | (df['diesel_change'] < 0)]
-        price_hikes = df[(df['petrol_change'] > 0) | (df['diesel_change'] > 0)]
-        
-        # Price drops metrics
-        drops_headline_avg = price_drops[headline_col].mean() if len(price_drops) > 0 else 0
-        drops_text_avg = price_drops[text_col].mean() if len(price_drops) > 0 else 0
-        
-        # Price hikes metrics
-        hikes_headline_avg = price_hikes[headline_col].mean() if len(price_hikes) > 0 else 0
-        hikes_text_avg = price_hikes[text_col].mean() if len(price_hikes) > 0 else 0
-        
-        # Correlations
-        petrol_headline_corr = abs(df['petrol_change'].corr(df[headline_col]))
-        petrol_text_corr = abs(df['petrol_change'].corr(df[text_col]))
-        diesel_headline_corr = abs(df['diesel_change'].corr(df[headline_col]))
-        diesel_text_corr = abs(df['diesel_change'].corr(df[text_col]))
-        
-        avg_petrol_sens = (petrol_headline_corr + petrol_text_corr) / 2
-        avg_diesel_sens = (diesel_headline_corr + diesel_text_corr) / 2
+    # Function to calculate key metrics for any dataset and sentiment model
+    def calculate_metrics(path, model, dataset_name):
+        # All averages and correlations in one pass
+        metrics = dataset_metrics(path, model, chunk_rows=chunk_rows)
+        overall = metrics.loc[(ANY_FUEL, 'all')]
+        price_drops = metrics.loc[(ANY_FUEL, 'drop')]
+        price_hikes = metrics.loc[(ANY_FUEL, 'hike')]
         
         return {
             'dataset': dataset_name,
-            'headline_avg': headline_avg,
-            'text_avg': text_avg,
-            'drops_headline': drops_headline_avg,
-            'drops_text': drops_text_avg,
-            'hikes_headline': hikes_headline_avg,
-            'hikes_text': hikes_text_avg,
-            'petrol_sens': avg_petrol_sens,
-            'diesel_sens': avg_diesel_sens,
-            'drops_count': len(price_drops),
-            'hikes_count': len(price_hikes)
+            'headline_avg': overall['headline_mean'],
+            'text_avg': overall['text_mean'],
+            'drops_headline': price_drops['headline_mean'] if price_drops['count'] > 0 else 0,
+            'drops_text': price_drops['text_mean'] if price_drops['count'] > 0 else 0,
+            'hikes_headline': price_hikes['headline_mean'] if price_hikes['count'] > 0 else 0,
+            'hikes_text': price_hikes['text_mean'] if price_hikes['count'] > 0 else 0,
+            'petrol_sens': fuel_sensitivity(metrics, 'petrol'),
+            'diesel_sens': fuel_sensitivity(metrics, 'diesel'),
+            'drops_count': price_drops['count'],
+            'hikes_count': price_hikes['count']
         }
     
     # Calculate metrics for all combinations
-    english_openai = calculate_metrics(english_df, 'openai_headline_overall_sentiment', 
-                                     'openai_text_overall_sentiment', 'English-OpenAI')
-    english_gemini = calculate_metrics(english_df, 'gemini_headline_overall_sentiment', 
-                                     'gemini_text_overall_sentiment', 'English-Gemini')
-    urdu_openai = calculate_metrics(urdu_df, 'openai_headline_overall_sentiment', 
-                                  'openai_text_overall_sentiment', 'Urdu-OpenAI')
-    urdu_gemini = calculate_metrics(urdu_df, 'gemini_headline_overall_sentiment', 
-                                  'gemini_text_overall_sentiment', 'Urdu-Gemini')
+    english_openai = calculate_metrics(english_path, 'openai', 'English-OpenAI')
+    english_gemini = calculate_metrics(english_path, 'gemini', 'English-Gemini')
+    urdu_openai = calculate_metrics(urdu_path, 'openai', 'Urdu-OpenAI')
+    urdu_gemini = calculate_metrics(urdu_path, 'gemini', 'Urdu-Gemini')
     
     all_metrics = [english_openai, english_gemini, urdu_openai, urdu_gemini]
     
@@ -187,8 +168,13 @@ def comprehensive_model_comparison():
         print(f"  {i}. {name}: {sens:.3f}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the OpenAI and Gemini sentiment of both languages")
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help="stream the datasets in chunks of this many rows instead of loading them")
+    args = parser.parse_args()
+
     try:
-        comprehensive_model_comparison()
+        comprehensive_model_comparison(args.chunk_rows)
     except Exception as e:
         print(f"Error: {e}")
         import traceback
@@ -1,12 +1,14 @@
 import pandas as pd
 import numpy as np
+from data_loader import load_dataset
+from event_windows import event_pairs
 
 def generate_contextual_statistics():
     """
     Generate specific statistics to support the contextual analysis paragraph
     """
     # Read the Urdu dataset (since the paragraph seems to be about Urdu articles)
-    df = pd.read_csv('data/urdu_average_data.csv')
+    df = load_dataset('data/urdu_average_data.csv')
     
     print("=" * 80)
     print("CONTEXTUAL STATISTICS FOR URDU SENTIMENT ANALYSIS")
@@ -91,6 +93,10 @@ def generate_contextual_statistics():
     large_increases = df[df['petrol_change'] >= 20]  # Looking for ~26 PKR increases
     large_decreases = df[df['petrol_change'] <= -30]  # Looking for ~40 PKR decreases
     
+    # Every (increase, decrease of more than 30 PKR 1-2 months later) pair in one pass
+    subsequent = event_pairs(df, 'petrol', hike_threshold=20, cut_threshold=30,
+                             window=(pd.DateOffset(months=1), pd.DateOffset(months=2)), columns=[])
+    
     print("LARGE PRICE INCREASES (≥20 PKR):")
     if len(large_increases) > 0:
         for idx, row in large_increases.iterrows():
@@ -98,17 +104,8 @@ def generate_contextual_statistics():
             print(f"    Headline: {row['openai_headline_overall_sentiment']:.2f}")
             print(f"    Text: {row['openai_text_overall_sentiment']:.2f}")
             
-            # Look for a subsequent large decrease
-            date_obj = pd.to_datetime(row['date'])
-            next_month = date_obj + pd.DateOffset(months=1)
-            next_two_months = date_obj + pd.DateOffset(months=2)
-            
-            # Find decreases in the next 1-2 months
-            subsequent_decreases = df[
-                (pd.to_datetime(df['date']) >= next_month) & 
-                (pd.to_datetime(df['date']) <= next_two_months) & 
-                (df['petrol_change'] < -30)
-            ]
+            # Decreases in the next 1-2 months, from the pairs found up front
+            subsequent_decreases = df.loc[subsequent.loc[subsequent['hike_row'] == idx, 'cut_row']]
             
             if len(subsequent_decreases) > 0:
                 print(f"    Subsequent decrease found:")
@@ -129,7 +126,7 @@ def generate_contextual_statistics():
     print("-" * 60)
     
     # Load English data for comparison
-    english_df = pd.read_csv('data/english_average_data.csv')
+    english_df = load_dataset('data/english_average_data.csv')
     english_drops = english_df[(english_df['petrol_change'] < 0) | (english_df['diesel_change'] < 0)]
     english_hikes = english_df[(english_df['petrol_change'] > 0) | (english_df['diesel_change'] > 0)]
     
@@ -0,0 +1,130 @@
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # the cache is optional, we fall back to parsing the CSV
+    pa = None
+
+CACHE_DIR_NAME = '.cache'
+DATA_FILES = sorted(glob.glob(os.path.join('data', '*.csv')))
+
+
+def _file_hash(path):
+    """
+    SHA-256 of a file, read in 1 MB blocks
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path, variant=None):
+    """
+    Location of the Arrow IPC cache that belongs to a source CSV, or to one
+    converted form of it
+    """
+    directory, name = os.path.split(path)
+    stem = os.path.splitext(name)[0] + (f'.{variant}' if variant else '')
+    return os.path.join(directory, CACHE_DIR_NAME, stem + '.arrow')
+
+
+def _read_cache(path, source_stat, variant=None):
+    """
+    Return the cached table if it is still valid for the source file, else None
+    """
+    cached = cache_path(path, variant)
+    if not os.path.exists(cached):
+        return None
+
+    table = feather.read_table(cached, memory_map=True)
+    meta = table.schema.metadata or {}
+    mtime = meta.get(b'source_mtime_ns', b'').decode()
+    size = meta.get(b'source_size', b'').decode()
+
+    # Cheap check first: unchanged mtime and size means unchanged content
+    if mtime == str(source_stat.st_mtime_ns) and size == str(source_stat.st_size):
+        return table
+
+    # The file was touched, only rebuild if the content actually changed
+    if meta.get(b'source_sha256', b'').decode() == _file_hash(path):
+        _write_cache(path, table, source_stat, variant=variant)
+        return table
+
+    return None
+
+
+def _write_cache(path, table, source_stat, digest=None, variant=None):
+    """
+    Atomically write a table to the cache, stamped with the source file's identity
+    """
+    cached = cache_path(path, variant)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+
+    meta = dict(table.schema.metadata or {})
+    meta[b'source_mtime_ns'] = str(source_stat.st_mtime_ns).encode()
+    meta[b'source_size'] = str(source_stat.st_size).encode()
+    if digest is not None:
+        meta[b'source_sha256'] = digest.encode()
+    table = table.replace_schema_metadata(meta)
+
+    tmp = f'{cached}.{os.getpid()}.tmp'
+    # Uncompressed so that later reads can memory-map the buffers directly
+    feather.write_feather(table, tmp, compression='uncompressed')
+    os.replace(tmp, cached)
+
+
+def load_dataset(path, columns=None, schema=None):
+    """
+    Load one of the data/*.csv files through a memory-mapped Arrow cache.
+    The CSV is parsed once; later calls reuse the cache until the source changes.
+    `schema` is a function that converts the parsed frame (schema.compact);
+    the converted table is cached on its own, under the function's
+    `cache_name`, so the conversion also runs only once.
+    """
+    if pa is None:
+        df = pd.read_csv(path, usecols=columns)
+        return schema(df) if schema is not None else df
+
+    variant = getattr(schema, 'cache_name', schema.__name__) if schema is not None else None
+    source_stat = os.stat(path)
+    table = _read_cache(path, source_stat, variant)
+
+    if table is None:
+        df = pd.read_csv(path)
+        if schema is not None:
+            df = schema(df)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type columns cannot be stored, serve the parsed frame uncached
+            return df[columns] if columns is not None else df
+        _write_cache(path, table, source_stat, digest=_file_hash(path), variant=variant)
+
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+def clear_cache(paths=DATA_FILES):
+    """
+    Remove the cached copies of the given CSV files, converted ones included
+    """
+    for path in paths:
+        converted = glob.glob(glob.escape(cache_path(path))[:-len('.arrow')] + '.*.arrow')
+        for cached in [cache_path(path)] + converted:
+            if os.path.exists(cached):
+                os.remove(cached)
+
+
+if __name__ == "__main__":
+    # Warm the cache for every dataset in data/
+    for path in DATA_FILES:
+        df = load_dataset(path)
+        print(f"{path}: {len(df)} rows, {len(df.columns)} columns")
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+METHODS = ('lttb', 'minmax')
+
+
+def _as_float(values):
+    """
+    Plot coordinates as float64; dates become nanoseconds since the epoch
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Positions of the points kept by Largest-Triangle-Three-Buckets. The first and
+    last points are always kept; every bucket in between contributes the point
+    forming the largest triangle with the previously kept point and the mean of
+    the next bucket, so isolated spikes survive. `x` must be sorted.
+    """
+    x = _as_float(x)
+    y = _as_float(y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n - 2 inner points split into n_out - 2 equal-count buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    # Mean of the bucket after each one; the last bucket looks at the final point
+    next_x = np.append(sums_x[1:] / sizes[1:], x[-1])
+    next_y = np.append(sums_y[1:] / sizes[1:], y[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    previous = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Twice the triangle area, up to sign
+        area = np.abs((x[previous] - next_x[b]) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (next_y[b] - y[previous]))
+        previous = lo + int(np.argmax(area))
+        kept[b + 1] = previous
+    kept[-1] = n - 1
+    return kept
+
+
+def minmax_indices(x, y, n_buckets):
+    """
+    Positions of the lowest and highest point in each of `n_buckets` equal-width
+    x intervals, plus the first and last point, in x order. With one bucket per
+    pixel column the drawn line covers exactly the same pixels as the full series.
+    `x` must be sorted and `y` free of NaN.
+    """
+    x = _as_float(x)
+    y = _as_float(y)
+    n = len(x)
+    if 2 * n_buckets + 2 >= n or n_buckets < 1:
+        return np.arange(n)
+
+    span = x[-1] - x[0]
+    buckets = np.zeros(n, dtype=np.int64) if span <= 0 else \
+        np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    # x is sorted, so every bucket is one run of rows; find each run's extremes
+    # with reduceat, then the first row in the run that holds each of them
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+    sizes = np.diff(np.append(starts, n))
+    positions = np.arange(n)
+    picked = [[0, n - 1]]
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(y, starts), sizes)
+        picked.append(np.minimum.reduceat(np.where(y == extreme, positions, n), starts))
+    return np.unique(np.concatenate(picked))
+
+
+def downsample_indices(x, y, width, method='lttb'):
+    """
+    Positions to plot for a line `width` pixels wide: one point per pixel with
+    LTTB, or the extremes of every pixel column with min/max bucketing
+    """
+    if method == 'lttb':
+        return lttb_indices(x, y, int(width))
+    if method == 'minmax':
+        return minmax_indices(x, y, int(width))
+    raise ValueError(f"Unknown downsampling method {method!r}, expected one of {METHODS}")
+
+
+def downsample(df, width, x='date', y='price', method='lttb'):
+    """
+    Rows of a frame to plot as an x/y line `width` pixels wide. Rows missing either
+    coordinate are dropped and the rest sorted by x first; frames already no
+    longer than the target come back unchanged.
+    """
+    df = df.dropna(subset=[x, y])
+    if not df[x].is_monotonic_increasing:
+        df = df.sort_values(x, kind='stable')
+    return df.iloc[downsample_indices(df[x].to_numpy(), df[y].to_numpy(), width, method)]
+
+
+def downsample_series(series, width, method='lttb'):
+    """
+    downsample for a Series indexed by its x values
+    """
+    series = series.dropna().sort_index(kind='stable')
+    return series.iloc[downsample_indices(series.index.to_numpy(), series.to_numpy(), width, method)]
+
+
+def axes_width(ax):
+    """
+    Pixel width of a Matplotlib Axes at its figure's resolution, the default
+    downsampling target
+    """
+    return max(1, int(round(ax.get_window_extent().width)))
+
+
+if __name__ == "__main__":
+    import time
+
+    # A daily random walk with two sharp hikes, the shape of a long price history
+    rng = np.random.default_rng(0)
+    n = 2_000_000
+    dates = pd.date_range('2000-01-01', periods=n, freq='min')
+    prices = 100 + np.cumsum(rng.normal(0, 0.05, n))
+    prices[n // 3] += 40
+    prices[2 * n // 3] -= 35
+    df = pd.DataFrame({'date': dates, 'price': prices})
+
+    for method in METHODS:
+        start = time.perf_counter()
+        points = downsample(df, 1000, method=method)
+        elapsed = time.perf_counter() - start
+        print(f"{method:<7} {n:,} -> {len(points):,} points in {elapsed * 1000:.1f} ms, "
+              f"max {points['price'].max():.2f} (raw {prices.max():.2f}), "
+              f"min {points['price'].min():.2f} (raw {prices.min():.2f})")
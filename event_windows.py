@@ -0,0 +1,176 @@
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from aggregate_outlets import OUTLETS, PRICE_COLUMNS, normalize_dates, outlet_path
+from data_loader import load_dataset
+from metrics_engine import FUEL_CHANGE_COLUMNS, MODELS, SECTIONS, sentiment_column
+
+# The asymmetric-response search of contextual_statistics.py: hikes of at least
+# 20 PKR followed one to two months later by a cut of more than 30 PKR
+DEFAULT_WINDOW = (pd.DateOffset(months=1), pd.DateOffset(months=2))
+
+
+def parse_dates(df, date_column='date'):
+    """
+    The date column as datetime64, parsed once whatever format the file used
+    """
+    dates = df[date_column]
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return pd.DatetimeIndex(dates)
+    return pd.DatetimeIndex(pd.to_datetime(normalize_dates(dates.astype(str))))
+
+
+def _ranges(starts, stops):
+    """
+    Concatenation of range(start, stop) for every pair, without a Python loop
+    """
+    lengths = stops - starts
+    total = int(lengths.sum())
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + np.arange(total) - offsets
+
+
+def event_pairs(df, fuel='petrol', hike_threshold=20, cut_threshold=30, window=DEFAULT_WINDOW,
+                columns=None, date_column='date', dates=None, include_unmatched=False):
+    """
+    Every (hike, subsequent cut) pair of one fuel as a table: hikes of at least
+    `hike_threshold` PKR, cuts of more than `cut_threshold` PKR, with the cut
+    dated between hike + window[0] and hike + window[1] inclusive. The window ends
+    can be DateOffsets or Timedeltas. Dates are parsed once and each hike's
+    window is found by binary search over the sorted cut dates.
+
+    Rows hold the original row labels, dates, changes, the lag in days and, for
+    each of `columns` (every sentiment column by default), its value at the
+    hike and at the cut. With `include_unmatched` hikes without a cut are kept
+    with empty cut fields.
+    """
+    change_column = FUEL_CHANGE_COLUMNS[fuel]
+    if columns is None:
+        columns = [sentiment_column(m, s) for m in MODELS for s in SECTIONS if sentiment_column(m, s) in df]
+    dates = parse_dates(df, date_column) if dates is None else pd.DatetimeIndex(dates)
+
+    order = np.argsort(dates.values, kind='stable')
+    sorted_dates = dates.values[order]
+    change = df[change_column].to_numpy(dtype=float)[order]
+    with np.errstate(invalid='ignore'):
+        hikes = np.flatnonzero(change >= hike_threshold)
+        cuts = np.flatnonzero(change < -cut_threshold)
+
+    hike_dates = pd.DatetimeIndex(sorted_dates[hikes])
+    cut_dates = sorted_dates[cuts]
+    low = np.searchsorted(cut_dates, (hike_dates + window[0]).values, side='left')
+    high = np.searchsorted(cut_dates, (hike_dates + window[1]).values, side='right')
+    high = np.maximum(high, low)
+
+    counts = high - low
+    hike_side = np.repeat(hikes, counts)
+    cut_side = cuts[_ranges(low, high)]
+    if include_unmatched:
+        # Hikes without a cut get one row pointing at no cut (-1); a stable sort
+        # puts them back among the matched rows in hike order
+        unmatched = hikes[counts == 0]
+        hike_side = np.concatenate([hike_side, unmatched])
+        cut_side = np.concatenate([cut_side, np.full(len(unmatched), -1)])
+        position = np.argsort(hike_side, kind='stable')
+        hike_side, cut_side = hike_side[position], cut_side[position]
+
+    matched = cut_side >= 0
+    cut_take = np.where(matched, cut_side, 0)
+    labels = df.index.to_numpy()[order]
+
+    result = {
+        'hike_row': labels[hike_side],
+        'cut_row': np.where(matched, labels.astype(object)[cut_take], None),
+        'hike_date': sorted_dates[hike_side],
+        'cut_date': np.where(matched, sorted_dates[cut_take], np.datetime64('NaT')),
+        'hike_change': change[hike_side],
+        'cut_change': np.where(matched, change[cut_take], np.nan),
+    }
+    result['lag_days'] = (result['cut_date'] - result['hike_date']) / np.timedelta64(1, 'D')
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)[order]
+        result['hike_' + column] = values[hike_side]
+        result['cut_' + column] = np.where(matched, values[cut_take], np.nan)
+    return pd.DataFrame(result)
+
+
+def window_label(window):
+    """
+    Readable form of a (start, end) window, e.g. '1 months..2 months'
+    """
+    def describe(offset):
+        if isinstance(offset, pd.DateOffset) and offset.kwds:
+            return ' '.join(f'{value} {unit}' for unit, value in offset.kwds.items())
+        return str(offset)
+    return f'{describe(window[0])}..{describe(window[1])}'
+
+
+def event_sweep(df, hike_thresholds, cut_thresholds, windows, fuel='petrol', date_column='date'):
+    """
+    Pair counts for every window x hike threshold x cut threshold combination.
+    Dates are parsed once; each window is searched once with the loosest
+    thresholds, and every threshold combination is then a mask over those pairs.
+    """
+    dates = parse_dates(df, date_column)
+    change = df[FUEL_CHANGE_COLUMNS[fuel]]
+    hikes = {h: int((change >= h).sum()) for h in hike_thresholds}
+
+    rows = []
+    for window in windows:
+        pairs = event_pairs(df, fuel, min(hike_thresholds), min(cut_thresholds), window, columns=[], dates=dates)
+        hike_change = pairs['hike_change'].to_numpy()
+        cut_change = pairs['cut_change'].to_numpy()
+        for hike_threshold, cut_threshold in itertools.product(hike_thresholds, cut_thresholds):
+            mask = (hike_change >= hike_threshold) & (cut_change < -cut_threshold)
+            rows.append({
+                'window': window_label(window),
+                'hike_threshold': hike_threshold,
+                'cut_threshold': cut_threshold,
+                'hikes': hikes[hike_threshold],
+                'pairs': int(mask.sum()),
+                'hikes_followed': int(pairs['hike_row'][mask].nunique()),
+            })
+    return pd.DataFrame(rows)
+
+
+def outlet_changes(outlet, data_dir='data'):
+    """
+    One outlet's per-date mean prices and sentiment with the fortnightly change
+    columns the average files carry, so outlets can be searched like the averages
+    """
+    df = load_dataset(outlet_path(outlet, data_dir))
+    columns = PRICE_COLUMNS + [sentiment_column(m, s) for m in MODELS for s in SECTIONS]
+    values = df[columns].apply(pd.to_numeric, errors='coerce')
+    values['date'] = parse_dates(df)
+    daily = values.groupby('date').mean().sort_index()
+    daily['petrol_change'] = daily['petrol'].diff()
+    daily['diesel_change'] = daily['hsd'].diff()
+    return daily.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the hike/cut search over thresholds and windows")
+    parser.add_argument('--fuel', choices=list(FUEL_CHANGE_COLUMNS), default='petrol')
+    parser.add_argument('--hikes', type=float, nargs='+', default=[10, 15, 20, 25])
+    parser.add_argument('--cuts', type=float, nargs='+', default=[10, 20, 30])
+    parser.add_argument('--months', type=int, nargs='+', default=[1, 2, 3],
+                        help="window ends in months; each window starts one month after the hike")
+    args = parser.parse_args()
+
+    try:
+        windows = [(pd.DateOffset(months=1), pd.DateOffset(months=m)) for m in args.months]
+        datasets = {language: load_dataset(f'data/{language}_average_data.csv') for language in OUTLETS}
+        for outlets in OUTLETS.values():
+            datasets.update({outlet: outlet_changes(outlet) for outlet in outlets})
+        for name, df in datasets.items():
+            sweep = event_sweep(df, args.hikes, args.cuts, windows, args.fuel)
+            print(f"\n{name}:")
+            print(sweep.pivot_table(index=['window', 'hike_threshold'], columns='cut_threshold', aggfunc='first',
+                                    values='pairs').to_string())
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -1,13 +1,12 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+from chart_renderer import draw_series
+from price_store import workbook_series
 
-# Load the data from the Excel file
+# Load the data from the Excel file, through the price store so it is decoded once
 input_file = 'PKR _ US$ Exchange Rates.xlsx'
-data = pd.read_excel(input_file)
-
-# Convert the 'date' column to datetime
-data['date'] = pd.to_datetime(data['date'])
+data = workbook_series(input_file)
 
 # Filter the data for January and July
 biannual_data = data[data['date'].dt.month.isin([1, 7])]
@@ -16,15 +15,9 @@ biannual_data = data[data['date'].dt.year.isin([2021, 2022, 2023, 2024])]
 biannual_data = biannual_data.sort_values(by='date')
 biannual_data['price'] = biannual_data['price'].interpolate(method='linear')
 
-# Plot the data
+# Plot the data with the drawing code the batch renderer uses
 plt.figure(figsize=(10, 6))
-plt.plot(biannual_data['date'], biannual_data['price'], linestyle='-', color='b')
-
-# Customize the plot
-plt.title('PKR/USD Rate')
-plt.xlabel('Date')
-plt.ylabel('Price')
-plt.grid(True)
+draw_series(plt.gca(), biannual_data, 'PKR/USD Rate')
 #plt.xticks(rotation=45)
 plt.tight_layout()
 
@@ -1,12 +1,18 @@
 import pandas as pd
 import numpy as np
+from data_loader import load_dataset
+from metrics_engine import ANY_FUEL, compute_metrics, fuel_sensitivity
 
 def analyze_gemini_sentiment_urdu():
     """
     Comprehensive analysis of Urdu Gemini sentiment data for fuel price changes
     """
     # Read the Urdu CSV file
-    df = pd.read_csv('data/urdu_average_data.csv')
+    df = load_dataset('data/urdu_average_data.csv')
+    
+    # Every group mean and correlation in one pass per model
+    metrics = compute_metrics(df, 'gemini')
+    openai_metrics = compute_metrics(df, 'openai')
     
     print("=" * 80)
     print("URDU ARTICLES - GEMINI SENTIMENT ANALYSIS")
@@ -18,8 +24,8 @@ def analyze_gemini_sentiment_urdu():
     # 1. BASIC AVERAGES
     print("1. OVERALL AVERAGE GEMINI SENTIMENT SCORES")
     print("-" * 50)
-    headline_avg = df['gemini_headline_overall_sentiment'].mean()
-    text_avg = df['gemini_text_overall_sentiment'].mean()
+    headline_avg = metrics.loc[(ANY_FUEL, 'all'), 'headline_mean']
+    text_avg = metrics.loc[(ANY_FUEL, 'all'), 'text_mean']
     print(f"Average gemini_headline_overall_sentiment: {headline_avg:.6f}")
     print(f"Average gemini_text_overall_sentiment: {text_avg:.6f}")
     print(f"Overall difference (text - headline): {text_avg - headline_avg:.6f}")
@@ -30,13 +36,13 @@ def analyze_gemini_sentiment_urdu():
     print("-" * 50)
     
     # Price drops analysis
-    price_drops = df[(df['petrol_change'] < 0) | (df['diesel_change'] < 0)].copy()
-    price_hikes = df[(df['petrol_change'] > 0) | (df['diesel_change'] > 0)].copy()
+    price_drops = metrics.loc[(ANY_FUEL, 'drop')]
+    price_hikes = metrics.loc[(ANY_FUEL, 'hike')]
     
-    print(f"Price Drops Analysis ({len(price_drops)} instances):")
-    if len(price_drops) > 0:
-        headline_drops_avg = price_drops['gemini_headline_overall_sentiment'].mean()
-        text_drops_avg = price_drops['gemini_text_overall_sentiment'].mean()
+    print(f"Price Drops Analysis ({price_drops['count']} instances):")
+    if price_drops['count'] > 0:
+        headline_drops_avg = price_drops['headline_mean']
+        text_drops_avg = price_drops['text_mean']
         drops_diff = headline_drops_avg - text_drops_avg
         print(f"  Headlines average sentiment: {headline_drops_avg:.3f}")
         print(f"  Body text average sentiment: {text_drops_avg:.3f}")
@@ -47,10 +53,10 @@ def analyze_gemini_sentiment_urdu():
         else:
             print("  → Body text is MORE POSITIVE than headlines during price drops")
     
-    print(f"\nPrice Hikes Analysis ({len(price_hikes)} instances):")
-    if len(price_hikes) > 0:
-        headline_hikes_avg = price_hikes['gemini_headline_overall_sentiment'].mean()
-        text_hikes_avg = price_hikes['gemini_text_overall_sentiment'].mean()
+    print(f"\nPrice Hikes Analysis ({price_hikes['count']} instances):")
+    if price_hikes['count'] > 0:
+        headline_hikes_avg = price_hikes['headline_mean']
+        text_hikes_avg = price_hikes['text_mean']
         hikes_diff = headline_hikes_avg - text_hikes_avg
         print(f"  Headlines average sentiment: {headline_hikes_avg:.3f}")
         print(f"  Body text average sentiment: {text_hikes_avg:.3f}")
@@ -67,10 +73,10 @@ def analyze_gemini_sentiment_urdu():
     print("-" * 50)
     
     # Calculate correlations
-    petrol_headline_corr = df['petrol_change'].corr(df['gemini_headline_overall_sentiment'])
-    petrol_text_corr = df['petrol_change'].corr(df['gemini_text_overall_sentiment'])
-    diesel_headline_corr = df['diesel_change'].corr(df['gemini_headline_overall_sentiment'])
-    diesel_text_corr = df['diesel_change'].corr(df['gemini_text_overall_sentiment'])
+    petrol_headline_corr = metrics.loc[('petrol', 'all'), 'headline_corr']
+    petrol_text_corr = metrics.loc[('petrol', 'all'), 'text_corr']
+    diesel_headline_corr = metrics.loc[('diesel', 'all'), 'headline_corr']
+    diesel_text_corr = metrics.loc[('diesel', 'all'), 'text_corr']
     
     print(f"Petrol vs Headlines correlation: {petrol_headline_corr:.4f}")
     print(f"Petrol vs Body Text correlation: {petrol_text_corr:.4f}")
@@ -78,8 +84,8 @@ def analyze_gemini_sentiment_urdu():
     print(f"Diesel vs Body Text correlation: {diesel_text_corr:.4f}")
     
     # Overall sensitivity comparison
-    avg_petrol_sensitivity = (abs(petrol_headline_corr) + abs(petrol_text_corr)) / 2
-    avg_diesel_sensitivity = (abs(diesel_headline_corr) + abs(diesel_text_corr)) / 2
+    avg_petrol_sensitivity = fuel_sensitivity(metrics, 'petrol')
+    avg_diesel_sensitivity = fuel_sensitivity(metrics, 'diesel')
     
     print(f"\nAverage petrol sensitivity: {avg_petrol_sensitivity:.4f}")
     print(f"Average diesel sensitivity: {avg_diesel_sensitivity:.4f}")
@@ -98,13 +104,8 @@ def analyze_gemini_sentiment_urdu():
     print("-" * 50)
     
     # OpenAI correlations for comparison
-    openai_petrol_headline = abs(df['petrol_change'].corr(df['openai_headline_overall_sentiment']))
-    openai_petrol_text = abs(df['petrol_change'].corr(df['openai_text_overall_sentiment']))
-    openai_diesel_headline = abs(df['diesel_change'].corr(df['openai_headline_overall_sentiment']))
-    openai_diesel_text = abs(df['diesel_change'].corr(df['openai_text_overall_sentiment']))
-    
-    openai_avg_petrol = (openai_petrol_headline + openai_petrol_text) / 2
-    openai_avg_diesel = (openai_diesel_headline + openai_diesel_text) / 2
+    openai_avg_petrol = fuel_sensitivity(openai_metrics, 'petrol')
+    openai_avg_diesel = fuel_sensitivity(openai_metrics, 'diesel')
     
     print("OpenAI vs Gemini Sensitivity Comparison (Urdu):")
     print(f"  OpenAI petrol sensitivity: {openai_avg_petrol:.4f}")
@@ -123,19 +124,19 @@ def analyze_gemini_sentiment_urdu():
         print(f"  → OpenAI is MORE sensitive to diesel changes than Gemini")
     
     # Price drops/hikes comparison
-    openai_price_drops = df[(df['petrol_change'] < 0) | (df['diesel_change'] < 0)].copy()
-    openai_price_hikes = df[(df['petrol_change'] > 0) | (df['diesel_change'] > 0)].copy()
+    openai_price_drops = openai_metrics.loc[(ANY_FUEL, 'drop')]
+    openai_price_hikes = openai_metrics.loc[(ANY_FUEL, 'hike')]
     
-    if len(openai_price_drops) > 0:
-        openai_headline_drops = openai_price_drops['openai_headline_overall_sentiment'].mean()
-        openai_text_drops = openai_price_drops['openai_text_overall_sentiment'].mean()
+    if openai_price_drops['count'] > 0:
+        openai_headline_drops = openai_price_drops['headline_mean']
+        openai_text_drops = openai_price_drops['text_mean']
         print(f"\nPrice drops comparison:")
         print(f"  OpenAI: Headlines {openai_headline_drops:.2f}, Text {openai_text_drops:.2f}")
         print(f"  Gemini: Headlines {headline_drops_avg:.2f}, Text {text_drops_avg:.2f}")
     
-    if len(openai_price_hikes) > 0:
-        openai_headline_hikes = openai_price_hikes['openai_headline_overall_sentiment'].mean()
-        openai_text_hikes = openai_price_hikes['openai_text_overall_sentiment'].mean()
+    if openai_price_hikes['count'] > 0:
+        openai_headline_hikes = openai_price_hikes['headline_mean']
+        openai_text_hikes = openai_price_hikes['text_mean']
         print(f"\nPrice hikes comparison:")
         print(f"  OpenAI: Headlines {openai_headline_hikes:.2f}, Text {openai_text_hikes:.2f}")
         print(f"  Gemini: Headlines {headline_hikes_avg:.2f}, Text {text_hikes_avg:.2f}")
@@ -0,0 +1,190 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from aggregate_outlets import OUTLETS, _partial_sums, average_path, build_averages, normalize_dates, outlet_path
+from outlet_stats import compute_statistics, file_stats, load_cached_stats, save_stats, statistics_tables
+from report import OUTPUT_DIR, ReportData, build_report, write_report
+from streaming import attach_changes, price_changes
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def _persisted_stats(path, large_threshold=10, resolution=0.01):
+    stats = load_cached_stats(path, large_threshold, resolution)
+    if stats is None:
+        # First run, or the file changed outside of this tool
+        stats = file_stats(path, large_threshold, resolution)
+    return stats
+
+
+def check_new_rows(outlet, rows, stats):
+    """
+    Raise ValueError unless every new row is dated after the newest date already
+    counted in `stats`. A row on a date that is already there would change that
+    date's mean price, and so the price change of rows already counted, and
+    its language average row, which is only ever appended to; such rows need a
+    full rebuild (outlet_stats --no-cache, aggregate_outlets --rebuild).
+    """
+    dates = normalize_dates(rows['date'].astype(str))
+    if dates.isna().any():
+        raise ValueError(f"{outlet}: {dates.isna().sum()} new rows have an unreadable date")
+    latest = stats.prices.index.max()
+    if (dates <= latest).any():
+        raise ValueError(f"{outlet}: new rows are dated on or before {latest}, the newest date already in the "
+                         f"file; add them with a full rebuild")
+
+
+def check_language_dates(language, new, data_dir='data'):
+    """
+    Raise ValueError if a new row of the language is dated on or before the
+    last date of its average file. That date's average row is already written
+    and build_averages only appends, so the row would never reach it, even when
+    the outlet it belongs to has no article on that date yet.
+    """
+    path = average_path(language, data_dir)
+    if not os.path.exists(path):
+        return
+    dates = pd.read_csv(path, usecols=['date'])['date']
+    if dates.empty:
+        return
+    last = dates.max()
+    for outlet in OUTLETS[language]:
+        if outlet in new and (normalize_dates(new[outlet]['date'].astype(str)) <= last).any():
+            raise ValueError(f"{outlet}: new rows are dated on or before {last}, the last date of the {language} "
+                             f"average; add them with a full rebuild")
+
+
+def append_outlet_rows(outlet, rows, data_dir='data', large_threshold=10, resolution=0.01, stats=None):
+    """
+    Append new articles to an outlet file and fold them into its persisted
+    statistics. Only the new rows are parsed: the change of a new date comes
+    from the per-date prices kept with the statistics, and the file itself is
+    only appended to. The shipped files list the newest date first, so the
+    appended rows break that order: newer articles end up at the bottom. The
+    readers group or sort outlet rows by date and do not rely on row order.
+    Returns the updated OutletStats.
+    """
+    path = outlet_path(outlet, data_dir)
+    stats = stats or _persisted_stats(path, large_threshold, resolution)
+    rows = rows.drop(columns=[c for c in rows.columns if c.startswith('Unnamed')])
+    check_new_rows(outlet, rows, stats)
+
+    prices = stats.prices.add(_partial_sums(rows)[stats.prices.columns], fill_value=0)
+    stats.update(attach_changes(rows, price_changes(prices)))
+    stats.prices = prices
+
+    header = pd.read_csv(path, nrows=0).columns
+    appended = rows.reindex(columns=header[1:])
+    # The files are indexed 0..n-1, so new rows continue from the old row count
+    appended.index = range(stats.rows - len(rows), stats.rows)
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        if not _ends_with_newline(path):
+            f.write('\n')
+        appended.to_csv(f, header=False)
+
+    save_stats(path, stats, resolution, hash_content=False)
+    return stats
+
+
+def read_new_rows(new_dir):
+    """
+    New articles per outlet from <new_dir>/<outlet>_data.csv, in the outlet file schema
+    """
+    new = {}
+    for outlets in OUTLETS.values():
+        for outlet in outlets:
+            path = outlet_path(outlet, new_dir)
+            if os.path.exists(path):
+                rows = pd.read_csv(path)
+                if len(rows):
+                    new[outlet] = rows
+    return new
+
+
+def incremental_update(new, data_dir='data', report_dir=OUTPUT_DIR, large_threshold=10, report=True):
+    """
+    Apply new articles (outlet -> frame) to the outlet files, their statistics,
+    the language averages and the report. Each step only reads the new rows,
+    the per-date tables and the persisted statistics. Returns a summary dict.
+    """
+    timings = {}
+    start = time.perf_counter()
+    # Check every outlet before touching any file, so a bad batch changes nothing
+    stats = {}
+    for outlet, rows in new.items():
+        stats[outlet] = _persisted_stats(outlet_path(outlet, data_dir), large_threshold)
+        check_new_rows(outlet, rows, stats[outlet])
+    for language in OUTLETS:
+        check_language_dates(language, new, data_dir)
+    for outlet, rows in new.items():
+        append_outlet_rows(outlet, rows, data_dir, large_threshold, stats=stats[outlet])
+    timings['outlets'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dates_added = {}
+    for language, outlets in OUTLETS.items():
+        frames = [new[outlet] for outlet in outlets if outlet in new]
+        if frames:
+            dates_added[language] = build_averages(language, data_dir, frames=frames)
+    timings['averages'] = time.perf_counter() - start
+
+    paths = []
+    if report:
+        start = time.perf_counter()
+        data = ReportData(data_dir, large_threshold=large_threshold)
+        paths = write_report(build_report(data_dir, data=data), report_dir)
+        # Every outlet's statistics are cached by now, so this only merges them
+        scopes, _ = compute_statistics(data_dir, large_threshold=large_threshold)
+        summary, correlations = statistics_tables(scopes)
+        for name, table in [('outlet_summary.csv', summary), ('outlet_correlations.csv', correlations)]:
+            path = os.path.join(report_dir, name)
+            table.to_csv(path + '.tmp')
+            os.replace(path + '.tmp', path)
+            paths.append(path)
+        timings['report'] = time.perf_counter() - start
+
+    return {
+        'rows': {outlet: len(rows) for outlet, rows in new.items()},
+        'dates': dates_added,
+        'paths': paths,
+        'timings': timings,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append new articles and refresh the statistics and report")
+    parser.add_argument('new_dir', help="directory of <outlet>_data.csv files holding only the new articles")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--report-dir', default=OUTPUT_DIR)
+    parser.add_argument('--large-threshold', type=float, default=10)
+    parser.add_argument('--no-report', action='store_true')
+    args = parser.parse_args()
+
+    try:
+        new = read_new_rows(args.new_dir)
+        if not new:
+            print(f"No new articles in {args.new_dir}")
+        else:
+            result = incremental_update(new, args.data_dir, args.report_dir, args.large_threshold,
+                                        report=not args.no_report)
+            for outlet, count in result['rows'].items():
+                print(f"{outlet}: {count} new articles")
+            for language, count in result['dates'].items():
+                print(f"{language}: {count} new dates averaged")
+            print("Timings: " + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in result['timings'].items()))
+            if result['paths']:
+                print("Published: " + ", ".join(result['paths']))
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from sentiment_scoring import PROBABILITY_LABELS, overall_column, probability_columns, score_overall
+
+try:
+    import aiohttp
+except ImportError:  # only the HTTP backend needs it
+    aiohttp = None
+
+# Bump when the prompt changes so that old answers are not served from the cache
+PROMPT_VERSION = 1
+
+# Article column that holds each section's text
+SECTION_COLUMNS = {'headline': 'headline', 'text': 'inner_html'}
+
+DEFAULT_CACHE = os.path.join('data', '.cache', 'llm_scores.sqlite')
+
+
+def build_prompt(section, texts):
+    """
+    One prompt that asks for the probabilities of several numbered items at once
+    """
+    kind = 'newspaper headline' if section == 'headline' else 'newspaper article'
+    lines = [
+        f"For each numbered {kind} below, estimate the probability that its sentiment "
+        f"towards the fuel price news is {', '.join(PROBABILITY_LABELS)}.",
+        "Answer with a JSON list that has one object per item, in order, each with exactly "
+        "those five keys and probabilities that sum to 1.",
+        "",
+    ]
+    for i, text in enumerate(texts, 1):
+        lines.append(f"{i}. {' '.join(str(text).split())}")
+    return "\n".join(lines)
+
+
+def parse_response(content, expected):
+    """
+    Turn the JSON list in a model answer into an expected x 5 probability array
+    """
+    match = re.search(r'\[.*\]', content, re.S)
+    if not match:
+        raise ValueError("No JSON list in the model response")
+    items = json.loads(match.group(0))
+    if len(items) != expected:
+        raise ValueError(f"Expected {expected} scored items, got {len(items)}")
+    return np.array([[float(item[label]) for label in PROBABILITY_LABELS] for item in items])
+
+
+class ScoreCache:
+    """
+    Content-hash keyed store of probability quintuples, kept in SQLite on disk
+    """
+
+    def __init__(self, path=DEFAULT_CACHE):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, probabilities TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def key(model, section, text):
+        payload = f"{PROMPT_VERSION}\0{model}\0{section}\0{text}".encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        # SQLite limits the number of bound parameters per statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT key, probabilities FROM scores WHERE key IN ({placeholders})", chunk
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, items):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO scores VALUES (?, ?)",
+            [(key, json.dumps(list(map(float, probabilities)))) for key, probabilities in items],
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class RateLimiter:
+    """
+    Spaces request starts so that at most `per_minute` begin in any minute
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def stub_probabilities(text):
+    """
+    Deterministic stand-in for a model: leans negative on hike words and positive on
+    cut words (English and Urdu), with a small text-dependent jitter
+    """
+    # Whitespace is collapsed as in build_prompt so the HTTP stub answers the same
+    text = ' '.join(str(text).lower().split())
+    negative = sum(text.count(w) for w in ('hike', 'increase', 'raise', 'surge', 'مہنگا', 'اضافہ'))
+    positive = sum(text.count(w) for w in ('cut', 'slash', 'decrease', 'relief', 'سستا', 'کمی'))
+    seed = int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16)
+    jitter = (seed % 1000) / 1000.0
+
+    lean = np.tanh(positive - negative)
+    weights = np.array([
+        max(lean, 0) + 0.1,
+        max(lean, 0) / 2 + 0.2 + jitter / 10,
+        1 - abs(lean) + 0.2,
+        max(-lean, 0) / 2 + 0.2 + (1 - jitter) / 10,
+        max(-lean, 0) + 0.1,
+    ])
+    return np.round(weights / weights.sum(), 4)
+
+
+class StubBackend:
+    """
+    In-process backend that scores with stub_probabilities, for offline runs and tests
+    """
+
+    def __init__(self, name='stub', latency=0.0):
+        self.name = name
+        self.latency = latency
+        self.requests = 0
+
+    async def score_batch(self, section, texts):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return np.array([stub_probabilities(text) for text in texts])
+
+
+class HTTPBackend:
+    """
+    Backend for an OpenAI-compatible chat completions endpoint, one request per batch
+    """
+
+    def __init__(self, url, model, api_key=None, timeout=120):
+        if aiohttp is None:
+            raise ImportError("HTTPBackend needs aiohttp: pip install aiohttp")
+        self.url = url
+        self.name = model
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = None
+        self.requests = 0
+
+    async def score_batch(self, section, texts):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+        payload = {
+            'model': self.model,
+            'temperature': 0,
+            'messages': [{'role': 'user', 'content': build_prompt(section, texts)}],
+        }
+        self.requests += 1
+        async with self.session.post(self.url, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            body = await response.json()
+        return parse_response(body['choices'][0]['message']['content'], len(texts))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class SentimentScorer:
+    """
+    Scores texts in batches, running several batches concurrently under a rate limit
+    and never sending a text whose answer is already cached
+    """
+
+    def __init__(self, backend, cache, batch_size=20, max_concurrency=4,
+                 requests_per_minute=None, retries=3):
+        if retries < 1:
+            raise ValueError(f"retries counts attempts and must be at least 1, got {retries}")
+        self.backend = backend
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.retries = retries
+
+    async def _score_batch(self, section, keys, texts, semaphore, limiter):
+        for attempt in range(self.retries):
+            await limiter.wait()
+            async with semaphore:
+                try:
+                    scored = await self.backend.score_batch(section, texts)
+                except Exception:
+                    if attempt == self.retries - 1:
+                        raise
+                else:
+                    # Cache each batch as soon as it is paid for, so a later failing
+                    # batch does not lose it
+                    fresh = list(zip(keys, scored))
+                    self.cache.put_many(fresh)
+                    return fresh
+            await asyncio.sleep(2 ** attempt)
+
+    async def score_async(self, section, texts):
+        """
+        n x 5 probabilities for the texts of one section, NaN where the text is missing
+        """
+        texts = list(texts)
+        keys = [None if pd.isna(t) else ScoreCache.key(self.backend.name, section, t) for t in texts]
+        cached = self.cache.get_many({k for k in keys if k is not None})
+
+        # Each distinct uncached text is sent once, however often it repeats
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key is not None and key not in cached and key not in pending:
+                pending[key] = text
+
+        pending_keys = list(pending)
+        batches = [pending_keys[i:i + self.batch_size]
+                   for i in range(0, len(pending_keys), self.batch_size)]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limiter = RateLimiter(self.requests_per_minute)
+
+        results = await asyncio.gather(*[
+            self._score_batch(section, batch, [pending[k] for k in batch], semaphore, limiter)
+            for batch in batches
+        ])
+        for fresh in results:
+            cached.update(fresh)
+
+        nan = [np.nan] * len(PROBABILITY_LABELS)
+        return np.array([cached[k] if k is not None else nan for k in keys], dtype=float)
+
+    async def _closing(self, coroutine):
+        # asyncio.run closes its loop on return, so the backend's session has to
+        # be closed inside it
+        try:
+            return await coroutine
+        finally:
+            if hasattr(self.backend, 'close'):
+                await self.backend.close()
+
+    def score(self, section, texts):
+        return asyncio.run(self._closing(self.score_async(section, texts)))
+
+    async def score_frame_async(self, df, model, sections=('headline', 'text')):
+        result = df.copy()
+        for section in sections:
+            probabilities = await self.score_async(section, df[SECTION_COLUMNS[section]])
+            result[probability_columns(model, section)] = probabilities
+        if set(sections) == {'headline', 'text'}:
+            scores = score_overall(result, models=[model], strict=False)
+            result[scores.columns] = scores
+        return result
+
+    def score_frame(self, df, model, sections=('headline', 'text')):
+        """
+        Copy of an article frame with the model's probability and overall columns filled in
+        """
+        return asyncio.run(self._closing(self.score_frame_async(df, model, sections)))
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """
+    Chat completions endpoint that answers batched scoring prompts with stub_probabilities
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        prompt = payload['messages'][-1]['content']
+        texts = re.findall(r'^\d+\. (.*)$', prompt, re.M)
+        items = [dict(zip(PROBABILITY_LABELS, map(float, stub_probabilities(t)))) for t in texts]
+        body = json.dumps({'choices': [{'message': {'role': 'assistant', 'content': json.dumps(items)}}]})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body.encode())))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_stub(port=8765, background=False):
+    """
+    Run the local stand-in server on 127.0.0.1; with background=True it runs in a
+    daemon thread and the server object is returned so it can be shut down
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), _StubHandler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"Stub scoring server on http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score article headlines and text with an LLM")
+    parser.add_argument('input', nargs='?', help="CSV with headline and inner_html columns")
+    parser.add_argument('--output', help="where to write the scored CSV")
+    parser.add_argument('--model', default='stub', help="column prefix and model name")
+    parser.add_argument('--url', help="chat completions endpoint; the in-process stub is used when omitted")
+    parser.add_argument('--api-key', default=os.environ.get('LLM_API_KEY'))
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rpm', type=int, default=None, help="requests per minute")
+    parser.add_argument('--cache', default=DEFAULT_CACHE)
+    parser.add_argument('--serve-stub', type=int, metavar='PORT', help="run the local stand-in server")
+    args = parser.parse_args()
+
+    if args.serve_stub is not None:
+        serve_stub(args.serve_stub)
+    elif args.input:
+        backend = HTTPBackend(args.url, args.model, args.api_key) if args.url else StubBackend(args.model)
+        scorer = SentimentScorer(backend, ScoreCache(args.cache), batch_size=args.batch_size,
+                                 max_concurrency=args.concurrency, requests_per_minute=args.rpm)
+        df = pd.read_csv(args.input)
+        start = time.perf_counter()
+        scored = scorer.score_frame(df, args.model)
+        elapsed = time.perf_counter() - start
+
+        output = args.output or os.path.splitext(args.input)[0] + f'_{args.model}_scored.csv'
+        scored.to_csv(output, index=False)
+        print(f"Scored {len(df)} articles with {backend.requests} requests in {elapsed:.2f}s -> {output}")
+        print(scored[[overall_column(args.model, s) for s in ('headline', 'text')]].describe())
+    else:
+        parser.print_help()
@@ -0,0 +1,142 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+
+from data_loader import _file_hash
+
+CACHE_DIR = os.path.join('data', '.cache', 'memo')
+
+
+class Graph:
+    """
+    Memoized intermediates wired into a dependency graph.
+
+    Every node is a function registered with `node`. Its arguments are the
+    values of the nodes it depends on (by name), the parameters it reads from
+    the graph (by name) and its own arguments such as the language. A node's
+    key hashes its name and version, its own arguments, the parameters it
+    reads, the content of the files it reads and the keys of its dependencies,
+    so changing a parameter or a file only changes the keys, and therefore
+    only recomputes the nodes, downstream of it. Results are kept in memory
+    and pickled to `cache_dir`.
+    """
+
+    def __init__(self, params=None, cache_dir=CACHE_DIR):
+        self.params = dict(params or {})
+        self.cache_dir = cache_dir
+        self.nodes = {}
+        self.stats = {'memory': 0, 'disk': 0, 'computed': 0}
+        self._values = {}
+        self._hashes = {}
+
+    def node(self, deps=(), params=(), files=None, persist=True, version=1):
+        """
+        Register a node. `files` maps the node's own arguments to the paths it
+        reads; `persist=False` keeps the result in memory only, for values that
+        are cheaper to rebuild than to unpickle.
+        """
+        def register(function):
+            names = list(inspect.signature(function).parameters)
+            self.nodes[function.__name__] = {
+                'function': function,
+                'deps': list(deps),
+                'params': list(params),
+                'args': [n for n in names if n not in deps and n not in params],
+                'files': files,
+                'persist': persist,
+                'version': version,
+            }
+            return function
+        return register
+
+    def set_params(self, **params):
+        self.params.update(params)
+
+    def _arguments(self, name):
+        """
+        Every argument a node needs, its own and its dependencies'
+        """
+        spec = self.nodes[name]
+        names = list(spec['args'])
+        for dep in spec['deps']:
+            names += [n for n in self._arguments(dep) if n not in names]
+        return names
+
+    def _file_digest(self, path):
+        # Hash a file again only when its size or modification time changed
+        stat = os.stat(path)
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+        if stamp not in self._hashes:
+            self._hashes[stamp] = _file_hash(path)
+        return self._hashes[stamp]
+
+    def key(self, name, **args):
+        """
+        Hash identifying a node's value for these arguments under the current
+        parameters and input files, computed without evaluating anything
+        """
+        spec = self.nodes[name]
+        own = {n: args[n] for n in spec['args']}
+        files = spec['files'](**own) if spec['files'] else []
+        parts = {
+            'node': name,
+            'version': spec['version'],
+            'args': own,
+            'params': {p: self.params[p] for p in spec['params']},
+            'files': [self._file_digest(path) for path in files],
+            'deps': [self.key(dep, **args) for dep in spec['deps']],
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _disk_path(self, name, key):
+        return os.path.join(self.cache_dir, name, key + '.pkl')
+
+    def get(self, name, **args):
+        """
+        Value of a node, from memory, then disk, then by computing it and its
+        missing dependencies
+        """
+        spec = self.nodes[name]
+        missing = [n for n in self._arguments(name) if n not in args]
+        if missing:
+            raise TypeError(f"{name} needs arguments {missing}")
+
+        key = self.key(name, **args)
+        if key in self._values:
+            self.stats['memory'] += 1
+            return self._values[key]
+
+        path = self._disk_path(name, key)
+        if spec['persist'] and os.path.exists(path):
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            self.stats['disk'] += 1
+        else:
+            inputs = {dep: self.get(dep, **args) for dep in spec['deps']}
+            inputs.update({p: self.params[p] for p in spec['params']})
+            inputs.update({n: args[n] for n in spec['args']})
+            value = spec['function'](**inputs)
+            self.stats['computed'] += 1
+            if spec['persist']:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f'{path}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+
+        self._values[key] = value
+        return value
+
+    def clear(self, memory=True, disk=False):
+        """
+        Forget cached values; the disk cache is only removed when asked
+        """
+        if memory:
+            self._values.clear()
+        if disk and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                directory = os.path.join(self.cache_dir, name)
+                for entry in os.listdir(directory):
+                    os.remove(os.path.join(directory, entry))
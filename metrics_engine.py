@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+FUEL_CHANGE_COLUMNS = {'petrol': 'petrol_change', 'diesel': 'diesel_change'}
+SECTIONS = ('headline', 'text')
+MODELS = ('openai', 'gemini')
+
+# Rows of the result frame that do not belong to a single fuel
+ANY_FUEL = 'any'
+
+
+def sentiment_column(model, section):
+    """
+    Name of the overall sentiment column for a model and article section
+    """
+    return f'{model}_{section}_overall_sentiment'
+
+
+def _group_masks(changes, fuels, large_threshold):
+    """
+    Build every group mask once. Returns the (fuel, group) labels, the index of
+    the change column each group is measured against (-1 for none) and an
+    n x groups matrix of 0/1 weights.
+    """
+    n = changes.shape[0]
+    # NaN compares False, which matches what the boolean filters in the scripts do
+    with np.errstate(invalid='ignore'):
+        increases = changes > 0
+        decreases = changes < 0
+        large_increases = changes >= large_threshold
+        large_decreases = changes <= -large_threshold
+
+    labels = [(ANY_FUEL, 'all'), (ANY_FUEL, 'hike'), (ANY_FUEL, 'drop')]
+    change_index = [-1, -1, -1]
+    masks = [np.ones(n, dtype=bool), increases.any(axis=1), decreases.any(axis=1)]
+
+    for i, fuel in enumerate(fuels):
+        for group, mask in [('all', np.ones(n, dtype=bool)),
+                            ('increase', increases[:, i]),
+                            ('decrease', decreases[:, i]),
+                            ('large_increase', large_increases[:, i]),
+                            ('large_decrease', large_decreases[:, i])]:
+            labels.append((fuel, group))
+            change_index.append(i)
+            masks.append(mask)
+
+    return labels, np.array(change_index), np.column_stack(masks).astype(float)
+
+
+def compute_metrics(df, model, fuels=('petrol', 'diesel'), large_threshold=10):
+    """
+    Group means, per-unit sensitivities, exception counts and correlations for one
+    model, computed from group masks that are built once and shared by every metric.
+    Returns one row per (fuel, group); the 'any' fuel holds the all/hike/drop
+    groups where either fuel moved.
+    """
+    headline_col = sentiment_column(model, 'headline')
+    text_col = sentiment_column(model, 'text')
+
+    changes = df[[FUEL_CHANGE_COLUMNS[fuel] for fuel in fuels]].to_numpy(dtype=float)
+    sentiment = df[[headline_col, text_col]].to_numpy(dtype=float)
+    labels, change_index, masks = _group_masks(changes, fuels, large_threshold)
+
+    # Exceptions, NaN compares False just like the original filters
+    with np.errstate(invalid='ignore'):
+        headline_le_text = (sentiment[:, 0] <= sentiment[:, 1]).astype(float)
+        text_le_headline = (sentiment[:, 1] <= sentiment[:, 0]).astype(float)
+
+    # Non-null counts and exception counts of every group in one product
+    values = np.column_stack([sentiment, changes])
+    valid = ~np.isnan(values)
+    counts = masks.T @ valid.astype(float)
+    exceptions = masks.T @ np.column_stack([headline_le_text, text_le_headline])
+
+    # Group sums use the same pairwise summation as pandas over the selected
+    # rows, so printed means round exactly as the per-script filters did
+    columns = np.ascontiguousarray(np.where(valid, values, 0.0).T)
+    column_valid = np.ascontiguousarray(valid.T)
+    means = np.empty_like(counts)
+    variances = np.empty_like(counts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for g, mask in enumerate(masks.T.astype(bool)):
+            selected = columns[:, mask]
+            means[g] = [column.sum() for column in selected] / counts[g]
+            deviations = np.where(column_valid[:, mask], selected - means[g][:, None], 0.0)
+            variances[g] = [(column * column).sum() for column in deviations] / (counts[g] - 1)
+
+    # Pairwise-complete correlation of each fuel change with each section
+    n_fuels = changes.shape[1]
+    pair_valid = valid[:, 2:, None] & valid[:, None, :2]
+    x = np.where(pair_valid, changes[:, :, None], 0.0).reshape(len(df), -1)
+    y = np.where(pair_valid, sentiment[:, None, :], 0.0).reshape(len(df), -1)
+    pair_valid = pair_valid.reshape(len(df), -1).astype(float)
+
+    n = masks.T @ pair_valid
+    sx, sy = masks.T @ x, masks.T @ y
+    sxx, syy, sxy = masks.T @ (x * x), masks.T @ (y * y), masks.T @ (x * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    corr = corr.reshape(len(labels), n_fuels, 2)
+
+    return _metrics_frame(model, labels, change_index, masks.sum(axis=0), means, variances, exceptions, corr)
+
+
+def _metrics_frame(model, labels, change_index, sizes, means, variances, exceptions, corr):
+    """
+    The result frame of compute_metrics from its per-group arrays: group sizes,
+    means and variances of (headline, text, changes...), exception counts and
+    the fuel x section correlations
+    """
+    rows = []
+    for g, (fuel, group) in enumerate(labels):
+        row = {
+            'model': model,
+            'fuel': fuel,
+            'group': group,
+            'count': int(sizes[g]),
+            'headline_mean': means[g, 0],
+            'text_mean': means[g, 1],
+            'headline_std': np.sqrt(variances[g, 0]),
+            'text_std': np.sqrt(variances[g, 1]),
+            'headline_le_text': int(exceptions[g, 0]),
+            'text_le_headline': int(exceptions[g, 1]),
+            'change_mean': np.nan,
+            'headline_per_unit': np.nan,
+            'text_per_unit': np.nan,
+            'headline_corr': np.nan,
+            'text_corr': np.nan,
+        }
+        i = change_index[g]
+        if i >= 0:
+            change_mean = means[g, 2 + i]
+            row['change_mean'] = change_mean
+            row['headline_per_unit'] = means[g, 0] / abs(change_mean)
+            row['text_per_unit'] = means[g, 1] / abs(change_mean)
+            row['headline_corr'] = corr[g, i, 0]
+            row['text_corr'] = corr[g, i, 1]
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index(['fuel', 'group'])
+
+
+def fuel_sensitivity(metrics, fuel):
+    """
+    Average absolute correlation of headline and text sentiment with a fuel's price changes
+    """
+    row = metrics.loc[(fuel, 'all')]
+    return (abs(row['headline_corr']) + abs(row['text_corr'])) / 2
+
+
+def metrics_grid(datasets, models=MODELS, fuels=('petrol', 'diesel'), large_threshold=10):
+    """
+    Run compute_metrics over every dataset x model combination and stack the results
+    """
+    frames = []
+    for name, df in datasets.items():
+        for model in models:
+            metrics = compute_metrics(df, model, fuels=fuels, large_threshold=large_threshold)
+            frames.append(metrics.assign(dataset=name))
+    return pd.concat(frames)
+
+
+def sensitivity_lines(metrics, fuel, section):
+    """
+    The per-unit and large-change lines of the sensitivity table for one fuel and section
+    """
+    lines = []
+    increases = metrics.loc[(fuel, 'increase')]
+    decreases = metrics.loc[(fuel, 'decrease')]
+    large_increases = metrics.loc[(fuel, 'large_increase')]
+    large_decreases = metrics.loc[(fuel, 'large_decrease')]
+
+    if increases['count'] > 0:
+        lines.append(f"Sentiment per unit increase: {increases[section + '_per_unit']:.3f}")
+    if decreases['count'] > 0:
+        lines.append(f"Sentiment per unit decrease: {decreases[section + '_per_unit']:.3f}")
+    if large_increases['count'] > 0:
+        lines.append(f"Average sentiment per large increase: {large_increases[section + '_mean']:.3f}")
+    if large_decreases['count'] > 0:
+        lines.append(f"Average sentiment per large decrease: {large_decreases[section + '_mean']:.3f}")
+    return lines
+
+
+def melt_fuel_changes(df, models=MODELS, fuels=('petrol', 'diesel')):
+    """
+    Long table with one row per (date, fuel, model) where that fuel's price moved,
+    holding the change and the model's headline and text sentiment. Dates where
+    any of the fuels has no change value are left out, and rows keep the order
+    of the date, then the fuel, then the model.
+    """
+    changes = df[[FUEL_CHANGE_COLUMNS[fuel] for fuel in fuels]].to_numpy(dtype=float)
+    headline = df[[sentiment_column(model, 'headline') for model in models]].to_numpy(dtype=float)
+    text = df[[sentiment_column(model, 'text') for model in models]].to_numpy(dtype=float)
+
+    n, n_fuels, n_models = len(df), len(fuels), len(models)
+    rows = np.repeat(np.arange(n), n_fuels * n_models)
+    fuel_index = np.tile(np.repeat(np.arange(n_fuels), n_models), n)
+    model_index = np.tile(np.arange(n_models), n * n_fuels)
+
+    price_change = changes[rows, fuel_index]
+    keep = ~np.isnan(changes).any(axis=1)[rows] & (price_change != 0)
+    rows, fuel_index, model_index = rows[keep], fuel_index[keep], model_index[keep]
+
+    return pd.DataFrame({
+        'date': df['date'].to_numpy()[rows],
+        'fuel_type': np.array(fuels, dtype=object)[fuel_index],
+        'model': np.array(models, dtype=object)[model_index],
+        'price_change': price_change[keep],
+        'headline_sentiment': headline[rows, model_index],
+        'text_sentiment': text[rows, model_index],
+    })
+
+
+def fuel_change_metrics(long, large_threshold=10):
+    """
+    Counts, sentiment per PKR of change (summed sentiment over the summed change)
+    and large-change means of a melt_fuel_changes table, one row per (model, fuel)
+    """
+    change = long['price_change']
+    groups = {
+        'increase': change > 0,
+        'decrease': change < 0,
+        'large_increase': change >= large_threshold,
+        'large_decrease': change <= -large_threshold,
+    }
+    keys = ['model', 'fuel_type']
+    result = long[keys].drop_duplicates().set_index(keys)
+
+    for group, mask in groups.items():
+        stats = long[mask].groupby(keys, sort=False).agg(
+            count=('price_change', 'size'),
+            change_sum=('price_change', 'sum'),
+            headline_sum=('headline_sentiment', 'sum'),
+            text_sum=('text_sentiment', 'sum'),
+            headline_mean=('headline_sentiment', 'mean'),
+            text_mean=('text_sentiment', 'mean'),
+        ).reindex(result.index)
+        result[group + 's'] = stats['count'].fillna(0).astype(int)
+        if group in ('increase', 'decrease'):
+            for section in SECTIONS:
+                result[f'{section}_per_unit_{group}'] = stats[section + '_sum'] / stats['change_sum'].abs()
+        else:
+            for section in SECTIONS:
+                result[f'{section}_{group}_mean'] = stats[section + '_mean']
+    return result
@@ -0,0 +1,241 @@
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from accumulators import CoMoments, Extrema, Moments, QuantileSketch
+from aggregate_outlets import CHUNK_SIZE, OUTLETS, outlet_path
+from data_loader import CACHE_DIR_NAME, _file_hash
+from metrics_engine import FUEL_CHANGE_COLUMNS, MODELS, SECTIONS, sentiment_column
+from streaming import MetricsAccumulator, date_prices, price_changes, read_chunks
+
+SENTIMENT_COLUMNS = [sentiment_column(m, s) for m in MODELS for s in SECTIONS]
+CHANGE_COLUMNS = list(FUEL_CHANGE_COLUMNS.values())
+STAT_COLUMNS = SENTIMENT_COLUMNS + CHANGE_COLUMNS
+QUANTILES = (0.25, 0.5, 0.75)
+
+# Bump when OutletStats changes shape so stale pickles are not reused
+STATS_VERSION = 3
+
+
+class OutletStats:
+    """
+    Every mergeable statistic of a set of articles: moments, extrema and
+    quantile sketches of the sentiment and change columns, the correlation of
+    each fuel change with each sentiment column, and the compute_metrics
+    groups of each model. Statistics of single outlets merge into language and
+    overall statistics. `prices` holds the per-date price sums and counts
+    (see streaming.date_prices) the change columns were derived from.
+    """
+
+    def __init__(self, large_threshold=10, resolution=0.01):
+        self.large_threshold = large_threshold
+        self.rows = 0
+        self.moments = Moments(STAT_COLUMNS)
+        self.extrema = Extrema(STAT_COLUMNS)
+        self.quantiles = {column: QuantileSketch(resolution) for column in STAT_COLUMNS}
+        self.comoments = CoMoments(CHANGE_COLUMNS, SENTIMENT_COLUMNS)
+        self.metrics = {model: MetricsAccumulator(model, large_threshold=large_threshold) for model in MODELS}
+        self.prices = None
+
+    def update(self, chunk):
+        values = chunk[STAT_COLUMNS].to_numpy(dtype=float)
+        self.rows += len(chunk)
+        self.moments.update(values)
+        self.extrema.update(values)
+        for i, column in enumerate(STAT_COLUMNS):
+            self.quantiles[column].update(values[:, i])
+        self.comoments.update(chunk[CHANGE_COLUMNS].to_numpy(dtype=float),
+                              chunk[SENTIMENT_COLUMNS].to_numpy(dtype=float))
+        for accumulator in self.metrics.values():
+            accumulator.update(chunk)
+        return self
+
+    def merge(self, other):
+        if other.large_threshold != self.large_threshold:
+            raise ValueError("cannot merge statistics computed with different large-change thresholds")
+        self.rows += other.rows
+        self.moments.merge(other.moments)
+        self.extrema.merge(other.extrema)
+        for column, sketch in other.quantiles.items():
+            self.quantiles[column].merge(sketch)
+        self.comoments.merge(other.comoments)
+        for model, accumulator in other.metrics.items():
+            self.metrics[model].merge(accumulator)
+        if other.prices is not None:
+            self.prices = other.prices if self.prices is None else self.prices.add(other.prices, fill_value=0)
+        return self
+
+    def summary(self):
+        """
+        Count, mean, deviation, extremes and quartiles of every column
+        """
+        table = self.moments.result().join(self.extrema.result())
+        for q in QUANTILES:
+            table[f'q{int(q * 100)}'] = [self.quantiles[c].quantile(q) for c in STAT_COLUMNS]
+        return table[['count', 'mean', 'std', 'min', 'q25', 'q50', 'q75', 'max']]
+
+    def correlations(self):
+        return self.comoments.result()
+
+
+def stats_cache_path(path):
+    """
+    Location of the pickled OutletStats of a data file
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR_NAME, 'outlet_stats', os.path.splitext(name)[0] + '.pkl')
+
+
+def _cache_stamp(path, large_threshold, resolution, digest=None):
+    stat = os.stat(path)
+    return {'version': STATS_VERSION, 'large_threshold': large_threshold, 'resolution': resolution,
+            'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest}
+
+
+def load_cached_stats(path, large_threshold=10, resolution=0.01):
+    """
+    The cached statistics of a data file if they still describe it, else None
+    """
+    cached = stats_cache_path(path)
+    if not os.path.exists(cached):
+        return None
+    try:
+        with open(cached, 'rb') as f:
+            stamp, stats = pickle.load(f)
+    except (pickle.UnpicklingError, AttributeError, EOFError, ValueError):
+        return None
+
+    current = _cache_stamp(path, large_threshold, resolution)
+    settings = ('version', 'large_threshold', 'resolution')
+    if any(stamp[k] != current[k] for k in settings):
+        return None
+    if (stamp['mtime_ns'], stamp['size']) == (current['mtime_ns'], current['size']):
+        return stats
+    # Touched but possibly unchanged, compare the content if it was hashed
+    return stats if stamp['sha256'] is not None and stamp['sha256'] == _file_hash(path) else None
+
+
+def save_stats(path, stats, resolution=0.01, hash_content=True):
+    """
+    Pickle the statistics of a data file next to it. Without `hash_content` the
+    stamp is only the file's size and mtime, which keeps saving after an append
+    independent of the file's size.
+    """
+    cached = stats_cache_path(path)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    digest = _file_hash(path) if hash_content else None
+    stamp = _cache_stamp(path, stats.large_threshold, resolution, digest)
+    tmp = f'{cached}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump((stamp, stats), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cached)
+
+
+def file_stats(path, large_threshold=10, resolution=0.01, chunk_rows=CHUNK_SIZE):
+    """
+    OutletStats of one data file, streamed in chunks
+    """
+    stats = OutletStats(large_threshold, resolution)
+    stats.prices = date_prices(path, chunk_rows)
+    for chunk in read_chunks(path, chunk_rows=chunk_rows, changes=price_changes(stats.prices)):
+        stats.update(chunk)
+    return stats
+
+
+def _outlet_task(task):
+    path, large_threshold, resolution, chunk_rows = task
+    return file_stats(path, large_threshold, resolution, chunk_rows)
+
+
+def compute_statistics(data_dir='data', workers=None, large_threshold=10, resolution=0.01,
+                       chunk_rows=CHUNK_SIZE, use_cache=True):
+    """
+    Statistics of every outlet, computed in parallel (only for outlets whose
+    file changed since they were cached), then merged into each language and
+    into the whole corpus. Returns a dict of scope -> OutletStats, where the
+    scope is an outlet, a language or 'overall', and the names of the outlets
+    that were recomputed.
+    """
+    paths = {outlet: outlet_path(outlet, data_dir) for outlets in OUTLETS.values() for outlet in outlets}
+    results = {}
+    if use_cache:
+        for outlet, path in paths.items():
+            cached = load_cached_stats(path, large_threshold, resolution)
+            if cached is not None:
+                results[outlet] = cached
+
+    stale = [outlet for outlet in paths if outlet not in results]
+    tasks = [(paths[outlet], large_threshold, resolution, chunk_rows) for outlet in stale]
+    workers = min(workers or os.cpu_count() or 1, len(tasks) or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            computed = list(executor.map(_outlet_task, tasks))
+    else:
+        computed = [_outlet_task(task) for task in tasks]
+    for outlet, stats in zip(stale, computed):
+        results[outlet] = stats
+        if use_cache:
+            save_stats(paths[outlet], stats, resolution)
+
+    scopes = {outlet: results[outlet] for outlet in paths}
+    overall = OutletStats(large_threshold, resolution)
+    for language, outlets in OUTLETS.items():
+        merged = OutletStats(large_threshold, resolution)
+        for outlet in outlets:
+            merged.merge(results[outlet])
+        scopes[language] = merged
+        overall.merge(merged)
+    scopes['overall'] = overall
+    return scopes, stale
+
+
+def statistics_tables(scopes):
+    """
+    The summaries and correlations of every scope stacked into two frames
+    """
+    summary = pd.concat({scope: stats.summary() for scope, stats in scopes.items()}, names=['scope', 'column'])
+    correlations = pd.concat({scope: stats.correlations() for scope, stats in scopes.items()}, names=['scope'])
+    return summary, correlations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-outlet statistics merged into language and corpus totals")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--large-threshold', type=float, default=10)
+    parser.add_argument('--no-cache', action='store_true', help="recompute every outlet")
+    parser.add_argument('--output-dir', default=None, help="also write outlet_summary.csv and outlet_correlations.csv")
+    args = parser.parse_args()
+
+    try:
+        # Use the module's own classes so the pickled statistics do not refer to __main__
+        from outlet_stats import compute_statistics, statistics_tables
+
+        start = time.perf_counter()
+        scopes, recomputed = compute_statistics(args.data_dir, args.workers, args.large_threshold,
+                                                chunk_rows=args.chunk_rows, use_cache=not args.no_cache)
+        elapsed = time.perf_counter() - start
+        summary, correlations = statistics_tables(scopes)
+
+        with pd.option_context('display.width', 200, 'display.max_rows', None):
+            for scope in ['overall'] + list(OUTLETS) + [o for outlets in OUTLETS.values() for o in outlets]:
+                print(f"\n{scope.upper()} ({scopes[scope].rows} articles)")
+                print(summary.loc[scope].round(3).to_string())
+                print(correlations.loc[scope]['corr'].unstack().round(3).to_string())
+
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            summary.to_csv(os.path.join(args.output_dir, 'outlet_summary.csv'))
+            correlations.to_csv(os.path.join(args.output_dir, 'outlet_correlations.csv'))
+        n_outlets = sum(len(outlets) for outlets in OUTLETS.values())
+        print(f"\nRecomputed {len(recomputed)} of {n_outlets} outlets in {elapsed:.2f}s"
+              + (f": {', '.join(recomputed)}" if recomputed else ''))
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -1,18 +1,21 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 import mplcursors as hover
 
-# Load data from the four Excel files
-files = ['Diesel.xlsx', 'Petrol.xlsx', 'Brent.xlsx', 'USDPKR.xlsx']
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from chart_renderer import draw_price_trends
+from price_store import load_series
+
+# Load the four series from the price store (decoded from the Excel files once)
+series = ['diesel', 'petrol', 'brent', 'usdpkr']
 labels = ['Diesel', 'Petrol', 'Brent Crude', 'Dollar']
 dataframes = []
 
-# Load, convert date, and apply cutoff for each dataframe
-for file in files:
-    df = pd.read_excel(file)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df[df['date'] >= '2021-06-01']  # Apply cutoff
+# Each series comes back with parsed dates and the cutoff applied
+for name in series:
+    df = load_series(name, start='2021-06-01')
     dataframes.append(df)
 
 # Set up the plot
@@ -21,19 +24,12 @@ plt.figure(figsize=(10, 6))
 # Colors for the plots
 colors = ['b', 'c', 'g', 'r']
 
-# Plot each dataframe
-for df, label, color in zip(dataframes, labels, colors):
-    plt.plot(df['date'], df['price'], label=label, color=color, marker='o')
+# Plot each dataframe with the drawing code the batch renderer uses
+draw_price_trends(plt.gca(), dataframes, labels, colors)
 
 # for hovering
 hover.cursor(hover=True)
 
-# Customize the plot
-plt.title('Price Trends')
-plt.xlabel('Date')
-plt.ylabel('Price (PKR)')
-plt.grid(True)
-plt.legend()
 plt.tight_layout()
 
 # Save the plot as an image
@@ -0,0 +1,198 @@
+import json
+import os
+
+import pandas as pd
+
+from data_loader import _file_hash
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # without pyarrow every call decodes the workbooks again
+    pa = None
+
+PRICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_analysis')
+
+# Series name -> workbook in the price directory; each has a date and a price
+# column. A source can also be a (workbook, column) pair for other columns.
+DEFAULT_SOURCES = {
+    'diesel': 'Diesel.xlsx',
+    'petrol': 'Petrol.xlsx',
+    'brent': 'Brent.xlsx',
+    'usdpkr': 'USDPKR.xlsx',
+}
+
+STORE_NAME = 'prices.arrow'
+
+
+def store_path(directory=PRICE_DIR):
+    return os.path.join(directory, '.cache', STORE_NAME)
+
+
+def read_workbook_frame(path):
+    """
+    Decode one workbook into a date-indexed frame of its other columns, as
+    numbers. Dates are stored either as '01-Jun-2024' strings or as real dates.
+    """
+    df = pd.read_excel(path)
+    dates = df['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        parsed = pd.to_datetime(dates, format='%d-%b-%Y', errors='coerce')
+        dates = parsed.fillna(pd.to_datetime(dates[parsed.isna()], errors='coerce'))
+    frame = df.drop(columns='date').apply(pd.to_numeric, errors='coerce')
+    frame.index = pd.DatetimeIndex(dates).as_unit('ns')
+    frame = frame[frame.index.notna()]
+    return frame[~frame.index.duplicated(keep='first')].sort_index()
+
+
+def read_workbook(path, column='price'):
+    """
+    Decode one column of a price workbook into a date-indexed Series
+    """
+    return read_workbook_frame(path)[column]
+
+
+def _source(entry):
+    """
+    The (workbook, column) pair of a sources entry
+    """
+    return (entry, 'price') if isinstance(entry, str) else tuple(entry)
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return {'file': os.path.basename(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _read_store(directory):
+    """
+    The stored wide table and the source stamps it was built from, or (None, {})
+    """
+    path = store_path(directory)
+    if pa is None or not os.path.exists(path):
+        return None, {}
+    table = feather.read_table(path, memory_map=True)
+    meta = table.schema.metadata or {}
+    return table, json.loads(meta.get(b'sources', b'{}'))
+
+
+def _write_store(directory, frame, stamps):
+    path = store_path(directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(frame.rename_axis('date').reset_index(), preserve_index=False)
+    table = table.replace_schema_metadata({b'sources': json.dumps(stamps).encode()})
+    tmp = f'{path}.{os.getpid()}.tmp'
+    # Uncompressed so the next open can memory-map it
+    feather.write_feather(table, tmp, compression='uncompressed')
+    os.replace(tmp, path)
+
+
+def _check_stamp(path, stamp):
+    """
+    'current' if the workbook still matches its stamp, 'touched' if only its
+    modification time changed, otherwise None
+    """
+    current = _stamp(path)
+    if stamp.get('file') != current['file']:
+        return None
+    if stamp.get('mtime_ns') == current['mtime_ns'] and stamp.get('size') == current['size']:
+        return 'current'
+    return 'touched' if stamp.get('sha256') == _file_hash(path) else None
+
+
+def load_prices(names=None, directory=PRICE_DIR, sources=None, start=None, end=None):
+    """
+    Wide date-indexed table with one column per price series, served from a
+    memory-mapped store in <directory>/.cache. Workbooks are only decoded when
+    they are new to the store or their content changed. `sources` maps series
+    names to workbook files in `directory` (DEFAULT_SOURCES by default); `start`
+    and `end` cut the date range, and dates where none of the requested series
+    has a price are dropped.
+    """
+    sources = sources or DEFAULT_SOURCES
+    names = list(names or sources)
+
+    table, stamps = _read_store(directory)
+    stored = table.to_pandas().set_index('date') if table is not None else pd.DataFrame()
+
+    # Re-decode only the workbooks that are missing from the store or changed,
+    # each once however many of its columns are wanted
+    fresh = {}
+    decoded = {}
+    restamped = False
+    for name in names:
+        if name not in sources and name not in stamps:
+            raise KeyError(f"Unknown price series {name!r}")
+        if name in sources:
+            filename, column = _source(sources[name])
+        else:
+            filename, column = stamps[name]['file'], stamps[name].get('column', 'price')
+        path = os.path.join(directory, filename)
+        state = _check_stamp(path, stamps[name]) if name in stored.columns and name in stamps else None
+        if state == 'touched':
+            # Same content, so only the stamp needs refreshing
+            stamps[name] = dict(_stamp(path), sha256=stamps[name]['sha256'], column=column)
+            restamped = True
+        elif state is None:
+            if path not in decoded:
+                decoded[path] = read_workbook_frame(path)
+            fresh[name] = decoded[path][column]
+            stamps[name] = dict(_stamp(path), sha256=_file_hash(path), column=column)
+
+    if fresh or restamped:
+        stored = stored.drop(columns=[n for n in fresh if n in stored.columns])
+        stored = pd.concat([stored] + [s.rename(n) for n, s in fresh.items()], axis=1).sort_index()
+        if pa is not None:
+            _write_store(directory, stored, stamps)
+
+    prices = stored[names]
+    if start is not None:
+        prices = prices[prices.index >= pd.Timestamp(start)]
+    if end is not None:
+        prices = prices[prices.index <= pd.Timestamp(end)]
+    return prices.dropna(how='all')
+
+
+def load_series(name, directory=PRICE_DIR, sources=None, start=None, end=None):
+    """
+    One series as a date/price frame, the shape the plotting scripts read from Excel
+    """
+    prices = load_prices([name], directory, sources, start, end)[name].dropna()
+    return prices.rename('price').rename_axis('date').reset_index()
+
+
+def workbook_series(path, start=None, end=None):
+    """
+    load_series for any date/price workbook, stored in the store next to it
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    name = os.path.splitext(filename)[0]
+    return load_series(name, directory, {name: filename}, start, end)
+
+
+def workbook_frame(path, start=None, end=None):
+    """
+    Every column of a workbook with a date column, as a date-indexed frame
+    stored in the store next to it like workbook_series. Each column is a
+    series named <workbook>/<column>.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(filename)[0]
+    _, stamps = _read_store(directory)
+    known = {name: stamp for name, stamp in stamps.items()
+             if name.startswith(stem + '/') and stamp.get('file') == filename}
+    if known and _check_stamp(path, next(iter(known.values()))) is not None:
+        columns = [stamp['column'] for stamp in known.values()]
+    else:
+        # Only the header row is read here; load_prices decodes the rest once
+        columns = [c for c in pd.read_excel(path, nrows=0).columns if c != 'date']
+
+    sources = {f'{stem}/{column}': (filename, column) for column in columns}
+    prices = load_prices(list(sources), directory, sources, start, end)
+    return prices.set_axis(columns, axis=1).rename_axis('date')
+
+
+if __name__ == "__main__":
+    prices = load_prices()
+    print(f"{store_path()}: {len(prices)} dates, {prices.index.min():%Y-%m-%d} to {prices.index.max():%Y-%m-%d}")
+    print(prices.count().to_string())
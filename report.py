@@ -0,0 +1,546 @@
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import pearsonr
+
+from aggregate_outlets import OUTLETS, average_path
+from data_loader import _file_hash, load_dataset
+from event_windows import event_pairs, parse_dates
+from memo import Graph
+from metrics_engine import (ANY_FUEL, FUEL_CHANGE_COLUMNS, MODELS, compute_metrics, fuel_change_metrics, fuel_sensitivity,
+                            melt_fuel_changes, sentiment_column)
+
+OUTPUT_DIR = 'reports'
+FORMATS = ('json', 'md', 'tex')
+
+LARGE_THRESHOLD = 10
+# The asymmetric-response search of contextual_statistics.py: petrol hikes of at
+# least EVENT_HIKE PKR and cuts of more than EVENT_CUT PKR one to two months later
+EVENT_HIKE = 20
+EVENT_CUT = 30
+EVENT_WINDOW_MONTHS = (1, 2)
+# The example searches of urdu_gemini_section_stats.py (changes strictly inside
+# each PKR band) and the dates it and contextual_statistics.py single out
+CHANGE_BANDS = {'increase_10_20': (10, 20), 'decrease_15_25': (-25, -15)}
+EXAMPLE_DATES = ('2021-11-05', '2022-07', '2023-09')
+
+# Sections register themselves here in report order
+SECTIONS = []
+
+
+def section(name, title):
+    """
+    Register a report section. The function takes the ReportData and returns a
+    list of flat row dicts, which every output format renders as one table.
+    """
+    def register(build):
+        SECTIONS.append({'name': name, 'title': title, 'build': build})
+        return build
+    return register
+
+
+def report_graph(data_dir='data', large_threshold=LARGE_THRESHOLD):
+    """
+    The intermediates the sections share, as memoized graph nodes cached under
+    <data_dir>/.cache/memo. Every node hangs off the dataset of its language, so
+    editing one average file only recomputes that language, and changing the
+    large-change threshold only recomputes the metric groups.
+    """
+    params = {'large_threshold': large_threshold, 'event_hike': EVENT_HIKE, 'event_cut': EVENT_CUT,
+              'event_window_months': list(EVENT_WINDOW_MONTHS)}
+    graph = Graph(params, os.path.join(data_dir, '.cache', 'memo'))
+
+    # The Arrow cache of data_loader already makes this cheap
+    @graph.node(files=lambda language: [average_path(language, data_dir)], persist=False)
+    def dataset(language):
+        return load_dataset(average_path(language, data_dir))
+
+    @graph.node(deps=['dataset'], params=['large_threshold'])
+    def metrics(dataset, model, large_threshold):
+        return compute_metrics(dataset, model, large_threshold=large_threshold)
+
+    @graph.node(deps=['dataset'], persist=False)
+    def sentiment(dataset, model):
+        """
+        n x 2 array of headline and text sentiment
+        """
+        return dataset[[sentiment_column(model, 'headline'), sentiment_column(model, 'text')]].to_numpy(dtype=float)
+
+    @graph.node(deps=['dataset'])
+    def direction_masks(dataset):
+        """
+        Rows where either fuel dropped and where either fuel rose
+        """
+        changes = dataset[list(FUEL_CHANGE_COLUMNS.values())].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            return {'drop': (changes < 0).any(axis=1), 'hike': (changes > 0).any(axis=1)}
+
+    @graph.node(deps=['dataset'], persist=False)
+    def dates(dataset):
+        return parse_dates(dataset)
+
+    @graph.node(deps=['dataset', 'dates'], params=['event_hike', 'event_cut', 'event_window_months'])
+    def petrol_events(dataset, dates, event_hike, event_cut, event_window_months):
+        window = tuple(pd.DateOffset(months=m) for m in event_window_months)
+        return event_pairs(dataset, 'petrol', event_hike, event_cut, window, dates=dates, include_unmatched=True)
+
+    @graph.node(deps=['dataset'])
+    def fuel_rows(dataset):
+        """
+        Long table of urdu_gemini_section_stats.py for every model: one row per
+        fuel whose price moved on a date where both changes are known
+        """
+        return melt_fuel_changes(dataset, models=MODELS, fuels=tuple(FUEL_CHANGE_COLUMNS))
+
+    @graph.node(deps=['fuel_rows'], params=['large_threshold'])
+    def fuel_metrics(fuel_rows, large_threshold):
+        return fuel_change_metrics(fuel_rows, large_threshold=large_threshold)
+
+    return graph
+
+
+class ReportData:
+    """
+    What the sections read: every dataset plus the shared intermediates, served
+    from the memoized report graph
+    """
+
+    def __init__(self, data_dir='data', languages=tuple(OUTLETS), large_threshold=LARGE_THRESHOLD, graph=None):
+        self.graph = graph or report_graph(data_dir, large_threshold)
+        self.paths = {language: average_path(language, data_dir) for language in languages}
+        self.datasets = {language: self.graph.get('dataset', language=language) for language in languages}
+        self.large_threshold = self.graph.params['large_threshold']
+
+    def metrics(self, language, model):
+        return self.graph.get('metrics', language=language, model=model)
+
+    def sentiment(self, language, model):
+        return self.graph.get('sentiment', language=language, model=model)
+
+    def direction_masks(self, language):
+        return self.graph.get('direction_masks', language=language)
+
+    def dates(self, language):
+        return self.graph.get('dates', language=language)
+
+    def event_pairs(self, language):
+        return self.graph.get('petrol_events', language=language)
+
+    def fuel_rows(self, language, model):
+        long = self.graph.get('fuel_rows', language=language)
+        return long[long['model'] == model]
+
+    def fuel_metrics(self, language, model):
+        return self.graph.get('fuel_metrics', language=language).loc[model]
+
+
+@section('overview', 'Overall sentiment')
+def overview(data):
+    rows = []
+    for language, df in data.datasets.items():
+        for model in MODELS:
+            overall = data.metrics(language, model).loc[(ANY_FUEL, 'all')]
+            rows.append({
+                'language': language,
+                'model': model,
+                'records': len(df),
+                'first_date': str(df['date'].min()),
+                'last_date': str(df['date'].max()),
+                'headline_mean': overall['headline_mean'],
+                'text_mean': overall['text_mean'],
+                'text_minus_headline': overall['text_mean'] - overall['headline_mean'],
+                'headline_std': overall['headline_std'],
+                'text_std': overall['text_std'],
+            })
+    return rows
+
+
+@section('correlations', 'Correlation with fuel price changes')
+def correlations(data):
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            metrics = data.metrics(language, model)
+            sensitivities = {fuel: fuel_sensitivity(metrics, fuel) for fuel in FUEL_CHANGE_COLUMNS}
+            most = max(sensitivities, key=sensitivities.get)
+            for fuel in FUEL_CHANGE_COLUMNS:
+                rows.append({
+                    'language': language,
+                    'model': model,
+                    'fuel': fuel,
+                    'headline_corr': metrics.loc[(fuel, 'all'), 'headline_corr'],
+                    'text_corr': metrics.loc[(fuel, 'all'), 'text_corr'],
+                    'sensitivity': sensitivities[fuel],
+                    'most_sensitive': fuel == most,
+                })
+    return rows
+
+
+@section('polarity', 'Headline vs body text polarity during price drops and hikes')
+def polarity(data):
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            metrics = data.metrics(language, model)
+            sentiment = data.sentiment(language, model)
+            for direction, mask in data.direction_masks(language).items():
+                group = metrics.loc[(ANY_FUEL, direction)]
+                headline, text = sentiment[mask, 0], sentiment[mask, 1]
+                count = int(mask.sum())
+                text_above = int((text > headline).sum())
+                rows.append({
+                    'language': language,
+                    'model': model,
+                    'direction': direction,
+                    'count': count,
+                    'headline_mean': group['headline_mean'],
+                    'text_mean': group['text_mean'],
+                    'headline_minus_text': group['headline_mean'] - group['text_mean'],
+                    'headline_above_text': int((headline > text).sum()),
+                    'text_above_headline': text_above,
+                    'text_above_headline_pct': 100 * text_above / count if count else None,
+                })
+    return rows
+
+
+@section('fuel_polarity', 'Headline vs body text polarity, counting each fuel change separately')
+def fuel_polarity(data):
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            long = data.fuel_rows(language, model)
+            for direction, group in [('drop', long[long['price_change'] < 0]),
+                                     ('hike', long[long['price_change'] > 0])]:
+                headline, text = group['headline_sentiment'].mean(), group['text_sentiment'].mean()
+                rows.append({
+                    'language': language,
+                    'model': model,
+                    'direction': direction,
+                    'count': len(group),
+                    'headline_mean': headline,
+                    'text_mean': text,
+                    'headline_minus_text': headline - text,
+                })
+    return rows
+
+
+@section('asymmetry', 'Asymmetry between responses to drops and hikes')
+def asymmetry(data):
+    rows = []
+    for model in MODELS:
+        for language in data.datasets:
+            metrics = data.metrics(language, model)
+            drops, hikes = metrics.loc[(ANY_FUEL, 'drop')], metrics.loc[(ANY_FUEL, 'hike')]
+            rows.append({
+                'model': model,
+                'language': language,
+                'headline_gap': abs(drops['headline_mean'] - hikes['headline_mean']),
+                'text_gap': abs(drops['text_mean'] - hikes['text_mean']),
+                'asymmetry': abs(drops['headline_mean'] - hikes['headline_mean'])
+                             - abs(drops['text_mean'] - hikes['text_mean']),
+            })
+    return rows
+
+
+@section('sensitivity', 'Sentiment response to petrol and diesel price changes')
+def sensitivity(data):
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            metrics = data.metrics(language, model)
+            for fuel in FUEL_CHANGE_COLUMNS:
+                groups = {group: metrics.loc[(fuel, group)]
+                          for group in ('increase', 'decrease', 'large_increase', 'large_decrease')}
+                for section_name in ('headline', 'text'):
+                    rows.append({
+                        'language': language,
+                        'model': model,
+                        'fuel': fuel,
+                        'section': section_name,
+                        'increases': int(groups['increase']['count']),
+                        'decreases': int(groups['decrease']['count']),
+                        'large_increases': int(groups['large_increase']['count']),
+                        'large_decreases': int(groups['large_decrease']['count']),
+                        'per_unit_increase': groups['increase'][section_name + '_per_unit'],
+                        'per_unit_decrease': groups['decrease'][section_name + '_per_unit'],
+                        'large_increase_mean': groups['large_increase'][section_name + '_mean'],
+                        'large_decrease_mean': groups['large_decrease'][section_name + '_mean'],
+                    })
+    return rows
+
+
+@section('fuel_changes', 'Sentiment per PKR of price change, by fuel')
+def fuel_changes(data):
+    """
+    The response table of urdu_gemini_section_stats.py, where the per-unit figures
+    divide summed sentiment by the summed price change
+    """
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            metrics = data.fuel_metrics(language, model)
+            for fuel in FUEL_CHANGE_COLUMNS:
+                fuel_data = metrics.loc[fuel]
+                for section_name in ('headline', 'text'):
+                    row = {'language': language, 'model': model, 'fuel': fuel, 'section': section_name}
+                    for group in ('increase', 'decrease', 'large_increase', 'large_decrease'):
+                        row[group + 's'] = int(fuel_data[group + 's'])
+                    for group in ('increase', 'decrease'):
+                        row['per_unit_' + group] = fuel_data[f'{section_name}_per_unit_{group}']
+                    for group in ('large_increase', 'large_decrease'):
+                        row[group + '_mean'] = fuel_data[f'{section_name}_{group}_mean']
+                    rows.append(row)
+    return rows
+
+
+@section('large_changes', 'Correlations with p-values, and changes larger than one standard deviation')
+def large_changes(data):
+    """
+    urdu_gemini_analysis.py's view of each fuel: the rows where its price moved,
+    their correlations with sentiment, and the rows whose change exceeds the
+    standard deviation of those changes
+    """
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            long = data.fuel_rows(language, model)
+            for fuel in FUEL_CHANGE_COLUMNS:
+                fuel_data = long[long['fuel_type'] == fuel]
+                change = fuel_data['price_change']
+                threshold = change.std()
+                large = fuel_data[change.abs() > threshold]
+                row = {'language': language, 'model': model, 'fuel': fuel, 'observations': len(fuel_data)}
+                for section_name in ('headline', 'text'):
+                    sentiment = fuel_data[section_name + '_sentiment']
+                    r, p = pearsonr(change, sentiment) if len(fuel_data) > 2 else (np.nan, np.nan)
+                    row[section_name + '_corr'] = r
+                    row[section_name + '_p'] = p
+                row['large_threshold'] = threshold
+                row['large_changes'] = len(large)
+                row['large_headline_mean'] = large['headline_sentiment'].mean()
+                row['large_text_mean'] = large['text_sentiment'].mean()
+                rows.append(row)
+    return rows
+
+
+@section('change_bands', 'Price changes of 10-20 PKR up and 15-25 PKR down')
+def change_bands(data):
+    rows = []
+    for language in data.datasets:
+        for model in MODELS:
+            long = data.fuel_rows(language, model)
+            for band, (low, high) in CHANGE_BANDS.items():
+                in_band = long[(long['price_change'] > low) & (long['price_change'] < high)]
+                for row in in_band.itertuples(index=False):
+                    rows.append({
+                        'language': language,
+                        'model': model,
+                        'band': band,
+                        'date': row.date,
+                        'fuel': row.fuel_type,
+                        'change': row.price_change,
+                        'headline': row.headline_sentiment,
+                        'text': row.text_sentiment,
+                    })
+    return rows
+
+
+@section('date_examples', 'Price updates on the dates discussed in the paper')
+def date_examples(data):
+    rows = []
+    for language, df in data.datasets.items():
+        on_date = df['date'].astype(str).str.startswith(EXAMPLE_DATES)
+        for model in MODELS:
+            sentiment = data.sentiment(language, model)
+            for i in np.flatnonzero(on_date):
+                rows.append({
+                    'language': language,
+                    'model': model,
+                    'date': df['date'].iat[i],
+                    'petrol_change': df['petrol_change'].iat[i],
+                    'diesel_change': df['diesel_change'].iat[i],
+                    'headline': sentiment[i, 0],
+                    'text': sentiment[i, 1],
+                })
+    return rows
+
+
+@section('polarity_exceptions', 'Dates where the headline is more positive than the body text')
+def polarity_exceptions(data):
+    """
+    The exceptions of contextual_statistics.py: during drops the body text is
+    usually the more positive of the two, during hikes the headline the more
+    negative, and these dates go the other way
+    """
+    rows = []
+    for language, df in data.datasets.items():
+        for model in MODELS:
+            sentiment = data.sentiment(language, model)
+            for direction, mask in data.direction_masks(language).items():
+                for i in np.flatnonzero(mask & (sentiment[:, 0] > sentiment[:, 1])):
+                    rows.append({
+                        'language': language,
+                        'model': model,
+                        'direction': direction,
+                        'date': df['date'].iat[i],
+                        'petrol_change': df['petrol_change'].iat[i],
+                        'diesel_change': df['diesel_change'].iat[i],
+                        'headline': sentiment[i, 0],
+                        'text': sentiment[i, 1],
+                    })
+    return rows
+
+
+@section('events', 'Large petrol hikes and the cuts that followed them')
+def events(data):
+    rows = []
+    for language, df in data.datasets.items():
+        pairs = data.event_pairs(language)
+        for _, hike_pairs in pairs.groupby('hike_row', sort=False):
+            for model in MODELS:
+                headline, text = sentiment_column(model, 'headline'), sentiment_column(model, 'text')
+                for pair in hike_pairs.itertuples(index=False):
+                    pair = pair._asdict()
+                    matched = pair['cut_row'] is not None
+                    rows.append({
+                        'language': language,
+                        'model': model,
+                        'hike_date': df.at[pair['hike_row'], 'date'],
+                        'hike_change': pair['hike_change'],
+                        'hike_headline': pair['hike_' + headline],
+                        'hike_text': pair['hike_' + text],
+                        'cut_date': df.at[pair['cut_row'], 'date'] if matched else None,
+                        'cut_change': pair['cut_change'] if matched else None,
+                        'cut_headline': pair['cut_' + headline] if matched else None,
+                        'cut_text': pair['cut_' + text] if matched else None,
+                    })
+    return rows
+
+
+def _plain(value, digits=6):
+    """
+    JSON-safe version of a cell: numpy scalars unwrapped, NaN as None, floats rounded
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, digits)
+    return value
+
+
+def build_report(data_dir='data', only=None, large_threshold=LARGE_THRESHOLD, data=None):
+    """
+    Every registered section computed from one ReportData, as a JSON-ready dict
+    with the hashes of the input files
+    """
+    data = data or ReportData(data_dir, large_threshold=large_threshold)
+    report = {
+        'sources': {path: _file_hash(path) for path in data.paths.values()},
+        'parameters': dict(data.graph.params),
+        'sections': [],
+    }
+    for entry in SECTIONS:
+        if only and entry['name'] not in only:
+            continue
+        rows = [{key: _plain(value) for key, value in row.items()} for row in entry['build'](data)]
+        report['sections'].append({'name': entry['name'], 'title': entry['title'], 'rows': rows})
+    return report
+
+
+def _cell(value, digits=3):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, float):
+        return f'{value:.{digits}f}'
+    return str(value)
+
+
+def to_markdown(report):
+    lines = ['# Fuel price sentiment report', '']
+    for path, digest in report['sources'].items():
+        lines.append(f'- `{path}`: `{digest[:12]}`')
+    for section_data in report['sections']:
+        lines += ['', f"## {section_data['title']}", '']
+        rows = section_data['rows']
+        if not rows:
+            lines.append('No rows.')
+            continue
+        columns = list(rows[0])
+        lines.append('| ' + ' | '.join(columns) + ' |')
+        lines.append('|' + '|'.join('---' for _ in columns) + '|')
+        for row in rows:
+            lines.append('| ' + ' | '.join(_cell(row[c]) for c in columns) + ' |')
+    return '\n'.join(lines) + '\n'
+
+
+def _latex_escape(text):
+    return text.replace('\\', r'\textbackslash{}').replace('_', r'\_').replace('%', r'\%').replace('&', r'\&')
+
+
+def to_latex(report):
+    lines = []
+    for section_data in report['sections']:
+        rows = section_data['rows']
+        lines += [f"\\subsection*{{{_latex_escape(section_data['title'])}}}"]
+        if not rows:
+            continue
+        columns = list(rows[0])
+        align = ''.join('r' if isinstance(rows[0][c], (int, float)) and not isinstance(rows[0][c], bool)
+                        else 'l' for c in columns)
+        lines += ['\\begin{tabular}{' + align + '}', '\\hline',
+                  ' & '.join(_latex_escape(c) for c in columns) + ' \\\\', '\\hline']
+        for row in rows:
+            lines.append(' & '.join(_latex_escape(_cell(row[c])) for c in columns) + ' \\\\')
+        lines += ['\\hline', '\\end{tabular}', '']
+    return '\n'.join(lines)
+
+
+def write_report(report, output_dir=OUTPUT_DIR, formats=FORMATS):
+    """
+    Write report.<format> for every requested format, atomically. Returns the paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    renderers = {
+        'json': lambda r: json.dumps(r, indent=2, ensure_ascii=False) + '\n',
+        'md': to_markdown,
+        'tex': to_latex,
+    }
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f'report.{fmt}')
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(renderers[fmt](report))
+        os.replace(tmp, path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute every paper statistic once and write a report")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--only', nargs='+', help="section names to include")
+    parser.add_argument('--large-threshold', type=float, default=LARGE_THRESHOLD)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        data = ReportData(args.data_dir, large_threshold=args.large_threshold)
+        report = build_report(args.data_dir, args.only, data=data)
+        paths = write_report(report, args.output_dir, args.formats)
+        print(f"{len(report['sections'])} sections in {time.perf_counter() - start:.2f}s: " + ", ".join(paths))
+        stats = data.graph.stats
+        print(f"Intermediates: {stats['computed']} computed, {stats['disk']} from disk, {stats['memory']} reused in memory")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
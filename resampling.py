@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+CALENDARS = ('half-month', 'weekly', 'monthly')
+AGGREGATIONS = ('first', 'last', 'mean', 'min', 'max', 'sum', 'count', 'ohlc')
+
+# 1970-01-01 was a Thursday; weekday numbers follow Python's (Monday = 0)
+EPOCH_WEEKDAY = 3
+
+
+def snap_dates(dates, calendar='half-month', split_day=16, label_day=None, week_start=0):
+    """
+    Snap dates to the start of their calendar period with datetime64 arithmetic.
+
+    half-month: days before `split_day` go to the 1st of the month and the rest to
+    `label_day` (split_day by default, so 1st/16th like the fortnightly price
+    notifications; the price workbooks label the second half the 15th).
+    weekly: the most recent `week_start` weekday (Monday by default).
+    monthly: the 1st of the month.
+    """
+    days = np.asarray(pd.DatetimeIndex(dates).values.astype('datetime64[D]'))
+    if calendar == 'half-month':
+        months = days.astype('datetime64[M]').astype('datetime64[D]')
+        day = (days - months).astype(np.int64) + 1
+        label_day = split_day if label_day is None else label_day
+        snapped = months + np.where(day >= split_day, label_day - 1, 0).astype('timedelta64[D]')
+    elif calendar == 'weekly':
+        offset = (days.astype(np.int64) + EPOCH_WEEKDAY - week_start) % 7
+        snapped = days - offset.astype('timedelta64[D]')
+    elif calendar == 'monthly':
+        snapped = days.astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        raise ValueError(f"Unknown calendar {calendar!r}, expected one of {CALENDARS}")
+    # NaT stays NaT through the arithmetic above
+    return snapped.astype('datetime64[ns]')
+
+
+def _group_bounds(labels):
+    """
+    Start offsets of each run of equal labels in a sorted label array
+    """
+    if len(labels) == 0:
+        return np.array([], dtype=np.int64)
+    return np.concatenate([[0], np.flatnonzero(labels[1:] != labels[:-1]) + 1])
+
+
+def _first_valid(values, valid, starts, last=False):
+    """
+    First (or last) non-NaN value of every group and column
+    """
+    n = len(values)
+    positions = np.arange(n)[:, None]
+    if last:
+        picked = np.maximum.reduceat(np.where(valid, positions, -1), starts, axis=0)
+        found = picked >= 0
+    else:
+        picked = np.minimum.reduceat(np.where(valid, positions, n), starts, axis=0)
+        found = picked < n
+    result = np.take_along_axis(values, np.clip(picked, 0, n - 1), axis=0)
+    return np.where(found, result, np.nan)
+
+
+def aggregate_groups(values, starts, how):
+    """
+    Reduce the sorted rows of an n x series array over the groups beginning at
+    `starts`; NaNs are skipped like pandas does
+    """
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    if how == 'count':
+        return counts
+    if how == 'first':
+        return _first_valid(values, valid, starts)
+    if how == 'last':
+        return _first_valid(values, valid, starts, last=True)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if how == 'sum':
+            return np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+        if how == 'mean':
+            return np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0) / counts
+        if how == 'min':
+            result = np.minimum.reduceat(np.where(valid, values, np.inf), starts, axis=0)
+        elif how == 'max':
+            result = np.maximum.reduceat(np.where(valid, values, -np.inf), starts, axis=0)
+        else:
+            raise ValueError(f"Unknown aggregation {how!r}, expected one of {AGGREGATIONS}")
+    return np.where(counts > 0, result, np.nan)
+
+
+def resample(data, calendar='half-month', how='last', **calendar_options):
+    """
+    Resample every series of a date-indexed frame (or a frame with a 'date'
+    column) onto a calendar in one pass. `how` is one aggregation or a list of
+    them; 'ohlc' expands to open/high/low/close. With several aggregations the
+    columns become (series, aggregation) pairs.
+    """
+    if 'date' in getattr(data, 'columns', []):
+        data = data.set_index('date')
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+
+    labels = snap_dates(data.index, calendar, **calendar_options)
+    keep = ~np.isnat(labels)
+    labels = labels[keep]
+    values = data.to_numpy(dtype=float)[keep]
+
+    # Stable sort so first/last follow the original date order within a period
+    dates = np.asarray(data.index.values.astype('datetime64[ns]'))[keep]
+    order = np.lexsort((dates, labels))
+    labels, values = labels[order], values[order]
+    starts = _group_bounds(labels)
+
+    hows = [how] if isinstance(how, str) else list(how)
+    blocks = []
+    names = []
+    for h in hows:
+        if h == 'ohlc':
+            for field, part in [('open', 'first'), ('high', 'max'), ('low', 'min'), ('close', 'last')]:
+                blocks.append(aggregate_groups(values, starts, part))
+                names.append(field)
+        else:
+            blocks.append(aggregate_groups(values, starts, h))
+            names.append(h)
+
+    index = pd.DatetimeIndex(labels[starts], name='date')
+    if len(names) == 1:
+        return pd.DataFrame(blocks[0], index=index, columns=data.columns)
+    columns = pd.MultiIndex.from_tuples([(c, name) for c in data.columns for name in names])
+    stacked = np.stack(blocks, axis=2).reshape(len(index), -1)
+    return pd.DataFrame(stacked, index=index, columns=columns)
+
+
+if __name__ == "__main__":
+    from price_store import load_prices
+
+    prices = load_prices(start='2021-06-01')
+    print("Monthly closing prices:")
+    print(resample(prices, 'monthly', 'last').tail().round(2).to_string())
+    print("\nBrent half-month OHLC:")
+    print(resample(prices[['brent']], 'half-month', 'ohlc', split_day=15).tail().round(2).to_string())
@@ -0,0 +1,163 @@
+import argparse
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from aggregate_outlets import OUTLETS, normalize_dates, outlet_path
+from data_loader import load_dataset
+from metrics_engine import MODELS
+from sentiment_scoring import SECTIONS, overall_column, probability_columns
+
+try:
+    import pyarrow  # noqa: F401
+    # Missing text stays NaN like in the loader's frames
+    TEXT_DTYPE = pd.StringDtype('pyarrow', na_value=np.nan)
+except ImportError:  # keep the loader's strings
+    TEXT_DTYPE = None
+
+# Declared dtypes of the outlet, average and long tables. Probabilities are two
+# decimal model outputs between 0 and 1, so float32 keeps them to within 3e-8
+# (half a float32 step below 1); prices, changes and overall scores stay
+# float64 because thresholds are applied to them.
+# Numeric columns are coerced, so malformed cells become NaN as in the analyses.
+PROBABILITY_COLUMNS = [c for model in MODELS for section in SECTIONS for c in probability_columns(model, section)]
+OVERALL_COLUMNS = [overall_column(model, section) for model in MODELS for section in SECTIONS]
+SCHEMA = dict.fromkeys(PROBABILITY_COLUMNS, 'float32')
+SCHEMA.update(dict.fromkeys(OVERALL_COLUMNS + ['petrol', 'hsd', 'petrol_change', 'diesel_change'], 'float64'))
+SCHEMA.update({
+    'Unnamed: 0': 'int32',
+    'word_count': 'float32',
+    'outlet': 'category',
+    'language': 'category',
+    'model': 'category',
+    'fuel_type': 'category',
+})
+DATE_COLUMNS = ['date']
+TEXT_COLUMNS = ['link', 'inner_html', 'headline']
+
+# Left out of the frame when text is not wanted, see load_texts
+LONG_TEXT_COLUMNS = ['inner_html']
+
+
+def _compact_column(name, values):
+    if name in DATE_COLUMNS and not pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(normalize_dates(values.astype(str)))
+    if name in TEXT_COLUMNS and TEXT_DTYPE is not None:
+        return values.astype(TEXT_DTYPE)
+    dtype = SCHEMA.get(name)
+    if dtype is None or dtype == 'category':
+        return values if dtype is None else values.astype(dtype)
+    numeric = pd.to_numeric(values, errors='coerce')
+    if dtype.startswith('int') and numeric.isna().any():
+        return values
+    return numeric.astype(dtype)
+
+
+def compact(df):
+    """
+    A copy of a frame with the declared dtypes; columns the schema does not
+    name keep theirs
+    """
+    # One frame built from the converted columns, rather than replacing them one by one
+    return pd.DataFrame({name: _compact_column(name, df[name]) for name in df.columns}, index=df.index)
+
+
+# data_loader caches the compacted tables under this name, which changes with the schema
+compact.cache_name = 'compact-' + hashlib.sha256(
+    repr((sorted(SCHEMA.items()), DATE_COLUMNS, TEXT_COLUMNS, str(TEXT_DTYPE))).encode()).hexdigest()[:10]
+
+
+def load_compact(path, text=True):
+    """
+    A data file with the declared dtypes, converted once and then served from
+    data_loader's Arrow cache. The article bodies are most of a file's memory
+    and stay strings either way, so the saving is small unless `text` is off;
+    then they are not loaded at all, and load_texts fetches them for the rows
+    that need them.
+    """
+    columns = None
+    if not text:
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [c for c in header if c not in LONG_TEXT_COLUMNS]
+    return load_dataset(path, columns=columns, schema=compact)
+
+
+def load_texts(path, rows=None):
+    """
+    The article bodies of a data file, all of them or those at the given positions
+    """
+    texts = load_dataset(path, columns=LONG_TEXT_COLUMNS, schema=compact)
+    return texts.iloc[rows] if rows is not None else texts
+
+
+def load_corpus(data_dir='data', text=True, compact_dtypes=True):
+    """
+    Every outlet file in one frame with categorical outlet and language columns
+    """
+    frames = []
+    for language, outlets in OUTLETS.items():
+        for outlet in outlets:
+            path = outlet_path(outlet, data_dir)
+            df = load_compact(path, text) if compact_dtypes else load_dataset(path)
+            frames.append(df.assign(outlet=outlet, language=language))
+    corpus = pd.concat(frames, ignore_index=True)
+    if not compact_dtypes:
+        return corpus
+    # The files are compact already; only the added columns, and any that
+    # concat widened, are converted again
+    drifted = [c for c in corpus.columns if c in SCHEMA and str(corpus[c].dtype) != SCHEMA[c]]
+    return corpus.assign(**compact(corpus[drifted]))
+
+
+def memory_report(before, after):
+    """
+    Deep memory use of each column of a frame before and after compacting, with
+    the dtypes and the share saved, largest columns first
+    """
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(deep=True, index=False),
+    }).join(pd.DataFrame({
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_after': after.memory_usage(deep=True, index=False),
+    }), how='outer')
+    report['saved'] = 1 - report['bytes_after'] / report['bytes_before']
+    return report.sort_values('bytes_before', ascending=False)
+
+
+def _megabytes(n):
+    return f"{n / 1e6:,.2f} MB"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory used by the outlet corpus with and without the compact schema")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--no-text', action='store_true', help="also report the corpus without article bodies")
+    args = parser.parse_args()
+
+    try:
+        before = load_corpus(args.data_dir, compact_dtypes=False)
+        after = load_corpus(args.data_dir)
+        report = memory_report(before, after)
+        with pd.option_context('display.width', 200, 'display.max_rows', None):
+            print(report.to_string(formatters={'saved': '{:.0%}'.format}))
+
+        total_before, total_after = report['bytes_before'].sum(), report['bytes_after'].sum()
+        print(f"\n{len(after)} articles: {_megabytes(total_before)} -> {_megabytes(total_after)} "
+              f"({1 - total_after / total_before:.0%} smaller)")
+        numeric = report['dtype_before'].isin(['float64', 'int64'])
+        print(f"Numeric columns: {_megabytes(report.loc[numeric, 'bytes_before'].sum())} -> "
+              f"{_megabytes(report.loc[numeric, 'bytes_after'].sum())}")
+        if args.no_text:
+            lean = load_corpus(args.data_dir, text=False)
+            print(f"Without article bodies: {_megabytes(lean.memory_usage(deep=True).sum())}")
+
+        # The compact frame must give the same answers, up to float32 rounding of the probabilities
+        drift = np.abs(before[PROBABILITY_COLUMNS].to_numpy(dtype=float)
+                       - after[PROBABILITY_COLUMNS].to_numpy(dtype=float))
+        print(f"Largest probability change: {np.nanmax(drift):.1e}")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
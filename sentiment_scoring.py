@@ -0,0 +1,138 @@
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+PROBABILITY_LABELS = ['very_positive', 'positive', 'neutral', 'negative', 'very_negative']
+SECTIONS = ('headline', 'text')
+
+# Weighted sum used for the *_overall_sentiment columns: 2*vp + p - n - 2*vn
+DEFAULT_WEIGHTS = np.array([2.0, 1.0, 0.0, -1.0, -2.0])
+
+# The models report probabilities to two decimals, so quintuples drift a little from 1
+DEFAULT_TOLERANCE = 0.025
+
+
+def probability_columns(model, section):
+    """
+    The five probability columns of one model and article section, most positive first
+    """
+    return [f'{model}_{section}_{label}' for label in PROBABILITY_LABELS]
+
+
+def overall_column(model, section):
+    return f'{model}_{section}_overall_sentiment'
+
+
+def find_models(df):
+    """
+    Model prefixes that have a complete headline and text probability block in the frame
+    """
+    pattern = re.compile(r'^(.+)_headline_very_positive$')
+    models = []
+    for column in df.columns:
+        match = pattern.match(column)
+        if not match:
+            continue
+        model = match.group(1)
+        needed = [c for section in SECTIONS for c in probability_columns(model, section)]
+        if all(c in df.columns for c in needed):
+            models.append(model)
+    return models
+
+
+def probability_blocks(df, models=None, sections=SECTIONS):
+    """
+    Stack every (model, section) probability block into an n x blocks x 5 array
+    """
+    models = models or find_models(df)
+    blocks = [(model, section) for model in models for section in sections]
+    columns = [c for model, section in blocks for c in probability_columns(model, section)]
+    values = df[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    return blocks, values.reshape(len(df), len(blocks), len(PROBABILITY_LABELS))
+
+
+def invalid_rows(probabilities, tolerance=DEFAULT_TOLERANCE):
+    """
+    n x blocks mask of complete quintuples that do not sum to 1 within the tolerance
+    """
+    totals = probabilities.sum(axis=2)
+    complete = ~np.isnan(totals)
+    return complete & (np.abs(totals - 1) > tolerance)
+
+
+def score_overall(df, weights=DEFAULT_WEIGHTS, models=None, sections=SECTIONS,
+                  tolerance=DEFAULT_TOLERANCE, strict=True):
+    """
+    Recompute the *_overall_sentiment columns for every model with one matrix product.
+    `weights` is a length-5 vector (very positive ... very negative). Incomplete
+    quintuples score NaN; quintuples that do not sum to 1 raise a ValueError when
+    strict, otherwise they score NaN as well.
+    """
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (len(PROBABILITY_LABELS),):
+        raise ValueError(f"Expected {len(PROBABILITY_LABELS)} weights, got shape {weights.shape}")
+
+    blocks, probabilities = probability_blocks(df, models, sections)
+    bad = invalid_rows(probabilities, tolerance)
+
+    if strict and bad.any():
+        problems = []
+        for b, (model, section) in enumerate(blocks):
+            rows = np.flatnonzero(bad[:, b])
+            if len(rows):
+                problems.append(f"{model}_{section}: rows {rows[:10].tolist()}")
+        raise ValueError("Probabilities do not sum to 1 for " + "; ".join(problems))
+
+    scores = probabilities @ weights
+    scores[bad] = np.nan
+
+    columns = [overall_column(model, section) for model, section in blocks]
+    return pd.DataFrame(scores, columns=columns, index=df.index)
+
+
+def score_weightings(df, weightings, models=None, sections=SECTIONS, tolerance=DEFAULT_TOLERANCE):
+    """
+    Score several alternative weightings at once. `weightings` maps a name to a
+    length-5 vector; the result has one column per (weighting, model, section).
+    """
+    names = list(weightings)
+    matrix = np.column_stack([np.asarray(weightings[name], dtype=float) for name in names])
+
+    blocks, probabilities = probability_blocks(df, models, sections)
+    scores = probabilities @ matrix
+    scores[invalid_rows(probabilities, tolerance)] = np.nan
+
+    columns = pd.MultiIndex.from_tuples(
+        [(name, model, section) for model, section in blocks for name in names],
+        names=['weighting', 'model', 'section'],
+    )
+    return pd.DataFrame(scores.reshape(len(df), -1), columns=columns, index=df.index)
+
+
+def rescore(df, weights=DEFAULT_WEIGHTS, models=None, tolerance=DEFAULT_TOLERANCE, strict=True):
+    """
+    Copy of the frame with its overall sentiment columns replaced by freshly computed scores
+    """
+    scores = score_overall(df, weights, models, tolerance=tolerance, strict=strict)
+    result = df.copy()
+    result[scores.columns] = scores
+    return result
+
+
+if __name__ == "__main__":
+    # Check the stored overall columns of every outlet file against the default weighting
+    for path in sorted(glob.glob(os.path.join('data', '*_data.csv'))):
+        df = pd.read_csv(path)
+        if not find_models(df):
+            continue
+
+        scores = score_overall(df, strict=False)
+        _, probabilities = probability_blocks(df)
+        stored = df[scores.columns].apply(pd.to_numeric, errors='coerce')
+        mismatched = ((scores - stored).abs() > 1e-6).sum().sum()
+
+        print(f"{path}: {invalid_rows(probabilities).sum()} invalid quintuples, "
+              f"{mismatched} stored scores differ from the recomputed ones")
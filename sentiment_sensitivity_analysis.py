@@ -1,13 +1,14 @@
 import pandas as pd
 import numpy as np
 from scipy import stats
+from data_loader import load_dataset
 
 def analyze_sentiment_sensitivity():
     """
     Analyze whether OpenAI sentiment is more sensitive to petrol or diesel price changes
     """
     # Read the CSV file
-    df = pd.read_csv('data/english_average_data.csv')
+    df = load_dataset('data/english_average_data.csv')
     
     print("=" * 60)
     print("OPENAI SENTIMENT SENSITIVITY TO FUEL PRICE CHANGES")
@@ -0,0 +1,234 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from data_loader import load_dataset
+from metrics_engine import FUEL_CHANGE_COLUMNS, MODELS, SECTIONS, sentiment_column
+
+DATASETS = {
+    'english': 'data/english_average_data.csv',
+    'urdu': 'data/urdu_average_data.csv',
+}
+
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_SEED = 2024
+
+# Resamples are drawn in fixed-size chunks, each from its own spawned seed, so the
+# results do not depend on how many workers the chunks are spread over
+CHUNK_SIZE = 1_000
+
+
+def correlation_inputs(df, models=MODELS, fuels=('petrol', 'diesel'), sections=SECTIONS, changed_only=False):
+    """
+    Stack every (model, fuel, section) pair of a dataset into n x pairs arrays of
+    fuel changes and sentiment, with a mask of the rows each pair may use. With
+    changed_only, rows where that fuel's price did not move are left out, as in
+    urdu_gemini_analysis.py.
+    """
+    labels = [(model, fuel, section) for model in models for fuel in fuels for section in sections]
+    x = np.column_stack([df[FUEL_CHANGE_COLUMNS[fuel]].to_numpy(dtype=float) for _, fuel, _ in labels])
+    y = np.column_stack([pd.to_numeric(df[sentiment_column(model, section)], errors='coerce').to_numpy(dtype=float)
+                         for model, _, section in labels])
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    if changed_only:
+        valid &= np.nan_to_num(x) != 0
+    return labels, x, y, valid
+
+
+def _weighted_corr(weights, x, y, valid):
+    """
+    Pearson r of every pair under each row of a resample-count matrix: weights is
+    B x n, x/y/valid are n x pairs, and the result is B x pairs
+    """
+    v = valid.astype(float)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+    n = weights @ v
+    sx, sy = weights @ x, weights @ y
+    sxx, syy, sxy = weights @ (x * x), weights @ (y * y), weights @ (x * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+
+
+def _bootstrap_chunk(x, y, valid, size, seed):
+    """
+    Bootstrap correlations for one chunk. The same resampled rows are used for every
+    pair, so differences between pairs can be bootstrapped from the result too.
+    """
+    rng = np.random.default_rng(seed)
+    n = x.shape[0]
+    indices = rng.integers(0, n, size=(size, n))
+    # Turn each row of indices into counts with one bincount over offset indices
+    offsets = indices + np.arange(size)[:, None] * n
+    weights = np.bincount(offsets.ravel(), minlength=size * n).reshape(size, n).astype(float)
+    return _weighted_corr(weights, x, y, valid)
+
+
+def _permutation_chunk(x, y, valid, size, seed):
+    """
+    Correlations of each pair after shuffling the sentiment against the price changes,
+    within the rows that pair can use
+    """
+    rng = np.random.default_rng(seed)
+    result = np.empty((size, x.shape[1]))
+    for p in range(x.shape[1]):
+        rows = valid[:, p]
+        xs, ys = x[rows, p], y[rows, p]
+        zx = (xs - xs.mean()) / np.sqrt(((xs - xs.mean()) ** 2).sum())
+        zy = (ys - ys.mean()) / np.sqrt(((ys - ys.mean()) ** 2).sum())
+        # One permutation per row of the index matrix
+        permutations = rng.permuted(np.tile(np.arange(len(ys)), (size, 1)), axis=1)
+        result[:, p] = zy[permutations] @ zx
+    return result
+
+
+def _run_chunk(task):
+    kind, x, y, valid, size, seed = task
+    chunk = _bootstrap_chunk if kind == 'bootstrap' else _permutation_chunk
+    return chunk(x, y, valid, size, seed)
+
+
+def _resample(kind, x, y, valid, n_resamples, seed, executor):
+    sizes = [CHUNK_SIZE] * (n_resamples // CHUNK_SIZE)
+    if n_resamples % CHUNK_SIZE:
+        sizes.append(n_resamples % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(kind, x, y, valid, size, s) for size, s in zip(sizes, seeds)]
+    chunks = executor.map(_run_chunk, tasks) if executor is not None else map(_run_chunk, tasks)
+    return np.vstack(list(chunks))
+
+
+def _observed_corr(x, y, valid):
+    return _weighted_corr(np.ones((1, x.shape[0])), x, y, valid)[0]
+
+
+def correlation_significance(datasets, models=MODELS, fuels=('petrol', 'diesel'), sections=SECTIONS,
+                             n_resamples=DEFAULT_RESAMPLES, seed=DEFAULT_SEED, confidence=0.95,
+                             changed_only=False, workers=None):
+    """
+    Bootstrap confidence intervals and permutation p-values for every
+    (dataset, model, fuel, section) correlation. `datasets` maps a name to a frame.
+    Returns (table, replicates): the table has one row per pair, and replicates
+    holds the bootstrap correlations of each dataset (B x pairs) for contrasts.
+    """
+    alpha = (1 - confidence) / 2
+    rows = []
+    replicates = {}
+    executor = ProcessPoolExecutor(workers) if workers and workers > 1 else None
+    try:
+        for d, (name, df) in enumerate(datasets.items()):
+            labels, x, y, valid = correlation_inputs(df, models, fuels, sections, changed_only)
+            observed = _observed_corr(x, y, valid)
+            boot = _resample('bootstrap', x, y, valid, n_resamples, [seed, d, 0], executor)
+            perm = _resample('permutation', x, y, valid, n_resamples, [seed, d, 1], executor)
+
+            low, high = np.nanquantile(boot, [alpha, 1 - alpha], axis=0)
+            # Two-sided, counting the observed arrangement as one of the permutations
+            extreme = (np.abs(perm) >= np.abs(observed) - 1e-12).sum(axis=0)
+            p_perm = (extreme + 1) / (n_resamples + 1)
+            n = valid.sum(axis=0)
+
+            for p, (model, fuel, section) in enumerate(labels):
+                t = observed[p] * np.sqrt((n[p] - 2) / (1 - observed[p] ** 2))
+                rows.append({
+                    'dataset': name,
+                    'model': model,
+                    'fuel': fuel,
+                    'section': section,
+                    'n': int(n[p]),
+                    'r': observed[p],
+                    'ci_low': low[p],
+                    'ci_high': high[p],
+                    'p_permutation': p_perm[p],
+                    'p_pearson': 2 * stats.t.sf(abs(t), n[p] - 2),
+                })
+            replicates[name] = (labels, boot)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    table = pd.DataFrame(rows).set_index(['dataset', 'model', 'fuel', 'section'])
+    return table, replicates
+
+
+def sensitivity_contrasts(table, replicates, confidence=0.95):
+    """
+    Uncertainty for the "more sensitive to" verdicts. Sensitivity is the mean |r| over
+    headline and text, as in metrics_engine.fuel_sensitivity. For each dataset and
+    model this bootstraps petrol minus diesel sensitivity, and for each dataset the
+    first model minus the second, averaged over fuels.
+    """
+    alpha = (1 - confidence) / 2
+    rows = []
+
+    def summarize(name, contrast, observed, replicated):
+        low, high = np.nanquantile(replicated, [alpha, 1 - alpha])
+        rows.append({
+            'dataset': name,
+            'contrast': contrast,
+            'difference': observed,
+            'ci_low': low,
+            'ci_high': high,
+            'share_positive': np.nanmean(replicated > 0),
+            'significant': not (low <= 0 <= high),
+        })
+
+    for name, (labels, boot) in replicates.items():
+        observed = table.xs(name, level='dataset')['r']
+        columns = {label: i for i, label in enumerate(labels)}
+        models = list(dict.fromkeys(label[0] for label in labels))
+        fuels = list(dict.fromkeys(label[1] for label in labels))
+        sections = list(dict.fromkeys(label[2] for label in labels))
+
+        def sensitivity(values, model, fuel_list):
+            picked = [values[columns[(model, fuel, section)]] for fuel in fuel_list for section in sections]
+            return np.mean(np.abs(picked), axis=0)
+
+        observed_values = np.array([observed.loc[label] for label in labels])
+        if len(fuels) == 2:
+            for model in models:
+                summarize(name, f'{model}: {fuels[0]} - {fuels[1]}',
+                          sensitivity(observed_values, model, fuels[:1]) - sensitivity(observed_values, model, fuels[1:]),
+                          sensitivity(boot.T, model, fuels[:1]) - sensitivity(boot.T, model, fuels[1:]))
+        if len(models) == 2:
+            summarize(name, f'{models[0]} - {models[1]}',
+                      sensitivity(observed_values, models[0], fuels) - sensitivity(observed_values, models[1], fuels),
+                      sensitivity(boot.T, models[0], fuels) - sensitivity(boot.T, models[1], fuels))
+
+    return pd.DataFrame(rows).set_index(['dataset', 'contrast'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bootstrap and permutation tests for the fuel-sensitivity correlations")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--workers', type=int, default=None, help="spread the resamples over a process pool")
+    parser.add_argument('--changed-only', action='store_true', help="only use rows where the fuel price moved")
+    args = parser.parse_args()
+
+    try:
+        datasets = {name: load_dataset(path) for name, path in DATASETS.items()}
+        start = time.perf_counter()
+        table, replicates = correlation_significance(datasets, n_resamples=args.resamples, seed=args.seed,
+                                                     changed_only=args.changed_only, workers=args.workers)
+        contrasts = sensitivity_contrasts(table, replicates)
+        elapsed = time.perf_counter() - start
+
+        pd.set_option('display.width', 120)
+        print("=" * 100)
+        print(f"CORRELATION SIGNIFICANCE ({args.resamples} bootstrap resamples and permutations, seed {args.seed})")
+        print("=" * 100)
+        print(table.round(4).to_string())
+        print()
+        print("SENSITIVITY CONTRASTS (mean |r| differences with 95% bootstrap intervals)")
+        print("-" * 100)
+        print(contrasts.round(4).to_string())
+        print(f"\nComputed in {elapsed:.2f}s")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,373 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from accumulators import Moments
+from aggregate_outlets import (AVERAGE_COLUMNS, CHUNK_SIZE, OUTLETS, PRICE_COLUMNS, _partial_sums, average_path,
+                               normalize_dates, outlet_path)
+from data_loader import load_dataset
+from metrics_engine import (FUEL_CHANGE_COLUMNS, MODELS, SECTIONS, _group_masks, _metrics_frame, compute_metrics,
+                            sentiment_column)
+
+
+class RunningSums:
+    """
+    Named float arrays summed chunk by chunk with Neumaier compensation, so the
+    totals do not drift with the number or size of the chunks. Two instances
+    merge by adding one's totals and compensations into the other.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.compensation = {}
+
+    def add(self, name, values):
+        values = np.asarray(values, dtype=float)
+        if name not in self.totals:
+            self.totals[name] = np.zeros_like(values)
+            self.compensation[name] = np.zeros_like(values)
+        total = self.totals[name]
+        new = total + values
+        # The low-order bits lost by the addition, whichever operand was smaller
+        self.compensation[name] += np.where(np.abs(total) >= np.abs(values),
+                                            (total - new) + values, (values - new) + total)
+        self.totals[name] = new
+
+    def merge(self, other):
+        for name in other.totals:
+            self.add(name, other.totals[name])
+            self.add(name, other.compensation[name])
+        return self
+
+    def __getitem__(self, name):
+        return self.totals[name] + self.compensation[name]
+
+
+# numpy sums a contiguous float array pairwise, in blocks of at most this many values
+PAIRWISE_BLOCK = 128
+
+
+def _pairwise_steps(n):
+    """
+    numpy's pairwise summation of n values as postorder steps: the size of the
+    next block to sum, or None to add the last two partial sums
+    """
+    if n <= PAIRWISE_BLOCK:
+        yield n
+        return
+    # Halved, but on a multiple of the 8-way unrolling
+    half = n // 2
+    half -= half % 8
+    yield from _pairwise_steps(half)
+    yield from _pairwise_steps(n - half)
+    yield None
+
+
+def _block_sum(block):
+    """
+    Column sums of one block the way numpy adds it up: eight interleaved
+    accumulators combined as a tree, then the rows left over one by one
+    """
+    n, width = block.shape
+    if n < 8:
+        total = np.full(width, -0.0)
+        for row in block:
+            total = total + row
+        return total
+    unrolled = n - n % 8
+    lanes = np.add.reduce(block[:unrolled].reshape(-1, 8, width), axis=0)
+    total = ((lanes[0] + lanes[1]) + (lanes[2] + lanes[3])) + ((lanes[4] + lanes[5]) + (lanes[6] + lanes[7]))
+    for row in block[unrolled:]:
+        total = total + row
+    return total
+
+
+class PairwiseSum:
+    """
+    Column sums of n rows fed in batches that equal np.sum over all of them at
+    once, bit for bit. The blocks numpy sums depend on n, so it has to be known
+    up front; only the unfinished block and one partial sum per tree level are
+    kept.
+    """
+
+    def __init__(self, n, width):
+        self.n = n
+        self.seen = 0
+        self.steps = _pairwise_steps(n)
+        self.step = next(self.steps)
+        self.pending = np.empty((0, width))
+        self.partials = []
+        self._advance()
+
+    def _advance(self):
+        while self.step != 'done':
+            if self.step is None:
+                right = self.partials.pop()
+                self.partials[-1] = self.partials[-1] + right
+            elif len(self.pending) >= self.step:
+                self.partials.append(_block_sum(self.pending[:self.step]))
+                self.pending = self.pending[self.step:]
+            else:
+                return
+            self.step = next(self.steps, 'done')
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values if values.ndim == 2 else values.reshape(-1, 1)
+        self.seen += len(values)
+        if self.seen > self.n:
+            raise ValueError(f"PairwiseSum expected {self.n} rows, got more")
+        self.pending = np.concatenate([self.pending, values])
+        self._advance()
+        return self
+
+    def total(self):
+        if self.seen != self.n:
+            raise ValueError(f"PairwiseSum expected {self.n} rows, got {self.seen}")
+        return self.partials[0]
+
+
+class MetricsAccumulator:
+    """
+    compute_metrics for one model, fed one chunk at a time. Each chunk adds its
+    group sizes and exception counts, folds its rows into the Moments of their
+    groups, and adds the sums of x, y, x², y² and xy behind the correlations,
+    so accumulators of different parts of a file merge into the result of the
+    whole. Given the group sizes of the whole input (group_sizes), the group
+    means are also summed in numpy's order, so they match compute_metrics bit
+    for bit; merged accumulators fall back on the Moments means.
+    """
+
+    def __init__(self, model, fuels=('petrol', 'diesel'), large_threshold=10, sizes=None):
+        self.model = model
+        self.fuels = tuple(fuels)
+        self.large_threshold = large_threshold
+        self.labels, self.change_index, _ = _group_masks(np.empty((0, len(fuels))), self.fuels, large_threshold)
+        width = len(SECTIONS) + len(self.fuels)
+        self.moments = [Moments(range(width)) for _ in self.labels]
+        self.pairwise = None if sizes is None else [PairwiseSum(int(n), width) for n in sizes]
+        self.sums = RunningSums()
+
+    def update(self, chunk):
+        changes = chunk[[FUEL_CHANGE_COLUMNS[fuel] for fuel in self.fuels]].to_numpy(dtype=float)
+        sentiment = chunk[[sentiment_column(self.model, s) for s in SECTIONS]].to_numpy(dtype=float)
+        _, _, masks = _group_masks(changes, self.fuels, self.large_threshold)
+
+        with np.errstate(invalid='ignore'):
+            exceptions = np.column_stack([sentiment[:, 0] <= sentiment[:, 1], sentiment[:, 1] <= sentiment[:, 0]])
+
+        values = np.column_stack([sentiment, changes])
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        for g, mask in enumerate(masks.T.astype(bool)):
+            self.moments[g].update(values[mask])
+            if self.pairwise is not None:
+                self.pairwise[g].add(filled[mask])
+
+        # Same pairwise-complete fuel x section layout as compute_metrics
+        pair_valid = valid[:, 2:, None] & valid[:, None, :2]
+        x = np.where(pair_valid, changes[:, :, None], 0.0).reshape(len(chunk), -1)
+        y = np.where(pair_valid, sentiment[:, None, :], 0.0).reshape(len(chunk), -1)
+
+        sums = self.sums
+        sums.add('size', masks.sum(axis=0))
+        sums.add('exceptions', masks.T @ exceptions)
+        sums.add('pair_n', masks.T @ pair_valid.reshape(len(chunk), -1))
+        sums.add('sx', masks.T @ x)
+        sums.add('sy', masks.T @ y)
+        sums.add('sxx', masks.T @ (x * x))
+        sums.add('syy', masks.T @ (y * y))
+        sums.add('sxy', masks.T @ (x * y))
+        return self
+
+    def merge(self, other):
+        for moments, other_moments in zip(self.moments, other.moments):
+            moments.merge(other_moments)
+        self.sums.merge(other.sums)
+        # Rows from two inputs have no single summation order to reproduce
+        self.pairwise = None
+        return self
+
+    def result(self):
+        """
+        The compute_metrics frame of every row seen so far
+        """
+        sums = self.sums
+        if not sums.totals:
+            self.update(pd.DataFrame(columns=[FUEL_CHANGE_COLUMNS[f] for f in self.fuels]
+                                     + [sentiment_column(self.model, s) for s in SECTIONS]))
+
+        counts = np.array([moments.n for moments in self.moments])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if self.pairwise is not None:
+                means = np.array([pairwise.total() for pairwise in self.pairwise]) / counts
+            else:
+                means = np.where(counts > 0, [moments.mean for moments in self.moments], np.nan)
+            variances = np.array([moments.m2 for moments in self.moments]) / (counts - 1)
+            n, sx, sy = sums['pair_n'], sums['sx'], sums['sy']
+            corr = (n * sums['sxy'] - sx * sy) / np.sqrt((n * sums['sxx'] - sx * sx) * (n * sums['syy'] - sy * sy))
+        corr = corr.reshape(len(self.labels), len(self.fuels), 2)
+
+        exceptions = np.round(sums['exceptions'])
+        return _metrics_frame(self.model, self.labels, self.change_index, np.round(sums['size']),
+                              means, variances, exceptions, corr)
+
+
+def date_prices(path, chunk_rows=CHUNK_SIZE):
+    """
+    Per-date sums and counts of the petrol and HSD prices of an outlet file. One
+    streaming pass whose memory only grows with the number of dates; tables of
+    different rows add up with `add(..., fill_value=0)`.
+    """
+    totals = None
+    reader = pd.read_csv(path, usecols=['date'] + PRICE_COLUMNS + AVERAGE_COLUMNS, chunksize=chunk_rows)
+    for chunk in reader:
+        partial = _partial_sums(chunk)
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+    return totals[PRICE_COLUMNS + [c + '_count' for c in PRICE_COLUMNS]]
+
+
+def price_changes(prices):
+    """
+    Change of the mean petrol and HSD price of each date of a date_prices table
+    from the previous date, rounded as the average files carry them
+    """
+    means = prices[PRICE_COLUMNS] / prices[[c + '_count' for c in PRICE_COLUMNS]].to_numpy()
+    means = means.sort_index()
+    # The sums depend on how the rows were chunked; rounding keeps equal prices
+    # from showing up as changes of a few ulps
+    return pd.DataFrame({
+        'petrol_change': means['petrol'].diff().round(3),
+        'diesel_change': means['hsd'].diff().round(3),
+    })
+
+
+def date_changes(path, chunk_rows=CHUNK_SIZE):
+    """
+    Per-date price changes of an outlet file, see date_prices and price_changes
+    """
+    return price_changes(date_prices(path, chunk_rows))
+
+
+def attach_changes(chunk, changes, models=MODELS):
+    """
+    Outlet rows with numeric sentiment and the change columns of their dates
+    looked up in a price_changes table
+    """
+    sentiment = [sentiment_column(m, s) for m in models for s in SECTIONS]
+    chunk = chunk.assign(**{c: pd.to_numeric(chunk[c], errors='coerce') for c in sentiment})
+    found = changes.reindex(normalize_dates(chunk['date'].astype(str)))
+    return chunk.assign(**{c: found[c].to_numpy() for c in changes.columns})
+
+
+def read_chunks(path, models=MODELS, chunk_rows=CHUNK_SIZE, changes=None):
+    """
+    The date, fuel change and sentiment columns of a data file, `chunk_rows`
+    rows at a time. Outlet files carry no change columns; theirs are looked up
+    in `changes`, or in date_changes, which costs one extra pass over the dates
+    and prices.
+    """
+    sentiment = [sentiment_column(m, s) for m in models for s in SECTIONS]
+    change_columns = list(FUEL_CHANGE_COLUMNS.values())
+    header = pd.read_csv(path, nrows=0).columns
+
+    if changes is None and set(change_columns) <= set(header):
+        for chunk in pd.read_csv(path, usecols=['date'] + change_columns + sentiment, chunksize=chunk_rows):
+            chunk[sentiment] = chunk[sentiment].apply(pd.to_numeric, errors='coerce')
+            yield chunk
+        return
+
+    changes = date_changes(path, chunk_rows) if changes is None else changes
+    for chunk in pd.read_csv(path, usecols=['date'] + sentiment, chunksize=chunk_rows):
+        yield attach_changes(chunk, changes, models)
+
+
+def group_sizes(path, fuels=('petrol', 'diesel'), large_threshold=10, chunk_rows=CHUNK_SIZE, changes=None):
+    """
+    Rows in each compute_metrics group of a data file, from its dates and
+    change columns alone
+    """
+    sizes = 0
+    for chunk in read_chunks(path, (), chunk_rows, changes):
+        _, _, masks = _group_masks(chunk[[FUEL_CHANGE_COLUMNS[fuel] for fuel in fuels]].to_numpy(dtype=float),
+                                   tuple(fuels), large_threshold)
+        sizes = sizes + masks.sum(axis=0)
+    return sizes
+
+
+def stream_metrics(path, models=MODELS, fuels=('petrol', 'diesel'), large_threshold=10, chunk_rows=CHUNK_SIZE):
+    """
+    compute_metrics of every model over a data file read in chunks, as a dict
+    of model -> frame, with the same means as the in-memory result. A first
+    pass over the dates and changes sizes the groups; then each chunk is read
+    once for all models.
+    """
+    changes = None
+    if not set(FUEL_CHANGE_COLUMNS.values()) <= set(pd.read_csv(path, nrows=0).columns):
+        changes = date_changes(path, chunk_rows)
+    sizes = group_sizes(path, fuels, large_threshold, chunk_rows, changes)
+    accumulators = {model: MetricsAccumulator(model, fuels, large_threshold, sizes) for model in models}
+    for chunk in read_chunks(path, models, chunk_rows, changes):
+        for accumulator in accumulators.values():
+            accumulator.update(chunk)
+    return {model: accumulator.result() for model, accumulator in accumulators.items()}
+
+
+def dataset_metrics(path, model, large_threshold=10, chunk_rows=None):
+    """
+    compute_metrics of one data file, loaded whole, or streamed when `chunk_rows` is given
+    """
+    if chunk_rows is None:
+        return compute_metrics(load_dataset(path), model, large_threshold=large_threshold)
+    return stream_metrics(path, [model], large_threshold=large_threshold, chunk_rows=chunk_rows)[model]
+
+
+def first_rows(path, condition, n=1, chunk_rows=None):
+    """
+    The first `n` rows of a data file where `condition(frame)` holds, reading
+    chunks only until they are found when `chunk_rows` is given
+    """
+    if chunk_rows is None:
+        df = load_dataset(path)
+        return df[condition(df)].head(n)
+
+    found = []
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        found.append(chunk[condition(chunk)].head(n - sum(len(f) for f in found)))
+        if sum(len(f) for f in found) >= n:
+            break
+    return pd.concat(found) if found else pd.DataFrame()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare streamed and in-memory metrics of the data files")
+    parser.add_argument('paths', nargs='*', help="defaults to the average files and every outlet file")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    try:
+        paths = args.paths or ([average_path(language) for language in OUTLETS]
+                               + [outlet_path(o) for outlets in OUTLETS.values() for o in outlets])
+        for path in paths:
+            start = time.perf_counter()
+            streamed = stream_metrics(path, chunk_rows=args.chunk_rows)
+            elapsed = time.perf_counter() - start
+            if 'average' in path:
+                df = load_dataset(path)
+                reference = {model: compute_metrics(df, model) for model in MODELS}
+            else:
+                # The in-memory equivalent: join every row to its date's change
+                df = pd.concat(read_chunks(path, chunk_rows=10**9))
+                reference = {model: compute_metrics(df, model) for model in MODELS}
+            worst = max(
+                float(np.nanmax(np.abs(streamed[m].select_dtypes('number').to_numpy(dtype=float)
+                                       - reference[m].select_dtypes('number').to_numpy(dtype=float))))
+                for m in MODELS)
+            rows = streamed[MODELS[0]]['count'].iloc[0]
+            print(f"{path}: {rows} rows in {elapsed:.2f}s, largest difference from in-memory {worst:.2e}")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
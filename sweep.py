@@ -0,0 +1,199 @@
+import argparse
+import functools
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from aggregate_outlets import OUTLETS, average_path
+from data_loader import load_dataset
+from event_windows import event_pairs, parse_dates
+from metrics_engine import FUEL_CHANGE_COLUMNS, MODELS, compute_metrics, melt_fuel_changes, sentiment_column
+
+# The values the scripts hard-code, used for any parameter the grid leaves out
+DEFAULTS = {
+    'language': list(OUTLETS),
+    'model': list(MODELS),
+    'large_threshold': [10],
+    'hike_threshold': [20],
+    'cut_threshold': [30],
+    'window_months': [2],
+    'increase_band': [(10, 20)],
+    'decrease_band': [(15, 25)],
+}
+
+# Loaded once in the parent before the pool starts; forked workers read the
+# same pages instead of loading or receiving their own copy
+_SHARED = {}
+
+
+def load_shared(data_dir='data', languages=tuple(OUTLETS)):
+    """
+    Every language's average frame, parsed dates and per-fuel long table
+    """
+    shared = {}
+    for language in languages:
+        df = load_dataset(average_path(language, data_dir))
+        shared[language] = {
+            'df': df,
+            'dates': parse_dates(df),
+            'long': melt_fuel_changes(df, models=MODELS, fuels=tuple(FUEL_CHANGE_COLUMNS)),
+        }
+    return shared
+
+
+def expand_grid(grid):
+    """
+    Every combination of the grid's values, as a list of parameter dicts
+    """
+    grid = dict(DEFAULTS, **grid)
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+# Each statistic only depends on a few of the parameters, so within a process
+# it is computed once per distinct combination of those and reused across points
+
+@functools.lru_cache(maxsize=None)
+def _large_changes(language, model, large_threshold):
+    """
+    Large-change groups of urdu_detailed_analysis / gemini_sensitivity_extract
+    """
+    metrics = compute_metrics(_SHARED[language]['df'], model, large_threshold=large_threshold)
+    result = {}
+    for fuel in FUEL_CHANGE_COLUMNS:
+        for group in ('large_increase', 'large_decrease'):
+            row = metrics.loc[(fuel, group)]
+            result[f'{fuel}_{group}s'] = int(row['count'])
+            result[f'{fuel}_{group}_headline'] = row['headline_mean']
+            result[f'{fuel}_{group}_text'] = row['text_mean']
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def _events(language, model, hike_threshold, cut_threshold, window_months):
+    """
+    Hike/cut pairs of contextual_statistics
+    """
+    data = _SHARED[language]
+    headline, text = sentiment_column(model, 'headline'), sentiment_column(model, 'text')
+    window = (pd.DateOffset(months=1), pd.DateOffset(months=window_months))
+    pairs = event_pairs(data['df'], 'petrol', hike_threshold, cut_threshold, window,
+                        columns=[headline, text], dates=data['dates'])
+    return {
+        'event_pairs': len(pairs),
+        'event_hikes_followed': int(pairs['hike_row'].nunique()),
+        'event_headline_swing': (pairs['cut_' + headline] - pairs['hike_' + headline]).mean(),
+        'event_text_swing': (pairs['cut_' + text] - pairs['hike_' + text]).mean(),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _bands(language, model, increase_band, decrease_band):
+    """
+    Price bands of urdu_gemini_section_stats, both ends exclusive as there
+    """
+    long = _SHARED[language]['long']
+    long = long[long['model'] == model]
+    change = long['price_change'].to_numpy()
+    result = {}
+    for name, (low, high), sign in [('increase', increase_band, 1), ('decrease', decrease_band, -1)]:
+        in_band = (sign * change > low) & (sign * change < high)
+        result[f'band_{name}s'] = int(in_band.sum())
+        result[f'band_{name}_headline'] = long['headline_sentiment'][in_band].mean()
+        result[f'band_{name}_text'] = long['text_sentiment'][in_band].mean()
+    return result
+
+
+def evaluate(point):
+    """
+    The statistics the scripts report, for one parameter combination
+    """
+    language, model = point['language'], point['model']
+    result = dict(point)
+    result.update(_large_changes(language, model, point['large_threshold']))
+    result.update(_events(language, model, point['hike_threshold'], point['cut_threshold'], point['window_months']))
+    result.update(_bands(language, model, tuple(point['increase_band']), tuple(point['decrease_band'])))
+    return result
+
+
+def _evaluate_chunk(points):
+    return [evaluate(point) for point in points]
+
+
+def _init_worker(data_dir, languages):
+    # Only used where fork is unavailable: each worker loads the data once
+    _SHARED.update(load_shared(data_dir, languages))
+
+
+def run_sweep(grid, data_dir='data', workers=None, chunk_size=None):
+    """
+    Evaluate every combination of `grid` (parameter -> list of values; missing
+    parameters take the scripts' values) over a process pool and return one
+    row per combination
+    """
+    points = expand_grid(grid)
+    languages = tuple(sorted({p['language'] for p in points}))
+    _SHARED.clear()
+    _SHARED.update(load_shared(data_dir, languages))
+    for cached in (_large_changes, _events, _bands):
+        cached.cache_clear()
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(points) == 1:
+        return pd.DataFrame([evaluate(point) for point in points])
+
+    # A few chunks per worker keeps the pool busy without paying per-point IPC
+    chunk_size = chunk_size or max(1, len(points) // (workers * 4))
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+    if 'fork' in multiprocessing.get_all_start_methods():
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data_dir, languages))
+    with executor:
+        results = [row for chunk in executor.map(_evaluate_chunk, chunks) for row in chunk]
+    return pd.DataFrame(results)
+
+
+def _band(text):
+    low, high = (float(v) for v in text.split('-'))
+    return (low, high)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the hard-coded thresholds, windows and bands")
+    parser.add_argument('--languages', nargs='+', choices=list(OUTLETS), default=DEFAULTS['language'])
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=DEFAULTS['model'])
+    parser.add_argument('--large-thresholds', type=float, nargs='+', default=DEFAULTS['large_threshold'])
+    parser.add_argument('--hike-thresholds', type=float, nargs='+', default=DEFAULTS['hike_threshold'])
+    parser.add_argument('--cut-thresholds', type=float, nargs='+', default=DEFAULTS['cut_threshold'])
+    parser.add_argument('--window-months', type=int, nargs='+', default=DEFAULTS['window_months'])
+    parser.add_argument('--increase-bands', type=_band, nargs='+', default=DEFAULTS['increase_band'],
+                        help="exclusive PKR ranges such as 10-20")
+    parser.add_argument('--decrease-bands', type=_band, nargs='+', default=DEFAULTS['decrease_band'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    try:
+        grid = {
+            'language': args.languages,
+            'model': args.models,
+            'large_threshold': args.large_thresholds,
+            'hike_threshold': args.hike_thresholds,
+            'cut_threshold': args.cut_thresholds,
+            'window_months': args.window_months,
+            'increase_band': args.increase_bands,
+            'decrease_band': args.decrease_bands,
+        }
+        start = time.perf_counter()
+        results = run_sweep(grid, workers=args.workers)
+        results.to_csv(args.output, index=False)
+        print(f"{len(results)} combinations in {time.perf_counter() - start:.2f}s -> {args.output}")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
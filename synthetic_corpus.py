@@ -0,0 +1,283 @@
+import argparse
+import base64
+import functools
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aggregate_outlets import OUTLETS, outlet_path
+from metrics_engine import MODELS
+from sentiment_scoring import DEFAULT_WEIGHTS, SECTIONS, overall_column, probability_columns
+
+CHUNK_ROWS = 20_000
+
+# Columns of the shipped outlet files, after the unnamed index column; each
+# outlet orders them differently (see outlet_columns)
+COLUMNS = (['date', 'link', 'inner_html', 'word_count', 'petrol', 'hsd', 'headline']
+           + [c for model in MODELS for section in SECTIONS for c in probability_columns(model, section)]
+           + [overall_column(model, section) for model in reversed(MODELS) for section in SECTIONS])
+
+# Link patterns of each outlet's e-paper and the script its articles are written in
+# (Express is the Urdu daily, although it is averaged with the English outlets)
+OUTLET_STYLES = {
+    'tribune': ('en', 'https://tribune.com.pk/epaper/news/Karachi/{date}/{token}'),
+    'brecorder': ('en', 'https://epaper.brecorder.com/{year}/{month}/{day}/1-page/{id}-news.html'),
+    'nation': ('en', 'https://www.nation.com.pk/E-Paper/karachi/{date}/page-8/detail-{n}'),
+    'express': ('ur', 'https://www.express.com.pk/epaper/PoPupwindow.aspx?newsID={id}&Issue=NP_LHE&Date={compact}'),
+    'daily_jang': ('ur', 'https://e.jang.com.pk/detail/{id}'),
+    'daily_dunya': ('ur', 'https://e.dunya.com.pk/detail.php?date={date}&edition=KCH&id={id}_{id2}'),
+    'daily_pakistan': ('ur', 'https://dailypakistan.com.pk/E-Paper/lahore/{date}/page-1/detail-{n}'),
+    'nawai_waqt': ('ur', 'https://www.nawaiwaqt.com.pk/E-Paper/lahore/{date}/page-1/detail-{n}'),
+}
+
+# Fortnightly notification dates of the shipped corpus
+DEFAULT_START = '2021-01-01'
+DEFAULT_END = '2024-12-16'
+
+
+def notification_dates(start=DEFAULT_START, end=DEFAULT_END):
+    """
+    The 1st and 16th of every month between start and end, newest first like the outlet files
+    """
+    months = pd.date_range(pd.Timestamp(start).replace(day=1), end, freq='MS')
+    dates = months.append(months + pd.Timedelta(days=15)).sort_values()
+    dates = dates[(dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+    return dates[::-1]
+
+
+def price_steps(n_dates, seed=0, petrol_start=108.56, hsd_start=110.76):
+    """
+    Petrol and HSD prices for each notification date, oldest first: mostly small
+    revisions or none, with occasional hikes and cuts of 20-40 PKR
+    """
+    rng = np.random.default_rng([seed, 0])
+    changes = np.where(rng.random(n_dates) < 0.3, 0.0, rng.normal(0, 6, n_dates))
+    shocks = rng.random(n_dates) < 0.08
+    changes[shocks] = rng.choice([-1, 1], shocks.sum(), p=[0.4, 0.6]) * rng.uniform(20, 40, shocks.sum())
+    changes[0] = 0
+    petrol = np.maximum(petrol_start + np.cumsum(changes), 50).round(2)
+    spread = np.cumsum(rng.normal(0, 1.5, n_dates)) + (hsd_start - petrol_start)
+    hsd = np.maximum(petrol + spread, 50).round(2)
+    return petrol, hsd
+
+
+@functools.lru_cache(maxsize=None)
+def outlet_columns(outlet, data_dir='data'):
+    """
+    The columns of an outlet in the order of its shipped file's header
+    """
+    header = list(pd.read_csv(outlet_path(outlet, data_dir), nrows=0).columns[1:])
+    if sorted(header) != sorted(COLUMNS):
+        raise ValueError(f"{outlet}: shipped columns differ from the generated ones: "
+                         f"{sorted(set(header) ^ set(COLUMNS))}")
+    return header
+
+
+@functools.lru_cache(maxsize=None)
+def _text_source(script, data_dir='data'):
+    """
+    Running text to cut articles and headlines from, built from the shipped
+    articles written in the same script, and the offsets where its words start
+    """
+    frames = [pd.read_csv(outlet_path(outlet, data_dir), usecols=['inner_html', 'headline'])
+              for outlet, (s, _) in OUTLET_STYLES.items() if s == script]
+    texts = pd.concat(frames)
+    rng = np.random.default_rng(len(texts))
+
+    sources = {}
+    for column in ('inner_html', 'headline'):
+        words = re.findall(r'\S+\s*', ''.join(texts[column].dropna().astype(str) + ' '))
+        # Shuffle whole articles' worth of words a few times over so cuts vary
+        order = np.concatenate([rng.permutation(len(words)) for _ in range(4)])
+        text = ''.join(words[i] for i in order)
+        starts = np.array([0] + [m.end() for m in re.finditer(r'\s+(?=\S)', text)], dtype=np.int64)
+        sources[column] = (text, starts)
+    return sources
+
+
+def _cut_texts(source, n_words, rng):
+    """
+    One text per requested word count, cut from the source at word boundaries
+    """
+    text, starts = source
+    n_words = np.minimum(n_words, len(starts) - 1)
+    first = (rng.random(len(n_words)) * (len(starts) - n_words)).astype(np.int64)
+    last = first + n_words
+    ends = np.where(last < len(starts), starts[np.minimum(last, len(starts) - 1)], len(text))
+    return [text[a:b].rstrip() for a, b in zip(starts[first], ends)]
+
+
+def _probabilities(latent, rng):
+    """
+    Quintuples of probabilities (most positive first) around a latent sentiment,
+    rounded to two decimals like the models report them and summing to exactly 1
+    """
+    centres = DEFAULT_WEIGHTS[None, :]
+    logits = -(centres - latent[:, None]) ** 2 / 0.8 + rng.gumbel(0, 0.4, (len(latent), len(centres[0])))
+    probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    rounded = np.round(probabilities, 2)
+    # Put the rounding remainder on the most likely label
+    top = rounded.argmax(axis=1)
+    rounded[np.arange(len(rounded)), top] += np.round(1 - rounded.sum(axis=1), 2)
+    return np.round(rounded, 2)
+
+
+def generate_chunk(outlet, first_row, n_rows, total_rows, calendar, seed=0, data_dir='data'):
+    """
+    Rows first_row .. first_row + n_rows of a synthetic outlet file as a frame in
+    the outlet's shipped schema and column order. `calendar` holds the dates
+    (newest first) with their petrol/hsd prices and changes; rows are spread
+    evenly over it. Each chunk only depends on its own seed, so chunks can be
+    generated in any order.
+    """
+    rng = np.random.default_rng([seed, list(OUTLET_STYLES).index(outlet), first_row])
+    script, link_pattern = OUTLET_STYLES[outlet]
+    rows = np.arange(first_row, first_row + n_rows)
+    date_index = rows * len(calendar['date']) // total_rows
+
+    dates = calendar['date'][date_index]
+    petrol, hsd = calendar['petrol'][date_index], calendar['hsd'][date_index]
+    change = calendar['petrol_change'][date_index]
+
+    sources = _text_source(script, data_dir)
+    median_words = 300 if script == 'en' else 200
+    words = np.maximum(np.round(rng.lognormal(np.log(median_words), 0.6, n_rows)), 20).astype(np.int64)
+    headline_words = rng.integers(4, 14, n_rows)
+
+    link_fields = {'n': rng.integers(1, 20, n_rows), 'id': rng.integers(10**6, 10**10, n_rows),
+                   'id2': rng.integers(10**7, 10**8, n_rows)}
+    image_ids = rng.integers(0, 2**63, (n_rows, 2))
+    links = []
+    for i, date in enumerate(dates):
+        fields = {key: values[i] for key, values in link_fields.items()}
+        if '{token}' in link_pattern:
+            image = f'{image_ids[i, 0]:016x}{image_ids[i, 1]:016x}.jpeg'
+            fields['token'] = base64.b64encode(image.encode()).decode().rstrip('=')
+        links.append(link_pattern.format(date=date, year=date[:4], month=date[5:7], day=date[8:],
+                                         compact=date.replace('-', ''), **fields))
+
+    data = {
+        'date': dates,
+        'link': links,
+        'inner_html': _cut_texts(sources['inner_html'], words, rng),
+        'word_count': words.astype(float),
+        'petrol': petrol,
+        'hsd': hsd,
+        'headline': _cut_texts(sources['headline'], headline_words, rng),
+    }
+
+    # Coverage turns negative after hikes and positive after cuts, with outlet
+    # and article noise, and each model and section reads it a little differently
+    tone = np.clip(-np.nan_to_num(change) / 12 + rng.normal(0, 0.5, n_rows), -2, 2)
+    overall = {}
+    for model in MODELS:
+        for section in SECTIONS:
+            latent = np.clip(tone + rng.normal(0, 0.3, n_rows), -2, 2)
+            probabilities = _probabilities(latent, rng)
+            for k, column in enumerate(probability_columns(model, section)):
+                data[column] = probabilities[:, k]
+            overall[overall_column(model, section)] = probabilities @ DEFAULT_WEIGHTS
+    data.update(overall)
+
+    return pd.DataFrame(data, index=rows)[outlet_columns(outlet, data_dir)]
+
+
+def _chunk_csv(task):
+    outlet, first_row, n_rows, total_rows, calendar, seed, data_dir = task
+    df = generate_chunk(outlet, first_row, n_rows, total_rows, calendar, seed, data_dir)
+    return df.to_csv(header=first_row == 0)
+
+
+def make_calendar(start=DEFAULT_START, end=DEFAULT_END, seed=0):
+    """
+    Notification dates (newest first) with their prices and petrol changes
+    """
+    dates = notification_dates(start, end)
+    petrol, hsd = price_steps(len(dates), seed)
+    change = np.concatenate([[np.nan], np.diff(petrol)])
+    # price_steps runs oldest first; the files list the newest date first
+    return {
+        'date': np.array(dates.strftime('%Y-%m-%d')),
+        'petrol': petrol[::-1],
+        'hsd': hsd[::-1],
+        'petrol_change': change[::-1],
+    }
+
+
+def generate_corpus(rows, output_dir, outlets=None, workers=None, chunk_rows=CHUNK_ROWS, seed=0,
+                    start=DEFAULT_START, end=DEFAULT_END, data_dir='data'):
+    """
+    Write <output_dir>/<outlet>_data.csv for every outlet with `rows` rows each.
+    Chunks are generated over a process pool and appended in order as they
+    finish; at most two chunks per worker are in flight, so memory stays flat
+    however many rows are written. Returns the written paths.
+    """
+    outlets = outlets or [o for group in OUTLETS.values() for o in group]
+    os.makedirs(output_dir, exist_ok=True)
+    calendar = make_calendar(start, end, seed)
+    # Build the text sources before forking so workers share them
+    for script in {OUTLET_STYLES[o][0] for o in outlets}:
+        _text_source(script, data_dir)
+
+    tasks = [(outlet, first, min(chunk_rows, rows - first), rows, calendar, seed, data_dir)
+             for outlet in outlets for first in range(0, rows, chunk_rows)]
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+
+    paths = {outlet: outlet_path(outlet, output_dir) for outlet in outlets}
+    handles = {}
+    pending = deque()
+    try:
+        for outlet, path in paths.items():
+            handles[outlet] = open(path + '.tmp', 'w', encoding='utf-8', newline='')
+        for task in tasks:
+            if executor is None:
+                handles[task[0]].write(_chunk_csv(task))
+                continue
+            pending.append((task[0], executor.submit(_chunk_csv, task)))
+            while len(pending) >= 2 * workers:
+                outlet, future = pending.popleft()
+                handles[outlet].write(future.result())
+        while pending:
+            outlet, future = pending.popleft()
+            handles[outlet].write(future.result())
+    finally:
+        for handle in handles.values():
+            handle.close()
+        if executor is not None:
+            executor.shutdown()
+
+    for outlet, path in paths.items():
+        os.replace(path + '.tmp', path)
+    return list(paths.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic outlet files in the shipped schema")
+    parser.add_argument('rows', type=int, help="rows per outlet")
+    parser.add_argument('--output-dir', default='synthetic_data')
+    parser.add_argument('--outlets', nargs='+', choices=list(OUTLET_STYLES))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default=DEFAULT_START)
+    parser.add_argument('--end', default=DEFAULT_END)
+    args = parser.parse_args()
+
+    try:
+        begin = time.perf_counter()
+        paths = generate_corpus(args.rows, args.output_dir, args.outlets, args.workers, args.chunk_rows,
+                                args.seed, args.start, args.end)
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"Wrote {len(paths)} files, {args.rows:,} rows each, {size / 1e6:,.1f} MB "
+              f"in {time.perf_counter() - begin:.1f}s -> {args.output_dir}/")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
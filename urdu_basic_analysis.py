@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
+from data_loader import load_dataset
 
 # Read the Urdu CSV file
-df = pd.read_csv('data/urdu_average_data.csv')
+df = load_dataset('data/urdu_average_data.csv')
 
 print("URDU ARTICLES - BASIC SENTIMENT AVERAGES")
 print("=" * 50)
@@ -2,10 +2,11 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 import warnings
+from data_loader import load_dataset
 warnings.filterwarnings('ignore')
 
 # Load the Urdu data
-df = pd.read_csv('data/urdu_average_data.csv')
+df = load_dataset('data/urdu_average_data.csv')
 
 print("=== URDU GEMINI SENTIMENT ANALYSIS ===")
 print("=" * 50)
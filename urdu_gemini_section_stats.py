@@ -2,39 +2,18 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 import warnings
+from data_loader import load_dataset
+from metrics_engine import fuel_change_metrics, melt_fuel_changes
 warnings.filterwarnings('ignore')
 
 # Load the Urdu data
-df = pd.read_csv('data/urdu_average_data.csv')
+df = load_dataset('data/urdu_average_data.csv')
 
 print("=== URDU GEMINI SECTION STATISTICS ===")
 print("=" * 50)
 
-# Filter out rows where price changes are NaN or 0
-df_filtered = df.dropna(subset=['petrol_change', 'diesel_change'])
-df_changes = df_filtered[(df_filtered['petrol_change'] != 0) | (df_filtered['diesel_change'] != 0)]
-
-# Combined fuel price changes (petrol and diesel together)
-combined_data = []
-for _, row in df_changes.iterrows():
-    if row['petrol_change'] != 0:
-        combined_data.append({
-            'fuel_type': 'petrol',
-            'price_change': row['petrol_change'],
-            'headline_sentiment': row['gemini_headline_overall_sentiment'],
-            'text_sentiment': row['gemini_text_overall_sentiment'],
-            'date': row['date']
-        })
-    if row['diesel_change'] != 0:
-        combined_data.append({
-            'fuel_type': 'diesel', 
-            'price_change': row['diesel_change'],
-            'headline_sentiment': row['gemini_headline_overall_sentiment'],
-            'text_sentiment': row['gemini_text_overall_sentiment'],
-            'date': row['date']
-        })
-
-combined_df = pd.DataFrame(combined_data)
+# One row per fuel whose price moved, on dates where both changes are known
+combined_df = melt_fuel_changes(df, models=['gemini'])
 
 # 1. HEADLINE vs BODY TEXT POLARITY DURING PRICE DROPS AND HIKES
 print("1. HEADLINE vs BODY TEXT POLARITY")
@@ -88,75 +67,23 @@ if len(price_decreases_18) > 0:
 print("\n3. SENTIMENT RESPONSE TABLE DATA")
 print("-" * 35)
 
-def calculate_sentiment_metrics(data, fuel_type):
-    fuel_data = data[data['fuel_type'] == fuel_type]
-    
-    increases = fuel_data[fuel_data['price_change'] > 0]
-    decreases = fuel_data[fuel_data['price_change'] < 0]
-    large_increases = fuel_data[fuel_data['price_change'] >= 10]
-    large_decreases = fuel_data[fuel_data['price_change'] <= -10]
-    
-    metrics = {}
-    
-    # Sentiment per unit change (correlation-based approach)
-    if len(increases) > 0:
-        # Calculate average sentiment per PKR increase
-        metrics['sentiment_per_unit_increase_headline'] = increases['headline_sentiment'].sum() / increases['price_change'].sum()
-        metrics['sentiment_per_unit_increase_text'] = increases['text_sentiment'].sum() / increases['price_change'].sum()
-    
-    if len(decreases) > 0:
-        # Calculate average sentiment per PKR decrease (absolute values)
-        metrics['sentiment_per_unit_decrease_headline'] = decreases['headline_sentiment'].sum() / abs(decreases['price_change'].sum())
-        metrics['sentiment_per_unit_decrease_text'] = decreases['text_sentiment'].sum() / abs(decreases['price_change'].sum())
-    
-    # Average sentiment for large changes
-    if len(large_increases) > 0:
-        metrics['avg_sentiment_large_increase_headline'] = large_increases['headline_sentiment'].mean()
-        metrics['avg_sentiment_large_increase_text'] = large_increases['text_sentiment'].mean()
-    
-    if len(large_decreases) > 0:
-        metrics['avg_sentiment_large_decrease_headline'] = large_decreases['headline_sentiment'].mean()
-        metrics['avg_sentiment_large_decrease_text'] = large_decreases['text_sentiment'].mean()
-    
-    return metrics, len(increases), len(decreases), len(large_increases), len(large_decreases)
-
-# Calculate for petrol
-petrol_metrics, petrol_inc, petrol_dec, petrol_large_inc, petrol_large_dec = calculate_sentiment_metrics(combined_df, 'petrol')
-
-print("PETROL:")
-print(f"  Price increases: {petrol_inc}, decreases: {petrol_dec}")
-print(f"  Large increases (>=10 PKR): {petrol_large_inc}, large decreases (<=10 PKR): {petrol_large_dec}")
-if 'sentiment_per_unit_increase_headline' in petrol_metrics:
-    print(f"  Sentiment per unit increase - Headlines: {petrol_metrics['sentiment_per_unit_increase_headline']:.3f}")
-    print(f"  Sentiment per unit increase - Text: {petrol_metrics['sentiment_per_unit_increase_text']:.3f}")
-if 'sentiment_per_unit_decrease_headline' in petrol_metrics:
-    print(f"  Sentiment per unit decrease - Headlines: {petrol_metrics['sentiment_per_unit_decrease_headline']:.3f}")
-    print(f"  Sentiment per unit decrease - Text: {petrol_metrics['sentiment_per_unit_decrease_text']:.3f}")
-if 'avg_sentiment_large_increase_headline' in petrol_metrics:
-    print(f"  Average sentiment per large increase - Headlines: {petrol_metrics['avg_sentiment_large_increase_headline']:.3f}")
-    print(f"  Average sentiment per large increase - Text: {petrol_metrics['avg_sentiment_large_increase_text']:.3f}")
-if 'avg_sentiment_large_decrease_headline' in petrol_metrics:
-    print(f"  Average sentiment per large decrease - Headlines: {petrol_metrics['avg_sentiment_large_decrease_headline']:.3f}")
-    print(f"  Average sentiment per large decrease - Text: {petrol_metrics['avg_sentiment_large_decrease_text']:.3f}")
-
-# Calculate for diesel
-diesel_metrics, diesel_inc, diesel_dec, diesel_large_inc, diesel_large_dec = calculate_sentiment_metrics(combined_df, 'diesel')
-
-print("\nDIESEL:")
-print(f"  Price increases: {diesel_inc}, decreases: {diesel_dec}")
-print(f"  Large increases (>=10 PKR): {diesel_large_inc}, large decreases (<=10 PKR): {diesel_large_dec}")
-if 'sentiment_per_unit_increase_headline' in diesel_metrics:
-    print(f"  Sentiment per unit increase - Headlines: {diesel_metrics['sentiment_per_unit_increase_headline']:.3f}")
-    print(f"  Sentiment per unit increase - Text: {diesel_metrics['sentiment_per_unit_increase_text']:.3f}")
-if 'sentiment_per_unit_decrease_headline' in diesel_metrics:
-    print(f"  Sentiment per unit decrease - Headlines: {diesel_metrics['sentiment_per_unit_decrease_headline']:.3f}")
-    print(f"  Sentiment per unit decrease - Text: {diesel_metrics['sentiment_per_unit_decrease_text']:.3f}")
-if 'avg_sentiment_large_increase_headline' in diesel_metrics:
-    print(f"  Average sentiment per large increase - Headlines: {diesel_metrics['avg_sentiment_large_increase_headline']:.3f}")
-    print(f"  Average sentiment per large increase - Text: {diesel_metrics['avg_sentiment_large_increase_text']:.3f}")
-if 'avg_sentiment_large_decrease_headline' in diesel_metrics:
-    print(f"  Average sentiment per large decrease - Headlines: {diesel_metrics['avg_sentiment_large_decrease_headline']:.3f}")
-    print(f"  Average sentiment per large decrease - Text: {diesel_metrics['avg_sentiment_large_decrease_text']:.3f}")
+# Counts, sentiment per unit change and large-change averages of both fuels in one groupby
+fuel_metrics = fuel_change_metrics(combined_df, large_threshold=10).loc['gemini']
+
+for i, fuel in enumerate(['petrol', 'diesel']):
+    metrics = fuel_metrics.loc[fuel]
+    print(("\n" if i > 0 else "") + f"{fuel.upper()}:")
+    print(f"  Price increases: {int(metrics['increases'])}, decreases: {int(metrics['decreases'])}")
+    print(f"  Large increases (>=10 PKR): {int(metrics['large_increases'])}, large decreases (<=10 PKR): {int(metrics['large_decreases'])}")
+    for group, label in [('increase', 'Sentiment per unit increase'), ('decrease', 'Sentiment per unit decrease')]:
+        if metrics[group + 's'] > 0:
+            print(f"  {label} - Headlines: {metrics['headline_per_unit_' + group]:.3f}")
+            print(f"  {label} - Text: {metrics['text_per_unit_' + group]:.3f}")
+    for group, label in [('large_increase', 'Average sentiment per large increase'),
+                         ('large_decrease', 'Average sentiment per large decrease')]:
+        if metrics[group + 's'] > 0:
+            print(f"  {label} - Headlines: {metrics['headline_' + group + '_mean']:.3f}")
+            print(f"  {label} - Text: {metrics['text_' + group + '_mean']:.3f}")
 
 # 4. SPECIFIC DATE EXAMPLES
 print("\n4. SPECIFIC DATE EXAMPLES")
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from scipy import stats
+from data_loader import load_dataset
+from metrics_engine import ANY_FUEL, compute_metrics, fuel_sensitivity, sensitivity_lines
 
 def analyze_urdu_sentiment():
     """
@@ -8,7 +10,13 @@ def analyze_urdu_sentiment():
     Reproduces the findings similar to the English analysis
     """
     # Read the Urdu CSV file
-    df = pd.read_csv('data/urdu_average_data.csv')
+    df = load_dataset('data/urdu_average_data.csv')
+    
+    # Define large changes (10 PKR or more)
+    large_threshold = 10
+    
+    # Every group mean, sensitivity and correlation in one pass
+    metrics = compute_metrics(df, 'openai', large_threshold=large_threshold)
     
     print("=" * 80)
     print("URDU ARTICLES - OPENAI SENTIMENT ANALYSIS")
@@ -20,8 +28,8 @@ def analyze_urdu_sentiment():
     # 1. BASIC AVERAGES
     print("1. OVERALL AVERAGE SENTIMENT SCORES")
     print("-" * 50)
-    headline_avg = df['openai_headline_overall_sentiment'].mean()
-    text_avg = df['openai_text_overall_sentiment'].mean()
+    headline_avg = metrics.loc[(ANY_FUEL, 'all'), 'headline_mean']
+    text_avg = metrics.loc[(ANY_FUEL, 'all'), 'text_mean']
     print(f"Average openai_headline_overall_sentiment: {headline_avg:.6f}")
     print(f"Average openai_text_overall_sentiment: {text_avg:.6f}")
     print(f"Overall difference (text - headline): {text_avg - headline_avg:.6f}")
@@ -32,26 +40,24 @@ def analyze_urdu_sentiment():
     print("-" * 50)
     
     # Price drops analysis
-    price_drops = df[(df['petrol_change'] < 0) | (df['diesel_change'] < 0)].copy()
-    price_drops['sentiment_diff'] = price_drops['openai_text_overall_sentiment'] - price_drops['openai_headline_overall_sentiment']
+    price_drops = metrics.loc[(ANY_FUEL, 'drop')]
     
     # Price hikes analysis
-    price_hikes = df[(df['petrol_change'] > 0) | (df['diesel_change'] > 0)].copy()
-    price_hikes['sentiment_diff'] = price_hikes['openai_text_overall_sentiment'] - price_hikes['openai_headline_overall_sentiment']
+    price_hikes = metrics.loc[(ANY_FUEL, 'hike')]
     
-    print(f"Price Drops Analysis ({len(price_drops)} instances):")
-    if len(price_drops) > 0:
-        headline_drops_avg = price_drops['openai_headline_overall_sentiment'].mean()
-        text_drops_avg = price_drops['openai_text_overall_sentiment'].mean()
+    print(f"Price Drops Analysis ({price_drops['count']} instances):")
+    if price_drops['count'] > 0:
+        headline_drops_avg = price_drops['headline_mean']
+        text_drops_avg = price_drops['text_mean']
         drops_diff = text_drops_avg - headline_drops_avg
         print(f"  Headlines average sentiment: {headline_drops_avg:.3f}")
         print(f"  Body text average sentiment: {text_drops_avg:.3f}")
         print(f"  Difference (text - headline): {drops_diff:.3f}")
     
-    print(f"\nPrice Hikes Analysis ({len(price_hikes)} instances):")
-    if len(price_hikes) > 0:
-        headline_hikes_avg = price_hikes['openai_headline_overall_sentiment'].mean()
-        text_hikes_avg = price_hikes['openai_text_overall_sentiment'].mean()
+    print(f"\nPrice Hikes Analysis ({price_hikes['count']} instances):")
+    if price_hikes['count'] > 0:
+        headline_hikes_avg = price_hikes['headline_mean']
+        text_hikes_avg = price_hikes['text_mean']
         hikes_diff = text_hikes_avg - headline_hikes_avg
         print(f"  Headlines average sentiment: {headline_hikes_avg:.3f}")
         print(f"  Body text average sentiment: {text_hikes_avg:.3f}")
@@ -62,82 +68,14 @@ def analyze_urdu_sentiment():
     print("3. FUEL PRICE CHANGE SENSITIVITY ANALYSIS")
     print("-" * 50)
     
-    # Define large changes (10 PKR or more)
-    large_threshold = 10
-    
-    # Petrol analysis
-    petrol_increases = df[df['petrol_change'] > 0]
-    petrol_decreases = df[df['petrol_change'] < 0]
-    large_petrol_increases = df[df['petrol_change'] >= large_threshold]
-    large_petrol_decreases = df[df['petrol_change'] <= -large_threshold]
-    
-    # Diesel analysis
-    diesel_increases = df[df['diesel_change'] > 0]
-    diesel_decreases = df[df['diesel_change'] < 0]
-    large_diesel_increases = df[df['diesel_change'] >= large_threshold]
-    large_diesel_decreases = df[df['diesel_change'] <= -large_threshold]
-    
-    print("PETROL SENSITIVITY:")
-    print("  Headlines:")
-    if len(petrol_increases) > 0:
-        petrol_headline_per_increase = petrol_increases['openai_headline_overall_sentiment'].mean() / petrol_increases['petrol_change'].mean()
-        print(f"    Sentiment per unit increase: {petrol_headline_per_increase:.3f}")
-    
-    if len(petrol_decreases) > 0:
-        petrol_headline_per_decrease = petrol_decreases['openai_headline_overall_sentiment'].mean() / abs(petrol_decreases['petrol_change'].mean())
-        print(f"    Sentiment per unit decrease: {petrol_headline_per_decrease:.3f}")
-    
-    if len(large_petrol_increases) > 0:
-        print(f"    Average sentiment per large increase: {large_petrol_increases['openai_headline_overall_sentiment'].mean():.3f}")
-    
-    if len(large_petrol_decreases) > 0:
-        print(f"    Average sentiment per large decrease: {large_petrol_decreases['openai_headline_overall_sentiment'].mean():.3f}")
-    
-    print("  Body Text:")
-    if len(petrol_increases) > 0:
-        petrol_text_per_increase = petrol_increases['openai_text_overall_sentiment'].mean() / petrol_increases['petrol_change'].mean()
-        print(f"    Sentiment per unit increase: {petrol_text_per_increase:.3f}")
-    
-    if len(petrol_decreases) > 0:
-        petrol_text_per_decrease = petrol_decreases['openai_text_overall_sentiment'].mean() / abs(petrol_decreases['petrol_change'].mean())
-        print(f"    Sentiment per unit decrease: {petrol_text_per_decrease:.3f}")
-    
-    if len(large_petrol_increases) > 0:
-        print(f"    Average sentiment per large increase: {large_petrol_increases['openai_text_overall_sentiment'].mean():.3f}")
-    
-    if len(large_petrol_decreases) > 0:
-        print(f"    Average sentiment per large decrease: {large_petrol_decreases['openai_text_overall_sentiment'].mean():.3f}")
-    
-    print("\nDIESEL SENSITIVITY:")
-    print("  Headlines:")
-    if len(diesel_increases) > 0:
-        diesel_headline_per_increase = diesel_increases['openai_headline_overall_sentiment'].mean() / diesel_increases['diesel_change'].mean()
-        print(f"    Sentiment per unit increase: {diesel_headline_per_increase:.3f}")
-    
-    if len(diesel_decreases) > 0:
-        diesel_headline_per_decrease = diesel_decreases['openai_headline_overall_sentiment'].mean() / abs(diesel_decreases['diesel_change'].mean())
-        print(f"    Sentiment per unit decrease: {diesel_headline_per_decrease:.3f}")
-    
-    if len(large_diesel_increases) > 0:
-        print(f"    Average sentiment per large increase: {large_diesel_increases['openai_headline_overall_sentiment'].mean():.3f}")
-    
-    if len(large_diesel_decreases) > 0:
-        print(f"    Average sentiment per large decrease: {large_diesel_decreases['openai_headline_overall_sentiment'].mean():.3f}")
-    
-    print("  Body Text:")
-    if len(diesel_increases) > 0:
-        diesel_text_per_increase = diesel_increases['openai_text_overall_sentiment'].mean() / diesel_increases['diesel_change'].mean()
-        print(f"    Sentiment per unit increase: {diesel_text_per_increase:.3f}")
-    
-    if len(diesel_decreases) > 0:
-        diesel_text_per_decrease = diesel_decreases['openai_text_overall_sentiment'].mean() / abs(diesel_decreases['diesel_change'].mean())
-        print(f"    Sentiment per unit decrease: {diesel_text_per_decrease:.3f}")
-    
-    if len(large_diesel_increases) > 0:
-        print(f"    Average sentiment per large increase: {large_diesel_increases['openai_text_overall_sentiment'].mean():.3f}")
-    
-    if len(large_diesel_decreases) > 0:
-        print(f"    Average sentiment per large decrease: {large_diesel_decreases['openai_text_overall_sentiment'].mean():.3f}")
+    for i, fuel in enumerate(['petrol', 'diesel']):
+        if i > 0:
+            print()
+        print(f"{fuel.upper()} SENSITIVITY:")
+        for section, section_name in [('headline', 'Headlines'), ('text', 'Body Text')]:
+            print(f"  {section_name}:")
+            for line in sensitivity_lines(metrics, fuel, section):
+                print(f"    {line}")
     
     print()
     
@@ -146,10 +84,10 @@ def analyze_urdu_sentiment():
     print("-" * 50)
     
     # Calculate correlations
-    petrol_headline_corr = df['petrol_change'].corr(df['openai_headline_overall_sentiment'])
-    petrol_text_corr = df['petrol_change'].corr(df['openai_text_overall_sentiment'])
-    diesel_headline_corr = df['diesel_change'].corr(df['openai_headline_overall_sentiment'])
-    diesel_text_corr = df['diesel_change'].corr(df['openai_text_overall_sentiment'])
+    petrol_headline_corr = metrics.loc[('petrol', 'all'), 'headline_corr']
+    petrol_text_corr = metrics.loc[('petrol', 'all'), 'text_corr']
+    diesel_headline_corr = metrics.loc[('diesel', 'all'), 'headline_corr']
+    diesel_text_corr = metrics.loc[('diesel', 'all'), 'text_corr']
     
     print(f"Petrol vs Headlines correlation: {petrol_headline_corr:.4f}")
     print(f"Petrol vs Body Text correlation: {petrol_text_corr:.4f}")
@@ -157,8 +95,8 @@ def analyze_urdu_sentiment():
     print(f"Diesel vs Body Text correlation: {diesel_text_corr:.4f}")
     
     # Overall sensitivity comparison
-    avg_petrol_sensitivity = (abs(petrol_headline_corr) + abs(petrol_text_corr)) / 2
-    avg_diesel_sensitivity = (abs(diesel_headline_corr) + abs(diesel_text_corr)) / 2
+    avg_petrol_sensitivity = fuel_sensitivity(metrics, 'petrol')
+    avg_diesel_sensitivity = fuel_sensitivity(metrics, 'diesel')
     
     print(f"\nAverage petrol sensitivity: {avg_petrol_sensitivity:.4f}")
     print(f"Average diesel sensitivity: {avg_diesel_sensitivity:.4f}")
@@ -175,6 +113,8 @@ def analyze_urdu_sentiment():
     print("-" * 50)
     
     # Find examples of large price changes for asymmetric analysis
+    large_petrol_increases = df[df['petrol_change'] >= large_threshold]
+    large_petrol_decreases = df[df['petrol_change'] <= -large_threshold]
     if len(large_petrol_increases) > 0 and len(large_petrol_decreases) > 0:
         print("Example of Asymmetric Response (Petrol):")
         # Find a representative increase and decrease
@@ -196,15 +136,15 @@ def analyze_urdu_sentiment():
     # Compare key metrics with the provided English findings
     print("Key Findings for Urdu Articles:")
     
-    if len(price_drops) > 0:
-        urdu_headline_drops = price_drops['openai_headline_overall_sentiment'].mean()
-        urdu_text_drops = price_drops['openai_text_overall_sentiment'].mean()
+    if price_drops['count'] > 0:
+        urdu_headline_drops = price_drops['headline_mean']
+        urdu_text_drops = price_drops['text_mean']
         urdu_drops_diff = urdu_text_drops - urdu_headline_drops
         print(f"• During price drops: Headlines avg {urdu_headline_drops:.2f}, Text avg {urdu_text_drops:.2f} (diff: {urdu_drops_diff:.2f})")
     
-    if len(price_hikes) > 0:
-        urdu_headline_hikes = price_hikes['openai_headline_overall_sentiment'].mean()
-        urdu_text_hikes = price_hikes['openai_text_overall_sentiment'].mean()
+    if price_hikes['count'] > 0:
+        urdu_headline_hikes = price_hikes['headline_mean']
+        urdu_text_hikes = price_hikes['text_mean']
         urdu_hikes_diff = urdu_text_hikes - urdu_headline_hikes
         print(f"• During price hikes: Headlines avg {urdu_headline_hikes:.2f}, Text avg {urdu_text_hikes:.2f} (diff: {urdu_hikes_diff:.2f})")
     
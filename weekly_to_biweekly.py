@@ -1,21 +1,14 @@
 import pandas as pd
+from price_store import workbook_frame
+from resampling import resample
 
-# Load the data from the Excel file
+# Load every column of the Excel file, through the price store so it is decoded once
 input_file = 'DCOILBRENTEU.xlsx'
-data = pd.read_excel(input_file)
+data = workbook_frame(input_file)
 
-# Function to convert date to biweekly format
-def convert_to_biweekly(date):
-    if date.day <= 15:
-        return date.replace(day=1)
-    else:
-        return date.replace(day=15)
-
-# Apply the conversion function to the 'date' column
-data['date'] = pd.to_datetime(data['date']).apply(convert_to_biweekly)
-
-# Remove duplicate dates
-data = data.drop_duplicates(subset='date')
+# Average each half month: days 1-15 are labelled the 1st and the rest the 15th,
+# the same dates the other price workbooks use
+data = resample(data, 'half-month', 'mean', split_day=16, label_day=15).reset_index()
 
 data['date'] = data['date'].dt.strftime('%d-%b-%Y')
 